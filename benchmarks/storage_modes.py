@@ -0,0 +1,70 @@
+"""
+Compare the memory and speed of the different ways Yields can store its
+tables.
+
+For each model and storage mode this prints the memory the object holds on to
+after it's built (measured with tracemalloc, so memory mapped bundle tables
+don't count), how long it takes to build, and how long it takes to change the
+metallicity. Run it from the top of the repository with
+
+    python benchmarks/storage_modes.py
+"""
+import gc
+import time
+import tracemalloc
+
+import numpy as np
+
+import yields
+
+models = ["nugrid_2", "ww_95_II_20A"]
+
+modes = [("isotope", dict(resolution="isotope")),
+         ("element", dict(resolution="element"))]
+
+
+def retained_memory(model, **kwargs):
+    """Memory in kB held by one Yields object."""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    yields_obj = yields.Yields(model, **kwargs)
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del yields_obj
+    return (after - before) / 1024
+
+
+def build_time(model, repeats=5, **kwargs):
+    """Time in ms to build one Yields object."""
+    start = time.perf_counter()
+    for _ in range(repeats):
+        yields.Yields(model, **kwargs)
+    return (time.perf_counter() - start) / repeats * 1000
+
+
+def set_metallicity_time(model, repeats=50, **kwargs):
+    """Time in ms to change the metallicity of a Yields object."""
+    yields_obj = yields.Yields(model, **kwargs)
+    metallicities = np.linspace(0, 0.02, repeats)
+    start = time.perf_counter()
+    for z in metallicities:
+        yields_obj.set_metallicity(z)
+    return (time.perf_counter() - start) / repeats * 1000
+
+
+if __name__ == "__main__":
+    # load the bundle first so it's not counted in the first measurement
+    yields.Yields("test")
+    print("{:<14} {:<10} {:>12} {:>12} {:>12} {:>12}"
+          .format("model", "mode", "files (kB)", "bundle (kB)",
+                  "build (ms)", "set Z (ms)"))
+    for model in models:
+        for name, kwargs in modes:
+            print("{:<14} {:<10} {:>12.0f} {:>12.0f} {:>12.2f} {:>12.3f}"
+                  .format(model, name,
+                          retained_memory(model, use_bundle=False, **kwargs),
+                          retained_memory(model, **kwargs),
+                          build_time(model, **kwargs),
+                          set_metallicity_time(model, **kwargs)))
@@ -350,3 +350,556 @@ def test_log_z_z_sun_array():
                                           [0, 1, 0, solar_z])
     real = [1.789274018, 1.789274018, 0, 0]
     assert test == approx(real)
+
+
+# -----------------------------------------------------------
+
+#  Test the cache
+
+# -----------------------------------------------------------
+@pytest.fixture
+def cached_abundance_obj():
+    return abundances.Abundances(cache=True)
+
+
+def test_cache_same_values(cached_abundance_obj):
+    """The cache should not change any of the results. """
+    z_Ia = np.random.choice([0.001, 0.002, 0.003], 100)
+    z_II = np.random.choice([0.01, 0.02], 100)
+    for elt in ["O", "Fe", "Na"]:
+        assert cached_abundance_obj.x_on_fe(elt, z_Ia, z_II) == \
+               approx(abundance_obj.x_on_fe(elt, z_Ia, z_II))
+        assert cached_abundance_obj.x_on_h(elt, z_Ia, z_II) == \
+               approx(abundance_obj.x_on_h(elt, z_Ia, z_II))
+    assert cached_abundance_obj.z_on_h(z_Ia, z_II) == \
+           approx(abundance_obj.z_on_h(z_Ia, z_II))
+    assert cached_abundance_obj.log_z_over_z_sun(z_Ia, z_II) == \
+           approx(abundance_obj.log_z_over_z_sun(z_Ia, z_II))
+
+
+def test_cache_special_values(cached_abundance_obj):
+    """The infinities and nans should make it through the cache. """
+    assert np.isneginf(cached_abundance_obj.z_on_h(0, 0))
+    assert np.isnan(cached_abundance_obj.x_on_fe("O", 0, 0))
+    # a second time uses the cached value
+    assert np.isnan(cached_abundance_obj.x_on_fe("O", 0, 0))
+    assert type(cached_abundance_obj.x_on_fe("O", 0.1, 0.2)) == float
+
+
+def test_cache_statistics(cached_abundance_obj):
+    """Check that hits and misses are counted properly. """
+    cached_abundance_obj.x_on_fe("O", [0.01, 0.01, 0.02], [0.01, 0.01, 0.01])
+    info = cached_abundance_obj.cache_info()
+    assert info["misses"] == 2  # two unique pairs
+    assert info["hits"] == 1  # one duplicate
+    assert info["size"] == 2
+
+    # then everything here has been seen before
+    cached_abundance_obj.x_on_fe("O", [0.02, 0.01], [0.01, 0.01])
+    info = cached_abundance_obj.cache_info()
+    assert info["misses"] == 2
+    assert info["hits"] == 3
+
+    # a different element is a different cache entry
+    cached_abundance_obj.x_on_fe("Mg", [0.02, 0.01], [0.01, 0.01])
+    assert cached_abundance_obj.cache_info()["misses"] == 4
+
+    cached_abundance_obj.clear_cache()
+    assert cached_abundance_obj.cache_info() == {"hits": 0, "misses": 0,
+                                                 "size": 0}
+
+
+def test_cache_size_limit():
+    """Once the cache is full the oldest values are dropped, and the results
+    don't change."""
+    abund = abundances.Abundances(cache=True, cache_size=4)
+    z_Ia = np.linspace(0.001, 0.01, 4)
+    z_II = np.linspace(0.002, 0.02, 4)
+    abund.x_on_fe("O", z_Ia, z_II)
+    abund.x_on_fe("O", z_Ia + 0.01, z_II)
+    assert abund.cache_info()["size"] == 4
+    # the newest ones are still there, but the first ones aren't
+    abund.x_on_fe("O", z_Ia + 0.01, z_II)
+    assert abund.cache_info()["misses"] == 8
+    values = abund.x_on_fe("O", z_Ia, z_II)
+    assert abund.cache_info()["misses"] == 12
+    assert abund.cache_info()["size"] == 4
+    assert values == approx(abundance_obj.x_on_fe("O", z_Ia, z_II))
+
+
+def test_cache_mixed_hits_and_misses(cached_abundance_obj):
+    """Pairs that are in the cache and ones that aren't can come in any
+    order."""
+    rng = np.random.default_rng(14)
+    z_Ia = rng.choice([0, 0.001, 0.01, 0.02], 200)
+    z_II = rng.choice([0.0001, 0.005, 0.02], 200)
+    first = cached_abundance_obj.x_on_fe("Mg", z_Ia[:100], z_II[:100])
+    values = cached_abundance_obj.x_on_fe("Mg", z_Ia, z_II)
+    assert values[:100] == approx(first, nan_ok=True)
+    assert values == approx(abundance_obj.x_on_fe("Mg", z_Ia, z_II),
+                            nan_ok=True)
+    assert cached_abundance_obj.cache_info()["misses"] == 12
+
+
+def test_cache_tolerance():
+    """Nearly identical metallicities should share one evaluation. """
+    abund = abundances.Abundances(cache=True, cache_tolerance=1E-3)
+    z_Ia = [0.01, 0.01 * (1 + 1E-5), 0.01 * (1 - 1E-5), 0.02]
+    z_II = [0.01, 0.01, 0.01 * (1 + 1E-5), 0.01]
+    values = abund.x_on_fe("O", z_Ia, z_II)
+    assert abund.cache_info()["misses"] == 2
+    assert values[0] == values[1] == values[2]
+    # the rounding should stay within the tolerance
+    assert values == approx(abundance_obj.x_on_fe("O", z_Ia, z_II), abs=1E-3)
+    # zero is still zero
+    assert np.isneginf(abund.z_on_h(0, 0))
+
+
+# -----------------------------------------------------------
+
+#  Test the precomputed grid
+
+# -----------------------------------------------------------
+@pytest.fixture(scope="module")
+def grid_abundance_obj():
+    abund = abundances.Abundances()
+    abund.precompute(["O", "Fe"], n_points=64)
+    return abund
+
+
+def test_grid_error_bound(grid_abundance_obj):
+    """The interpolated values should be within the measured error. """
+    rng = np.random.default_rng(29)
+    z_Ia = 10**rng.uniform(-6.5, -1.5, 1000)
+    z_II = 10**rng.uniform(-6.5, -1.5, 1000)
+    for ratio in ["x_on_fe", "x_on_h"]:
+        test = getattr(grid_abundance_obj, ratio)("O", z_Ia, z_II)
+        real = getattr(abundance_obj, ratio)("O", z_Ia, z_II)
+        max_error = grid_abundance_obj.grid.max_error[(ratio, "O")]
+        assert 0 < max_error < 0.01
+        # the measured error is at the cell centers, so give it a bit of room
+        assert np.max(np.abs(test - real)) <= 1.1 * max_error
+
+
+def test_grid_exact_at_grid_points(grid_abundance_obj):
+    grid = grid_abundance_obj.grid
+    z_Ia = 10**grid.log_z_Ia[[0, 10, 63]]
+    z_II = 10**grid.log_z_II[[5, 63, 0]]
+    test = grid_abundance_obj.x_on_fe("O", z_Ia, z_II)
+    real = abundance_obj.x_on_fe("O", z_Ia, z_II)
+    assert test == approx(real, rel=1E-10)
+
+
+def test_grid_outside(grid_abundance_obj):
+    """Things outside the grid are calculated directly. """
+    assert np.isnan(grid_abundance_obj.x_on_fe("O", 0, 0))
+    assert np.isneginf(grid_abundance_obj.x_on_h("O", 0, 0))
+    assert grid_abundance_obj.x_on_fe("O", solar_z, 0) == \
+           approx(-1.507779731)
+    assert grid_abundance_obj.x_on_fe("O", [0.5, 1E-3], [0.2, 1E-3]) == \
+           approx(abundance_obj.x_on_fe("O", [0.5, 1E-3], [0.2, 1E-3]),
+                  abs=1E-3)
+    # elements not in the grid are also calculated directly
+    assert grid_abundance_obj.x_on_fe("Na", [0.001], [0.002]) == \
+           abundance_obj.x_on_fe("Na", [0.001], [0.002])
+
+
+def test_grid_nan(grid_abundance_obj):
+    """nan metallicities aren't in the grid, so they're calculated directly
+    like anything else outside it."""
+    z_Ia = np.array([np.nan, 1E-3, 1E-3])
+    z_II = np.array([1E-3, np.nan, 1E-3])
+    values, inside = grid_abundance_obj.grid.lookup("x_on_fe", "O", z_Ia,
+                                                    z_II)
+    assert list(inside) == [False, False, True]
+    assert np.all(np.isnan(values[:2]))
+    test = grid_abundance_obj.x_on_fe("O", z_Ia, z_II)
+    real = abundance_obj.x_on_fe("O", z_Ia, z_II)
+    assert np.all(np.isnan(test[:2]))
+    assert test[2] == approx(real[2], abs=1E-3)
+
+
+def test_grid_write_read(grid_abundance_obj, tmp_path):
+    grid = grid_abundance_obj.grid
+    filename = str(tmp_path / "grid.bin")
+    grid.write(filename)
+    new_grid = abundances.yields.AbundanceGrid.read(filename)
+
+    assert np.array_equal(new_grid.log_z_Ia, grid.log_z_Ia)
+    assert np.array_equal(new_grid.log_z_II, grid.log_z_II)
+    assert new_grid.tables.keys() == grid.tables.keys()
+    for key in grid.tables:
+        assert np.array_equal(new_grid.tables[key], grid.tables[key])
+        assert new_grid.max_error[key] == grid.max_error[key]
+
+    # check the layout that other codes rely on
+    with open(filename, "rb") as in_file:
+        assert in_file.read(8) == b"YLDGRID1"
+        assert np.frombuffer(in_file.read(16), dtype="<i4").tolist() == \
+               [64, 64, 4, 16]
+
+
+# -----------------------------------------------------------
+
+#  Test multiprocess evaluation
+
+# -----------------------------------------------------------
+def test_workers_same_values():
+    abund = abundances.Abundances()
+    z_I = np.random.uniform(0, 0.01, 1001)
+    z_II = np.random.uniform(0, 0.02, 1001)
+    try:
+        for elt in ["O", "Mg"]:
+            assert abund.x_on_fe(elt, z_I, z_II, workers=2) == \
+                   approx(abundance_obj.x_on_fe(elt, z_I, z_II))
+            assert abund.x_on_h(elt, z_I, z_II, workers=2) == \
+                   approx(abundance_obj.x_on_h(elt, z_I, z_II))
+        assert abund.z_on_h(z_I, z_II, workers=2) == \
+               approx(abundance_obj.z_on_h(z_I, z_II))
+        assert abund.log_z_over_z_sun(z_I, z_II, workers=3) == \
+               approx(abundance_obj.log_z_over_z_sun(z_I, z_II))
+        # single values still work
+        assert abund.x_on_fe("O", solar_z, 0, workers=2) == \
+               approx(-1.507779731)
+    finally:
+        abund.close()
+    assert abund._pool is None
+
+
+def test_workers_with_ww():
+    """The workers need to use the same yields as the parent. """
+    abund = abundances.Abundances("ww")
+    z_I = np.random.uniform(0, 0.01, 100)
+    z_II = np.random.uniform(0, 0.02, 100)
+    try:
+        assert abund.x_on_fe("O", z_I, z_II, workers=2) == \
+               approx(abund.x_on_fe("O", z_I, z_II))
+    finally:
+        abund.close()
+
+
+# -----------------------------------------------------------
+
+#  Test threaded evaluation
+
+# -----------------------------------------------------------
+def test_threads_same_values():
+    z_I = np.random.uniform(0, 0.01, 50000)  # more than one block
+    z_II = np.random.uniform(0, 0.02, 50000)
+    for elt in ["O", "Mg"]:
+        assert abundance_obj.x_on_fe(elt, z_I, z_II, n_threads=4) == \
+               approx(abundance_obj.x_on_fe(elt, z_I, z_II))
+        assert abundance_obj.x_on_h(elt, z_I, z_II, n_threads=4) == \
+               approx(abundance_obj.x_on_h(elt, z_I, z_II))
+    assert abundance_obj.z_on_h(z_I, z_II, n_threads=3) == \
+           approx(abundance_obj.z_on_h(z_I, z_II))
+    assert abundance_obj.log_z_over_z_sun(z_I, z_II, n_threads=2) == \
+           approx(abundance_obj.log_z_over_z_sun(z_I, z_II))
+    assert abundance_obj.x_on_fe("O", solar_z, 0, n_threads=2) == \
+           approx(-1.507779731)
+
+
+def test_threads_with_cache():
+    abund = abundances.Abundances(cache=True)
+    z_I = np.random.choice([0.001, 0.002], 20000)
+    z_II = np.random.uniform(0, 0.02, 20000)
+    assert abund.x_on_fe("O", z_I, z_II, n_threads=2) == \
+           approx(abundance_obj.x_on_fe("O", z_I, z_II))
+
+
+# -----------------------------------------------------------
+
+#  Test model selection and any number of channels
+
+# -----------------------------------------------------------
+def test_ia_model_selection():
+    abund = abundances.Abundances("ww", "nomoto_18_Ia_W7")
+    assert abund.yields_Ia.model_set == "nomoto_18_Ia_W7"
+    assert abund.yields_II.model_set == "ww_95_imf_ave"
+    # we can also pass the full name of the Type II model
+    abund = abundances.Abundances("nomoto_06_II_imf_hn")
+    assert abund.yields_II.model_set == "nomoto_06_II_imf_hn"
+    with pytest.raises(ValueError):
+        abundances.Abundances("not_a_model")
+
+
+@pytest.fixture(scope="module")
+def two_channels():
+    return abundances.ChannelAbundances({"Ia": "iwamoto_99_Ia_W7",
+                                         "II": "nomoto_06_II_imf_ave"})
+
+
+@pytest.fixture(scope="module")
+def three_channels():
+    return abundances.ChannelAbundances({"Ia": "nomoto_18_Ia_W7",
+                                         "II": "ww_95_imf_ave",
+                                         "AGB": "nugrid_3"})
+
+
+def test_channels_match_two_channel(two_channels):
+    """With Ia and II channels we should get the same as Abundances. """
+    z_I = np.random.uniform(0, 0.01, 1000)
+    z_II = 10**np.random.uniform(-7, -0.5, 1000)
+    z = np.stack([z_I, z_II], axis=1)
+    for elt in ["O", "Na", "Fe"]:
+        assert two_channels.x_on_fe(elt, z) == \
+               approx(abundance_obj.x_on_fe(elt, z_I, z_II))
+        assert two_channels.x_on_h(elt, z) == \
+               approx(abundance_obj.x_on_h(elt, z_I, z_II))
+    assert two_channels.z_on_h(z) == approx(abundance_obj.z_on_h(z_I, z_II))
+    assert two_channels.log_z_over_z_sun(z) == \
+           approx(abundance_obj.log_z_over_z_sun(z_I, z_II))
+
+    # all elements at once is the same as one at a time
+    all_elts = two_channels.x_on_fe(["O", "Na", "Fe"], z)
+    assert all_elts.shape == (1000, 3)
+    assert all_elts[:, 1] == approx(two_channels.x_on_fe("Na", z))
+
+
+def test_channels_single_values(two_channels):
+    assert two_channels.x_on_fe("O", [solar_z, 0]) == approx(-1.507779731)
+    assert two_channels.x_on_h("Fe", [0, solar_z]) == approx(-0.2740616354)
+    assert type(two_channels.x_on_fe("O", [solar_z, 0])) == float
+    assert np.isnan(two_channels.x_on_fe("O", [0, 0]))
+    assert np.isneginf(two_channels.z_on_h([0, 0]))
+    assert two_channels.x_on_fe(["O", "Fe"], [0, solar_z]) == \
+           approx([0.3533312216, 0])
+
+
+def test_channels_three(three_channels):
+    z = [[0.001, 0.002, 0.0005], [0.0001, 0.001, 0.002]]
+    values = three_channels.x_on_fe(["O", "C", "N"], z)
+    assert values.shape == (2, 3)
+    assert np.all(np.isfinite(values))
+
+    # check the mass fractions against doing each channel by hand
+    masses = three_channels.element_mass_fractions("N", z)
+    for row, z_row in zip(masses, z):
+        real = 0
+        for channel, z_c in zip(["Ia", "II", "AGB"], z_row):
+            yields_obj = three_channels.yields[channel]
+            if "N" in yields_obj.abundances:
+                real += z_c * yields_obj.mass_fraction("N", z_c)
+        assert row == approx(real)
+
+
+def test_channels_error_checking(three_channels):
+    with pytest.raises(ValueError):
+        three_channels.x_on_fe("O", [0.01, 0.01])  # wrong number of channels
+    with pytest.raises(ValueError):
+        three_channels.x_on_fe("O", [0.01, -0.01, 0.01])
+    with pytest.raises(ValueError):
+        three_channels.x_on_fe("O", [0.5, 0.3, 0.3])  # sum larger than one
+
+
+# -----------------------------------------------------------
+
+#  Test solving for the metallicities
+
+# -----------------------------------------------------------
+z_rng = np.random.default_rng(38)
+solve_z_Ia = 10**z_rng.uniform(-5, -1.7, 1000)
+solve_z_II = 10**z_rng.uniform(-5, -1.3, 1000)
+
+
+def test_solve_round_trip_one_element():
+    fe_on_h = abundance_obj.x_on_h("Fe", solve_z_Ia, solve_z_II)
+    o_on_fe = abundance_obj.x_on_fe("O", solve_z_Ia, solve_z_II)
+    z_Ia, z_II, residual, converged = \
+        abundance_obj.solve_metallicity(fe_on_h, {"O": o_on_fe})
+    assert np.all(converged)
+    assert z_Ia == approx(solve_z_Ia, rel=1E-6)
+    assert z_II == approx(solve_z_II, rel=1E-6)
+    assert np.all(residual < 1E-8)
+
+
+def test_solve_round_trip_two_elements():
+    fe_on_h = abundance_obj.x_on_h("Fe", solve_z_Ia, solve_z_II)
+    x_on_fe = {elt: abundance_obj.x_on_fe(elt, solve_z_Ia, solve_z_II)
+               for elt in ["O", "Mg"]}
+    z_Ia, z_II, residual, converged = \
+        abundance_obj.solve_metallicity(fe_on_h, x_on_fe)
+    assert np.all(converged)
+    assert z_Ia == approx(solve_z_Ia, rel=1E-6)
+    assert z_II == approx(solve_z_II, rel=1E-6)
+
+
+def test_solve_single():
+    z_Ia, z_II, residual, converged = \
+        abundance_obj.solve_metallicity(0.0, {"O": 0.0})
+    assert isinstance(z_Ia, float)
+    assert converged is True
+    assert abundance_obj.x_on_h("Fe", z_Ia, z_II) == approx(0, abs=1E-8)
+    assert abundance_obj.x_on_fe("O", z_Ia, z_II) == approx(0, abs=1E-8)
+
+
+def test_solve_unreachable():
+    """No mix gives [O/Fe] = 3, so all the metals are from Type II, which
+    has the highest [O/Fe]."""
+    z_Ia, z_II, residual, converged = \
+        abundance_obj.solve_metallicity(0.0, {"O": 3.0})
+    assert converged
+    assert z_Ia == 0
+    assert residual > 1
+    assert abundance_obj.x_on_h("Fe", z_Ia, z_II) == approx(0, abs=1E-8)
+
+
+def test_solve_not_finite():
+    z_Ia, z_II, residual, converged = \
+        abundance_obj.solve_metallicity([np.nan, 0.0], {"O": [0.0, np.inf]})
+    assert np.all(np.isnan(z_Ia))
+    assert not np.any(converged)
+
+
+def test_solve_iteration_limit():
+    fe_on_h = abundance_obj.x_on_h("Fe", solve_z_Ia, solve_z_II)
+    o_on_fe = abundance_obj.x_on_fe("O", solve_z_Ia, solve_z_II)
+    converged = abundance_obj.solve_metallicity(fe_on_h, {"O": o_on_fe},
+                                                max_iterations=1)[3]
+    assert not np.any(converged)
+
+
+@pytest.mark.parametrize("x_on_fe", [{}, {"Fe": 0.0}, {"O": [0.0, 0.1]}])
+def test_solve_error_checking(x_on_fe):
+    with pytest.raises(ValueError):
+        abundance_obj.solve_metallicity(0.0, x_on_fe)
+
+
+# -----------------------------------------------------------
+
+#  Test derivatives
+
+# -----------------------------------------------------------
+jacobian_z_Ia = 10**z_rng.uniform(-5, -1.5, 100)
+jacobian_z_II = 10**z_rng.uniform(-5, -1.3, 100)
+
+
+def _numerical_jacobian(func, z_Ia, z_II, step=1E-7):
+    d_Ia = (func(z_Ia * (1 + step), z_II) - func(z_Ia * (1 - step), z_II)) / \
+        (2 * step * z_Ia)
+    d_II = (func(z_Ia, z_II * (1 + step)) - func(z_Ia, z_II * (1 - step))) / \
+        (2 * step * z_II)
+    return np.stack([d_Ia, d_II], axis=1)
+
+
+@pytest.mark.parametrize("name,args", [("x_on_h", ("O",)),
+                                       ("x_on_h", ("Fe",)),
+                                       ("x_on_fe", ("Mg",)),
+                                       ("z_on_h", ())])
+def test_jacobian(name, args):
+    func = getattr(abundance_obj, name)
+    values, jacobian = getattr(abundance_obj, name + "_jacobian")(
+        *args, jacobian_z_Ia, jacobian_z_II)
+    assert values == approx(func(*args, jacobian_z_Ia, jacobian_z_II))
+    assert jacobian.shape == (100, 2)
+    numerical = _numerical_jacobian(lambda z_Ia, z_II: func(*args, z_Ia, z_II),
+                                    jacobian_z_Ia, jacobian_z_II)
+    assert jacobian == approx(numerical, rel=1E-4)
+
+
+def test_jacobian_single():
+    value, jacobian = abundance_obj.x_on_fe_jacobian("O", 0.001, 0.01)
+    assert isinstance(value, float)
+    assert jacobian.shape == (2,)
+    # more Type Ia means less O per Fe
+    assert jacobian[0] < 0 < jacobian[1]
+
+
+def test_jacobian_error_checking():
+    with pytest.raises(ValueError):
+        abundance_obj.x_on_h_jacobian("O", [0.1, 0.2], [0.1])
+
+
+# -----------------------------------------------------------
+
+#  Test the likelihood
+
+# -----------------------------------------------------------
+likelihood_elements = ["O", "Mg", "Si", "Ca", "Ni", "Mn"]
+true_z_Ia, true_z_II = 0.002, 0.01
+true_x_on_fe = [abundance_obj.x_on_fe(elt, true_z_Ia, true_z_II)
+                for elt in likelihood_elements]
+true_fe_on_h = abundance_obj.x_on_h("Fe", true_z_Ia, true_z_II)
+likelihood = abundances.AbundanceLikelihood(
+    abundance_obj, likelihood_elements, true_x_on_fe, 0.05,
+    fe_on_h=true_fe_on_h, fe_on_h_error=0.1)
+walkers = np.stack([10**z_rng.uniform(-4, -1.5, 50),
+                    10**z_rng.uniform(-4, -1.3, 50)], axis=1)
+
+
+def test_likelihood_predict():
+    predicted = likelihood.predict(walkers)
+    assert predicted.shape == (50, len(likelihood_elements))
+    for idx, elt in enumerate(likelihood_elements):
+        assert predicted[:, idx] == approx(
+            abundance_obj.x_on_fe(elt, walkers[:, 0], walkers[:, 1]))
+
+
+def test_likelihood_values():
+    values = likelihood(walkers)
+    assert values.shape == (50,)
+    chi_squared = 0
+    for elt, observed in zip(likelihood_elements, true_x_on_fe):
+        chi_squared += ((abundance_obj.x_on_fe(elt, walkers[:, 0],
+                                               walkers[:, 1]) -
+                         observed) / 0.05)**2
+    chi_squared += ((abundance_obj.x_on_h("Fe", walkers[:, 0],
+                                          walkers[:, 1]) -
+                     true_fe_on_h) / 0.1)**2
+    norm = -len(likelihood_elements) * np.log(np.sqrt(2 * np.pi) * 0.05) - \
+        np.log(np.sqrt(2 * np.pi) * 0.1)
+    assert values == approx(norm - 0.5 * chi_squared)
+
+
+def test_likelihood_peak():
+    peak = likelihood([true_z_Ia, true_z_II])
+    assert isinstance(peak, float)
+    assert peak == approx(likelihood._log_norm)
+    assert np.all(likelihood(walkers) <= peak)
+
+
+def test_likelihood_shapes():
+    """Any leading shape of the parameters is kept."""
+    values = likelihood(walkers.reshape(5, 10, 2))
+    assert values.shape == (5, 10)
+    assert values.ravel() == approx(likelihood(walkers))
+
+
+def test_likelihood_outside():
+    values = likelihood([[-0.001, 0.01], [0.6, 0.5], [0, 0]])
+    assert np.all(np.isneginf(values))
+
+
+def test_likelihood_edge():
+    """Abundances allows the metallicities to add up to exactly one, so the
+    likelihood should too. There's no hydrogen left there, so [Fe/H] can't
+    be used."""
+    no_h = abundances.AbundanceLikelihood(abundance_obj, likelihood_elements,
+                                          true_x_on_fe, 0.05)
+    assert np.isfinite(no_h([0.25, 0.75]))
+    assert no_h.predict([0.25, 0.75]) == approx(
+        [abundance_obj.x_on_fe(elt, 0.25, 0.75)
+         for elt in likelihood_elements])
+
+
+def test_likelihood_missing_observation():
+    """NaN observations are left out."""
+    observed = list(true_x_on_fe)
+    observed[0] = np.nan
+    missing = abundances.AbundanceLikelihood(
+        abundance_obj, likelihood_elements, observed, 0.05)
+    without = abundances.AbundanceLikelihood(
+        abundance_obj, likelihood_elements[1:], true_x_on_fe[1:], 0.05)
+    assert missing(walkers) == approx(without(walkers))
+
+
+@pytest.mark.parametrize("kwargs", [{"elements": ["O", "Fe"]},
+                                    {"x_on_fe": [0.1]},
+                                    {"x_on_fe_errors": 0},
+                                    {"fe_on_h": 0.0}])
+def test_likelihood_error_checking(kwargs):
+    args = {"elements": ["O", "Mg"], "x_on_fe": [0.1, 0.2],
+            "x_on_fe_errors": 0.1}
+    args.update(kwargs)
+    with pytest.raises(ValueError):
+        abundances.AbundanceLikelihood(abundance_obj, **args)
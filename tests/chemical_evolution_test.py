@@ -0,0 +1,150 @@
+import yields
+
+import pytest
+from pytest import approx
+import numpy as np
+
+gce = yields.OneZoneGCE()
+gce_agb = yields.OneZoneGCE(AGB_type="nugrid_2")
+times = np.linspace(0, 10, 201)
+sfr = np.array([1.0, 2.0, 3.0])[:, np.newaxis] * np.exp(-times / 5)
+
+# -----------------------------------------------------------
+
+#  Batched yields
+
+# -----------------------------------------------------------
+@pytest.mark.parametrize("model", ["nomoto_06_II_imf_ave", "nugrid_2",
+                                   "ww_95_II_30B", "iwamoto_99_Ia_W7"])
+def test_yields_table_matches_set_metallicity(model):
+    """The batched interpolation should be the same as setting the
+    metallicity one value at a time."""
+    yields_obj = yields.Yields(model)
+    metallicities = np.array([[0, 1E-5], [0.003, 0.05]])
+    table = yields_obj.yields_table(["Fe", "O_16", "not_here"], metallicities)
+    assert table.shape == (2, 2, 3)
+    for z, row in zip(metallicities.flatten(), table.reshape(-1, 3)):
+        yields_obj.set_metallicity(z)
+        assert row == approx([yields_obj.Fe, yields_obj.O_16, 0])
+
+
+def test_yields_table_normalization():
+    """The normalization applies to the batched yields too."""
+    yields_obj = yields.Yields("nomoto_06_II_imf_ave")
+    yields_obj.normalize_metals(3)
+    yields_obj.set_metallicity(0.002)
+    assert yields_obj.yields_table(["O"], 0.002) == approx([yields_obj.O])
+
+
+# -----------------------------------------------------------
+
+#  Chemical evolution
+
+# -----------------------------------------------------------
+def test_inflow_only():
+    """Without star formation the gas just builds up, and stays
+    primordial."""
+    history = gce.run(times, np.zeros_like(times), inflow=2.0, initial_gas=1)
+    assert history.gas_mass == approx(1 + 2 * times)
+    assert np.all(history.metal_mass == 0)
+    assert history.mass_fraction("H") == approx(0.75)
+
+
+def test_species_add_up_to_gas():
+    """When we follow all the isotopes, they should add up to the gas mass
+    and metal mass."""
+    history = gce_agb.run(times, sfr, inflow=1.0, mass_loading=1.0,
+                          initial_gas=5)
+    assert np.sum(history.species_mass, axis=-1) == approx(history.gas_mass)
+    agb_metals = [idx for idx, name in enumerate(gce_agb.species)
+                  if name.split("_")[0] not in ["H", "He"]]
+    assert np.sum(history.species_mass[..., agb_metals], axis=-1) == \
+        approx(history.metal_mass, abs=1E-12)
+
+
+def test_metallicity_increases_closed_box():
+    """Without inflows the metallicity of a closed box only goes up."""
+    history = gce.run(times, sfr[0], initial_gas=20)
+    assert np.all(np.diff(history.metallicity) >= 0)
+    assert history.metallicity[-1] > 0
+
+
+def test_gas_never_negative():
+    """Asking for more star formation than there is gas uses it all up, but
+    doesn't go negative."""
+    history = gce.run(times, 100 * sfr, initial_gas=1)
+    assert np.all(history.gas_mass >= 0)
+    assert np.all(history.species_mass >= 0)
+
+
+@pytest.mark.parametrize("mass_loading", [0.0, 1.0])
+def test_mass_conserved_gas_limited(mass_loading):
+    """When the star formation history asks for more gas than there is, only
+    the stars that actually formed return their ejecta."""
+    history = gce_agb.run(times, 100 * sfr[0], mass_loading=mass_loading,
+                          initial_gas=1)
+    dt = times[1] - times[0]
+    assert np.all(history.sfr <= 100 * sfr[0])
+    assert np.any(history.sfr < 100 * sfr[0])
+    # everything the channels returned, using what actually formed
+    returned = np.zeros(len(times))
+    for channel in gce_agb.channels:
+        number = {"n_II": 1.0, "n_Ia": 2.2E-3,
+                  "n_AGB": 0.05}[channel.number_per_mass]
+        if channel.delay is None:
+            rate = number * history.sfr
+        else:
+            rate = yields.event_rates(times, history.sfr, channel.delay,
+                                      number)
+        returned += rate * channel.yields.ejecta_sum(
+            metallicity=history.metallicity)
+    # the last star formation rate isn't used by any step
+    expected = 1 + np.cumsum(returned[:-1] - (1 + mass_loading) *
+                             history.sfr[:-1]) * dt
+    assert history.gas_mass[1:] == approx(expected, rel=1E-8, abs=1E-10)
+    assert np.all(history.gas_mass >= 0)
+
+
+def test_batch_matches_single_runs():
+    """Running parameter sets as a batch should give the same results as
+    running them one at a time."""
+    mass_loading = np.array([[0.0], [2.0]])
+    history = gce_agb.run(times, sfr, inflow=0.5, mass_loading=mass_loading,
+                          initial_gas=5, n_Ia=np.array([1E-3, 2E-3, 3E-3]))
+    assert history.gas_mass.shape == (2, 3, len(times))
+    assert history.species_mass.shape == (2, 3, len(times),
+                                          len(gce_agb.species))
+    for i in range(2):
+        for j in range(3):
+            single = gce_agb.run(times, sfr[j], inflow=0.5,
+                                 mass_loading=mass_loading[i, 0],
+                                 initial_gas=5, n_Ia=(j + 1) * 1E-3)
+            assert history.species_mass[i, j] == approx(single.species_mass)
+
+
+def test_species_subset():
+    """Following some species gives the same masses as following all of
+    them."""
+    subset = yields.OneZoneGCE(species=["Fe", "O_16"])
+    full = gce.run(times, sfr[0], initial_gas=10)
+    part = subset.run(times, sfr[0], initial_gas=10)
+    assert part.mass("Fe") == approx(full.mass("Fe"))
+    assert part.mass("O_16") == approx(full.mass("O_16"))
+    assert part.metal_mass == approx(full.metal_mass)
+
+
+def test_missing_species():
+    history = gce.run(times, sfr[0], initial_gas=10)
+    with pytest.raises(ValueError):
+        history.mass("Xx")
+
+
+@pytest.mark.parametrize("bad_times", [[0], [0, 1, 3], [1, 0]])
+def test_uneven_times(bad_times):
+    with pytest.raises(ValueError):
+        gce.run(bad_times, np.ones(len(bad_times)))
+
+
+def test_sfr_wrong_length():
+    with pytest.raises(ValueError):
+        gce.run(times, np.ones(10))
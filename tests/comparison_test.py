@@ -0,0 +1,80 @@
+import yields
+from yields import comparison
+
+import pytest
+from pytest import approx
+import numpy as np
+
+metallicities = np.array([0, 0.001, 0.004, 0.02])
+species = ["O", "Fe", "Fe_56"]
+
+
+def test_all_models():
+    result = comparison.compare_models(metallicities, species)
+    assert result.models == yields.available_models()
+    assert result.values.shape == (len(result.models), len(metallicities),
+                                   len(species))
+    assert np.all(np.isfinite(result.values))
+
+
+def test_patterns():
+    result = comparison.compare_models(
+        metallicities, species, models=["iwamoto_99_Ia_*", "nomoto_18_Ia_W7",
+                                        "iwamoto_99_Ia_W7"])
+    iwamoto = yields.available_models("iwamoto_99_Ia")
+    assert result.models == iwamoto + ["nomoto_18_Ia_W7"]
+
+
+@pytest.mark.parametrize("model", ["nomoto_06_II_imf_ave", "nugrid_3",
+                                   "ww_95_II_15A", "iwamoto_99_Ia_W7"])
+def test_matches_set_metallicity(model):
+    result = comparison.compare_models(metallicities, species, models=model)
+    yields_obj = yields.Yields(model)
+    for z_idx, z in enumerate(metallicities):
+        yields_obj.set_metallicity(z)
+        for s_idx, name in enumerate(species):
+            assert result.values[0, z_idx, s_idx] == \
+                approx(yields_obj.abundances.get(name, 0))
+
+
+def test_fractions():
+    result = comparison.compare_models(metallicities, ["O", "Xx"],
+                                       models="nomoto_06_II_imf_ave",
+                                       quantity="metal_fraction")
+    yields_obj = yields.Yields("nomoto_06_II_imf_ave")
+    assert result.select("nomoto_06_II_imf_ave", "O") == \
+        approx(yields_obj.mass_fraction("O", metallicities))
+    # species a model doesn't have are zero
+    assert np.all(result.select(species="Xx") == 0)
+
+
+def test_workers():
+    models = ["nugrid_*", "iwamoto_99_Ia_*"]
+    serial = comparison.compare_models(metallicities, species, models=models)
+    parallel = comparison.compare_models(metallicities, species,
+                                         models=models, workers=2,
+                                         use_bundle=False)
+    assert parallel.models == serial.models
+    assert parallel.values == approx(serial.values)
+
+
+def test_select():
+    result = comparison.compare_models(metallicities, species,
+                                       models="iwamoto_99_Ia_*")
+    assert result.select("iwamoto_99_Ia_W7").shape == (len(metallicities),
+                                                       len(species))
+    assert result.select(species=["Fe", "O"]).shape == \
+        (len(result.models), len(metallicities), 2)
+    assert result.select(["iwamoto_99_Ia_W7"], "Fe").shape == \
+        (1, len(metallicities))
+    assert result.select("iwamoto_99_Ia_W7", "Fe") == \
+        approx(result.values[0, :, 1])
+    with pytest.raises(ValueError):
+        result.select("nugrid_3")
+
+
+@pytest.mark.parametrize("kwargs", [{"models": "not_a_model_*"},
+                                    {"quantity": "energy"}])
+def test_error_checking(kwargs):
+    with pytest.raises(ValueError):
+        comparison.compare_models(metallicities, species, **kwargs)
@@ -0,0 +1,138 @@
+import yields
+from yields import data_bundle, model_catalogue, registry, yields_base
+
+import pytest
+from pytest import approx
+import numpy as np
+
+def test_bundle_up_to_date():
+    # if this fails, rebuild the bundle with python -m yields.data_bundle
+    bundle = data_bundle.get_bundle()
+    assert bundle is not None
+    header, _ = bundle
+    assert header["data_version"] == model_catalogue.current_data_version()
+    assert header["loader_version"] == yields_base.loader_version
+    assert sorted(header["models"]) == sorted(registry.available_models())
+
+@pytest.mark.parametrize("attr", ["catalogue", "_data_file_sizes",
+                                  "loader_version"])
+def test_stale_bundle_not_used(monkeypatch, attr):
+    """The default bundle isn't used if the catalogue, the sizes of the data
+    files, or the loaders changed."""
+    if attr == "loader_version":
+        monkeypatch.setattr(data_bundle, attr, -1)
+    elif attr == "catalogue":
+        monkeypatch.setattr(data_bundle, attr,
+                            lambda: {"data_version": "changed"})
+    else:
+        monkeypatch.setattr(data_bundle, attr, lambda: {"changed": 1})
+    monkeypatch.setattr(data_bundle, "_bundles", dict())
+    assert data_bundle.get_bundle() is None
+    assert not data_bundle.load_from_bundle(yields.Yields("test"),
+                                            "iwamoto_99_Ia_W7")
+
+def test_opening_bundle_reads_no_data_files(monkeypatch):
+    """Checking the bundle is up to date doesn't open the data files."""
+    model_catalogue.catalogue()  # this is read once no matter what
+    monkeypatch.setattr(data_bundle, "_bundles", dict())
+    opened = []
+    real_open = open
+
+    def record_open(name, *args, **kwargs):
+        opened.append(name)
+        return real_open(name, *args, **kwargs)
+    monkeypatch.setattr("builtins.open", record_open)
+    yields.Yields("iwamoto_99_Ia_W7")
+    assert opened == [data_bundle._get_data_path(data_bundle.bundle_file)]
+
+@pytest.mark.parametrize("model", registry.available_models())
+def test_bundle_matches_files(model):
+    from_bundle = yields.Yields(model)
+    from_files = yields.Yields(model, use_bundle=False)
+    assert from_bundle.mass == from_files.mass
+    assert list(from_bundle.metallicity_points) == \
+           list(from_files.metallicity_points)
+    assert from_bundle.total_end_ejecta == from_files.total_end_ejecta
+    assert from_bundle.mass_cuts == from_files.mass_cuts
+    assert from_bundle.wind_ejecta == from_files.wind_ejecta
+    assert from_bundle.energy_erg == from_files.energy_erg
+    # check both at the model points and in between them
+    for z in [0, 1E-5, 0.001, 0.003, 0.02, 0.05]:
+        from_bundle.set_metallicity(z)
+        from_files.set_metallicity(z)
+        assert from_bundle.abundances.keys() == from_files.abundances.keys()
+        for key in from_files.abundances:
+            assert from_bundle.abundances[key] == \
+                   approx(from_files.abundances[key], rel=1E-14, abs=0)
+            for metal_only in [True, False]:
+                assert from_bundle.mass_fraction(key, z, metal_only) == \
+                       approx(from_files.mass_fraction(key, z, metal_only),
+                              rel=1E-14, abs=0)
+
+def test_bundle_opens_no_files(monkeypatch):
+    data_bundle.get_bundle()  # make sure it's open already
+
+    def fail(*args, **kwargs):
+        raise AssertionError("file was opened")
+    monkeypatch.setattr("builtins.open", fail)
+    yields.Yields("ww_95_II_20A")
+    yields.Yields("nugrid_2")
+
+def test_bundle_tables_read_only_and_aligned():
+    yields_obj = yields.Yields("nomoto_06_II_imf_ave")
+    for values in [yields_obj._abundances_interp["O_16"].y,
+                   yields_obj._metal_fractions_log_z["O"].y,
+                   yields_obj._mass_fractions_log_z["O"].y]:
+        assert not values.flags.writeable
+        with pytest.raises(ValueError):
+            values[0] = 1.0
+
+    header, _ = data_bundle.get_bundle()
+    for entry in header["models"].values():
+        for table_entry in entry["tables"].values():
+            assert table_entry["offset"] % 64 == 0
+
+def test_write_read_roundtrip(tmp_path):
+    filename = str(tmp_path / "bundle.bin")
+    data_bundle.write_bundle(filename, models=["iwamoto_99_Ia_W7", "test"])
+    header, data = data_bundle.read_bundle(filename)
+    assert sorted(header["models"]) == ["iwamoto_99_Ia_W7", "test"]
+
+    entry = header["models"]["test"]["tables"]["yields"]
+    n_isotopes, n_z = entry["shape"]
+    table = np.frombuffer(data, dtype="<f8", count=n_isotopes * n_z,
+                          offset=entry["offset"]).reshape(n_isotopes, n_z)
+    assert entry["isotopes"][0] == "H_1"
+    assert table[0].tolist() == [1.0, 2.0]
+
+def test_shared_tables():
+    # all objects of the same model should use the same memory
+    yields_1 = yields.Yields("kobayashi_06_II_20")
+    yields_2 = yields.Yields("kobayashi_06_II_20")
+    assert np.shares_memory(yields_1._abundances_interp["Fe_56"].y,
+                            yields_2._abundances_interp["Fe_56"].y)
+    assert np.shares_memory(yields_1._metal_fractions_log_z["Fe"].y,
+                            yields_2._metal_fractions_log_z["Fe"].y)
+    # but the values at the current metallicity are separate
+    yields_1.set_metallicity(0.02)
+    assert yields_1.Fe_56 != yields_2.Fe_56
+
+def test_custom_bundle(tmp_path):
+    filename = str(tmp_path / "bundle.bin")
+    data_bundle.write_bundle(filename, models=["iwamoto_99_Ia_W7"])
+    from_custom = yields.Yields("iwamoto_99_Ia_W7", use_bundle=filename)
+    from_files = yields.Yields("iwamoto_99_Ia_W7", use_bundle=False)
+    assert from_custom.abundances == from_files.abundances
+    values = from_custom._abundances_interp["Fe_56"].y
+    assert not values.flags.writeable
+
+    # models that aren't in the bundle come from the files
+    from_custom = yields.Yields("nomoto_18_Ia_W7", use_bundle=filename)
+    assert from_custom._abundances_interp["Fe_56"].y.flags.writeable
+
+def test_read_bad_file(tmp_path):
+    filename = str(tmp_path / "bad.bin")
+    with open(filename, "wb") as out_file:
+        out_file.write(b"not a bundle at all")
+    with pytest.raises(ValueError):
+        data_bundle.read_bundle(filename)
@@ -0,0 +1,168 @@
+import yields
+from yields import delay_times
+
+import pytest
+from pytest import approx
+import numpy as np
+
+times = np.linspace(0, 13, 1301)
+dt = times[1] - times[0]
+sfr = np.array([1.0, 2.0, 3.0])[:, np.newaxis] * np.exp(-times / 3)
+
+all_dtds = [delay_times.PowerLawDTD(),
+            delay_times.PowerLawDTD(slope=-1, min_delay=0.04),
+            delay_times.ExponentialDTD(),
+            delay_times.GaussianDTD(),
+            delay_times.SingleDelayDTD(1.0)]
+
+
+def direct_rates(sfr, weights):
+    """The slow way of doing the convolution."""
+    n_times = sfr.shape[-1]
+    return np.array([np.convolve(row, weights)[:n_times] for row in sfr])
+
+
+# -----------------------------------------------------------
+
+#  Delay time distributions
+
+# -----------------------------------------------------------
+@pytest.mark.parametrize("dtd", all_dtds)
+def test_weights_add_to_one(dtd):
+    """A long enough grid should have all the events."""
+    weights = dtd.weights(100000, 0.01)
+    assert np.sum(weights) == approx(1)
+    assert np.all(weights >= 0)
+
+
+@pytest.mark.parametrize("dtd", all_dtds[:3])
+def test_nothing_before_min_delay(dtd):
+    weights = dtd.weights(100, 0.01)
+    assert np.all(weights[:int(dtd.min_delay / 0.01)] == 0)
+
+
+def test_exponential_shape():
+    """The number of events in each bin drops by the same factor."""
+    weights = delay_times.ExponentialDTD(timescale=2, min_delay=0).weights(
+        10, 0.5)
+    assert weights[1:] / weights[:-1] == approx(np.exp(-0.25))
+
+
+def test_gaussian_peak():
+    weights = delay_times.GaussianDTD(mean=2, sigma=0.3).weights(400, 0.01)
+    assert np.argmax(weights) in [199, 200]
+
+
+@pytest.mark.parametrize("kwargs", [{"min_delay": 0}, {"min_delay": 14}])
+def test_bad_power_law_delays(kwargs):
+    with pytest.raises(ValueError):
+        delay_times.PowerLawDTD(**kwargs)
+
+
+def test_bad_exponential():
+    with pytest.raises(ValueError):
+        delay_times.ExponentialDTD(timescale=0)
+
+
+def test_bad_gaussian():
+    with pytest.raises(ValueError):
+        delay_times.GaussianDTD(sigma=0)
+
+
+def test_gaussian_matches_normal_distribution():
+    """Far from zero delay, this is just the normal distribution. """
+    dtd = delay_times.GaussianDTD(mean=5, sigma=0.5)
+    assert dtd.cumulative(np.array([4.5, 5, 6])) == \
+        approx([0.158655254, 0.5, 0.977249868])
+
+
+def test_distribution_needs_cumulative():
+    class NoCumulative(delay_times.DelayTimeDistribution):
+        pass
+
+    with pytest.raises(TypeError):
+        NoCumulative()
+
+
+# -----------------------------------------------------------
+
+#  Convolution
+
+# -----------------------------------------------------------
+@pytest.mark.parametrize("dtd", all_dtds)
+def test_fft_matches_direct(dtd):
+    weights = dtd.weights(len(times), dt)
+    rates = delay_times.convolve_history(sfr, weights)
+    assert rates == approx(direct_rates(sfr, weights), abs=1E-12)
+
+
+def test_single_delay_shifts_history():
+    rates = delay_times.event_rates(times, sfr,
+                                    delay_times.SingleDelayDTD(1.0))
+    assert rates[:, 100:] == approx(sfr[:, :-100])
+    assert rates[:, :100] == approx(0, abs=1E-12)
+
+
+def test_constant_sfr_rate():
+    """With a constant star formation rate, the rate of events is the
+    number of stars formed times the fraction of events that have happened
+    so far."""
+    dtd = delay_times.PowerLawDTD()
+    rates = delay_times.event_rates(times, np.ones_like(times), dtd, 2E-3)
+    assert rates == approx(2E-3 * dtd.cumulative(times + dt), abs=1E-12)
+
+
+def test_event_rates_batch():
+    """Batch axes of the number of events broadcast with the histories."""
+    numbers = np.array([[1E-3], [2E-3]])
+    rates = delay_times.event_rates(times, sfr, all_dtds[0], numbers)
+    assert rates.shape == (2, 3, len(times))
+    assert rates[1] == approx(2 * rates[0])
+
+
+def test_uneven_times():
+    with pytest.raises(ValueError):
+        delay_times.event_rates([0, 1, 3], np.ones(3), all_dtds[0])
+
+
+# -----------------------------------------------------------
+
+#  Element rates
+
+# -----------------------------------------------------------
+def test_element_rates():
+    """The rate of each element is the supernova rate times the yields."""
+    ia = yields.Yields("iwamoto_99_Ia_W7")
+    rates = delay_times.element_rates(times, sfr, ["Fe", "Si", "O_16"])
+    sn_rates = delay_times.event_rates(times, sfr, delay_times.PowerLawDTD(),
+                                       2.2E-3)
+    assert rates.shape == (3, len(times), 3)
+    assert rates[..., 0] == approx(sn_rates * ia.Fe)
+    assert rates[..., 1] == approx(sn_rates * ia.Si)
+    assert rates[..., 2] == approx(sn_rates * ia.O_16)
+
+
+def test_element_rates_metallicity():
+    """The yields can change with metallicity over time."""
+    ia = yields.Yields("nomoto_18_Ia_W7")
+    metallicity = np.linspace(0, 0.02, len(times))
+    rates = delay_times.element_rates(times, sfr[0], ["Mn"], model_set=ia,
+                                      metallicity=metallicity)
+    sn_rates = delay_times.event_rates(times, sfr[0],
+                                       delay_times.PowerLawDTD(), 2.2E-3)
+    for idx in [200, 700, 1300]:
+        ia.set_metallicity(metallicity[idx])
+        assert rates[idx, 0] == approx(sn_rates[idx] * ia.Mn)
+
+
+def test_chemical_evolution_uses_dtd():
+    """Changing the delay time distribution changes the iron from Type Ia
+    supernovae in the chemical evolution model."""
+    run_times = np.linspace(0, 10, 101)
+    early = yields.OneZoneGCE(species=["Fe"],
+                              Ia_dtd=delay_times.SingleDelayDTD(0.5))
+    late = yields.OneZoneGCE(species=["Fe"],
+                             Ia_dtd=delay_times.SingleDelayDTD(5))
+    history_early = early.run(run_times, np.ones(101), initial_gas=100)
+    history_late = late.run(run_times, np.ones(101), initial_gas=100)
+    assert history_early.mass("Fe")[30] > history_late.mass("Fe")[30]
@@ -0,0 +1,148 @@
+import yields
+from yields import ensemble
+
+import pytest
+from pytest import approx
+import numpy as np
+
+abundances_obj = yields.Abundances()
+z_Ia = np.array([0.001, 0.0001, 0.003, 0, 0.02])
+z_II = np.array([0.01, 0.02, 1E-5, 0.01, 0])
+
+
+# ------------------------------------------------------------------------------
+#
+# Ensembles of yields
+#
+# ------------------------------------------------------------------------------
+def test_no_errors_same_as_model():
+    yields_obj = yields.Yields("nomoto_06_II_imf_ave")
+    ensemble_obj = ensemble.YieldsEnsemble.perturbed(yields_obj, 3, 0.0)
+    table = ensemble_obj.yields_table(["O", "Fe", "Fe_56"], z_II)
+    assert table.shape == (3, len(z_II), 3)
+    for realization in table:
+        assert realization == approx(yields_obj.yields_table(
+            ["O", "Fe", "Fe_56"], z_II))
+    for metal_only in [True, False]:
+        assert ensemble_obj.ejecta_sum(z_II, metal_only)[0] == approx(
+            yields_obj.ejecta_sum(metal_only, z_II))
+        assert ensemble_obj.mass_fraction(["O"], z_II, metal_only)[1, :, 0] \
+            == approx(yields_obj.mass_fraction("O", z_II, metal_only))
+
+
+def test_perturbed_spread():
+    """Isotopes get the fractional error we asked for."""
+    yields_obj = yields.Yields("nomoto_06_II_imf_ave")
+    ensemble_obj = ensemble.YieldsEnsemble.perturbed(yields_obj, 10000, 0.1,
+                                                     rng=1)
+    table = ensemble_obj.yields_table(["O_16"], 0.02)[:, 0]
+    ratio = table / yields_obj.yields_table(["O_16"], 0.02)[0]
+    assert np.std(np.log(ratio)) == approx(0.1, rel=0.05)
+    assert np.median(ratio) == approx(1, abs=0.01)
+
+
+def test_perturbed_dictionary():
+    """Only the species in the dictionary are perturbed."""
+    yields_obj = yields.Yields("nomoto_06_II_imf_ave")
+    ensemble_obj = ensemble.YieldsEnsemble.perturbed(yields_obj, 100,
+                                                     {"O": 0.2}, rng=2)
+    table = ensemble_obj.yields_table(["O_16", "Fe_56"], 0.02)
+    assert np.std(table[:, 0]) > 0
+    assert np.all(table[:, 1] == table[0, 1])
+
+
+def test_perturbed_seed():
+    first = ensemble.YieldsEnsemble.perturbed("nomoto_06_II_imf_ave", 5, 0.1,
+                                              rng=3)
+    second = ensemble.YieldsEnsemble.perturbed("nomoto_06_II_imf_ave", 5, 0.1,
+                                               rng=3)
+    assert np.array_equal(first.yields_table(["O"], z_II),
+                          second.yields_table(["O"], z_II))
+
+
+def test_perturbed_normalization():
+    yields_obj = yields.Yields("nomoto_06_II_imf_ave")
+    yields_obj.normalize_metals(2.0)
+    ensemble_obj = ensemble.YieldsEnsemble.perturbed(yields_obj, 4, 0.3,
+                                                     rng=4)
+    assert ensemble_obj.ejecta_sum(z_II, metal_only=True) == approx(2.0)
+
+
+def test_from_models():
+    """Each realization matches its model, even though they have different
+    metallicity points."""
+    models = ["nomoto_06_II_imf_ave", "ww_95_imf_ave"]
+    ensemble_obj = ensemble.YieldsEnsemble.from_models(models)
+    assert ensemble_obj.n_realizations == 2
+    for idx, model in enumerate(models):
+        yields_obj = yields.Yields(model)
+        assert ensemble_obj.yields_table(["O", "Fe"], z_II)[idx] == approx(
+            yields_obj.yields_table(["O", "Fe"], z_II))
+        assert ensemble_obj.mass_fraction(["Mg"], z_II)[idx, :, 0] == approx(
+            yields_obj.mass_fraction("Mg", z_II))
+
+
+def test_shapes():
+    ensemble_obj = ensemble.YieldsEnsemble.perturbed("nomoto_06_II_imf_ave",
+                                                     3, 0.1)
+    assert ensemble_obj.yields_table(["O"], 0.01).shape == (3, 1)
+    assert ensemble_obj.yields_table(["O"], np.ones((4, 2)) * 0.01).shape == \
+        (3, 4, 2, 1)
+    assert ensemble_obj.ejecta_sum(np.ones((4, 2)) * 0.01).shape == (3, 4, 2)
+
+
+def test_negative_error():
+    with pytest.raises(ValueError):
+        ensemble.YieldsEnsemble.perturbed("nomoto_06_II_imf_ave", 3, -0.1)
+
+
+# ------------------------------------------------------------------------------
+#
+# Ensembles of abundances
+#
+# ------------------------------------------------------------------------------
+def test_abundances_no_errors():
+    ensemble_obj = ensemble.AbundanceEnsemble.perturbed(abundances_obj, 3)
+    with np.errstate(divide="ignore"):
+        for elt in ["O", "Mg", "Fe"]:
+            x_on_h = ensemble_obj.x_on_h(elt, z_Ia, z_II)
+            assert x_on_h.shape == (3, len(z_Ia))
+            assert x_on_h[2] == approx(abundances_obj.x_on_h(elt, z_Ia, z_II))
+            x_on_fe = ensemble_obj.x_on_fe([elt, "C"], z_Ia, z_II)
+            assert x_on_fe.shape == (3, len(z_Ia), 2)
+            assert x_on_fe[0, :, 0] == approx(abundances_obj.x_on_fe(elt, z_Ia,
+                                                                     z_II))
+
+
+def test_abundances_spread():
+    ensemble_obj = ensemble.AbundanceEnsemble.perturbed(
+        abundances_obj, 200, Ia_errors=0.2, II_errors=0.2, rng=5)
+    values = ensemble_obj.x_on_fe("O", 0.001, 0.01)
+    assert values.shape == (200,)
+    assert 0.01 < np.std(values) < 0.2
+    assert np.median(values) == approx(
+        abundances_obj.x_on_fe("O", 0.001, 0.01), abs=0.03)
+
+
+def test_abundances_broadcast_realizations():
+    """An ensemble with one realization is used with all the others."""
+    Ia = ensemble.YieldsEnsemble.perturbed("iwamoto_99_Ia_W7", 1, 0.0)
+    II = ensemble.YieldsEnsemble.from_models(["nomoto_06_II_imf_ave",
+                                              "ww_95_imf_ave"])
+    ensemble_obj = ensemble.AbundanceEnsemble(Ia, II)
+    values = ensemble_obj.x_on_fe("O", z_Ia[:3], z_II[:3])
+    assert values.shape == (2, 3)
+    ww = yields.Abundances("ww")
+    assert values[1] == approx(ww.x_on_fe("O", z_Ia[:3], z_II[:3]))
+
+
+def test_abundances_error_checking():
+    Ia = ensemble.YieldsEnsemble.perturbed("iwamoto_99_Ia_W7", 2, 0.1)
+    II = ensemble.YieldsEnsemble.perturbed("nomoto_06_II_imf_ave", 3, 0.1)
+    with pytest.raises(ValueError):
+        ensemble.AbundanceEnsemble(Ia, II)
+    ensemble_obj = ensemble.AbundanceEnsemble.perturbed(abundances_obj, 2)
+    with pytest.raises(ValueError):
+        ensemble_obj.x_on_fe("O", -0.1, 0.01)
+    with pytest.raises(ValueError):
+        ensemble_obj.x_on_fe("O", 0.6, 0.6)
@@ -0,0 +1,88 @@
+import yields
+from yields import feedback
+
+import pytest
+from pytest import approx
+import numpy as np
+
+elements = ["O", "Fe", "N"]
+feedback_obj = feedback.ParticleFeedback(elements)
+rng = np.random.default_rng(4938)
+n_particles = 1000
+masses = rng.uniform(1E4, 1E5, n_particles)
+ages = rng.uniform(0, 13, n_particles)
+metallicities = rng.uniform(0, 0.03, n_particles)
+
+
+def test_shape():
+    ejecta = feedback_obj.ejecta(masses, metallicities, ages, ages + 0.1)
+    assert ejecta.shape == (n_particles, len(elements))
+    assert np.all(ejecta >= 0)
+
+
+def test_total_more_than_elements():
+    ejecta = feedback_obj.ejecta(masses, metallicities, ages, ages + 0.1)
+    total = feedback_obj.total_ejecta(masses, metallicities, ages, ages + 0.1)
+    assert total.shape == (n_particles,)
+    assert np.all(np.sum(ejecta, axis=1) <= total)
+
+
+def test_matches_ssp_table():
+    """At the metallicities of a table, the ejecta of a particle in each age
+    bin should be the rate in that bin times its width."""
+    edges = np.concatenate([[0], np.geomspace(1E-3, 13.8, 50)])
+    table = yields.make_ssp_table(edges, [0.001, 0.02], elements)
+    for z_idx, z in enumerate([0.001, 0.02]):
+        ejecta = feedback_obj.ejecta(1.0, z, edges[:-1], edges[1:])
+        expected = np.sum(table.rates[z_idx, :, :, 1:], axis=1) * \
+            np.diff(edges)[:, np.newaxis]
+        assert ejecta == approx(expected, abs=1E-15)
+
+
+def test_linear_in_mass():
+    ejecta_1 = feedback_obj.ejecta(1.0, metallicities, ages, ages + 0.1)
+    ejecta_m = feedback_obj.ejecta(masses, metallicities, ages, ages + 0.1)
+    assert ejecta_m == approx(masses[:, np.newaxis] * ejecta_1)
+
+
+def test_intervals_add_up():
+    first = feedback_obj.ejecta(masses, metallicities, ages, ages + 0.1)
+    second = feedback_obj.ejecta(masses, metallicities, ages + 0.1,
+                                 ages + 0.3)
+    both = feedback_obj.ejecta(masses, metallicities, ages, ages + 0.3)
+    assert first + second == approx(both)
+
+
+def test_zero_interval():
+    ejecta = feedback_obj.ejecta(masses, metallicities, ages, ages)
+    assert np.all(ejecta == 0)
+
+
+def test_blocks():
+    """Splitting the particles into blocks doesn't change anything."""
+    small_blocks = feedback.ParticleFeedback(elements)
+    small_blocks._block_size = 37
+    assert small_blocks.ejecta(masses, metallicities, ages, ages + 0.1) == \
+        approx(feedback_obj.ejecta(masses, metallicities, ages, ages + 0.1))
+
+
+def test_broadcasting():
+    """Scalars broadcast with the particle arrays."""
+    ejecta = feedback_obj.ejecta(masses, 0.02, 1.0, 1.5)
+    assert ejecta.shape == (n_particles, len(elements))
+    assert ejecta == approx(masses[:, np.newaxis] *
+                            feedback_obj.ejecta(1.0, 0.02, 1.0, 1.5))
+
+
+def test_massive_stars_only_early():
+    """Young particles get their ejecta from massive stars, which are
+    mostly oxygen."""
+    ejecta = feedback_obj.ejecta(1.0, 0.02, 0.0, 0.03)[0]
+    assert ejecta[0] > ejecta[1]
+
+
+@pytest.mark.parametrize("args", [(-1, 0.02, 0, 1), (1, -0.1, 0, 1),
+                                  (1, 0.02, -1, 1), (1, 0.02, 2, 1)])
+def test_bad_input(args):
+    with pytest.raises(ValueError):
+        feedback_obj.ejecta(*args)
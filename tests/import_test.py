@@ -0,0 +1,99 @@
+import importlib
+import os
+import subprocess
+import sys
+
+import pytest
+
+# we need to run things in a fresh interpreter to see what importing does
+repo_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run_fresh(code):
+    env = dict(os.environ)
+    env["PYTHONPATH"] = repo_dir + os.pathsep + env.get("PYTHONPATH", "")
+    result = subprocess.run([sys.executable, "-c", code], env=env, check=True,
+                            stdout=subprocess.PIPE, universal_newlines=True)
+    return result.stdout.strip()
+
+
+@pytest.mark.parametrize("module", ["scipy", "astropy", "matplotlib",
+                                    "multiprocessing", "read_yields"])
+def test_import_skips_heavy_modules(module):
+    """Importing the package shouldn't import anything big. """
+    code = "import sys, yields; print('{0}' in sys.modules)".format(module)
+    assert run_fresh(code) == "False"
+
+
+@pytest.mark.parametrize("module", ["multiprocessing", "yields.parallel"])
+def test_serial_evaluation_skips_multiprocessing(module):
+    """Evaluating abundances without workers or threads shouldn't import the
+    parallel tools."""
+    code = ("import sys, yields\n"
+            "a = yields.Abundances()\n"
+            "a.x_on_fe('O', 0.001, 0.01)\n"
+            "a.close()\n"
+            "print('{0}' in sys.modules)".format(module))
+    assert run_fresh(code) == "False"
+
+
+def test_loaders_imported_when_needed():
+    """The loader of a model family is only imported when one of its models
+    is read from the data files."""
+    code = ("import sys, yields\n"
+            "def loaded():\n"
+            "    return sorted(name for name in sys.modules\n"
+            "                  if name.startswith('yields.loaders.'))\n"
+            "print(loaded())\n"
+            "yields.Yields('iwamoto_99_Ia_W7')\n"
+            "print(loaded())\n"
+            "yields.Yields('iwamoto_99_Ia_W7', use_bundle=False)\n"
+            "print(loaded())")
+    assert run_fresh(code).split("\n") == \
+        ["[]", "[]", "['yields.loaders.iwamoto']"]
+
+
+def test_submodules_imported_when_needed():
+    """Only the core of the package is imported up front. """
+    code = ("import sys, yields\n"
+            "print(sorted(name for name in sys.modules\n"
+            "             if name.startswith('yields')))")
+    assert run_fresh(code) == str(["yields", "yields.abundances",
+                                   "yields.loaders", "yields.registry",
+                                   "yields.yields_base"])
+
+
+def test_package_exports():
+    """Everything the submodules export can be found in the package, and
+    nothing they import leaks into it."""
+    import yields
+
+    for module in [yields.registry, yields.yields_base, yields.abundances]:
+        for name in module.__all__:
+            assert name in yields.__all__
+            assert getattr(yields, name) is getattr(module, name)
+    for name, module_name in yields._lazy_exports.items():
+        module = importlib.import_module("yields." + module_name)
+        assert name in module.__all__
+        assert name in yields.__all__
+        assert getattr(yields, name) is getattr(module, name)
+    for name in ["np", "os", "json", "mmap", "struct", "math"]:
+        assert not hasattr(yields, name)
+
+
+def test_import_time():
+    """This is a benchmark of how long the import takes, not counting numpy,
+    which we always need. It only takes a few hundredths of a second, so this
+    is very generous to avoid spurious failures on slow machines."""
+    code = ("import time, numpy\n"
+            "start = time.time()\n"
+            "import yields\n"
+            "print(time.time() - start)")
+    assert float(run_fresh(code)) < 0.5
+
+
+def test_lazy_solar_values():
+    """The solar values should still be there when we ask for them. """
+    code = ("import yields\n"
+            "print(yields.solar_z == yields.Abundances.Z_sun)")
+    assert run_fresh(code) == "True"
@@ -0,0 +1,43 @@
+import yields
+from yields import model_catalogue, registry
+
+import pytest
+
+def test_catalogue_has_all_models():
+    catalogue = yields.catalogue()
+    assert sorted(catalogue["models"]) == sorted(registry.available_models())
+    for family in registry.model_families():
+        assert catalogue["families"][family.name]["models"] == family.models
+
+def test_catalogue_format_version():
+    catalogue = yields.catalogue()
+    assert catalogue["format_version"] == \
+           model_catalogue.catalogue_format_version
+
+def test_catalogue_is_cached():
+    assert yields.catalogue() is yields.catalogue()
+
+def test_catalogue_up_to_date():
+    # if this fails, rebuild the catalogue with
+    # python -m yields.model_catalogue
+    assert model_catalogue.stale_files() == []
+    catalogue = yields.catalogue()
+    assert catalogue["data_version"] == \
+           model_catalogue._data_version(catalogue["checksums"])
+
+@pytest.mark.parametrize("model", ["iwamoto_99_Ia_W7", "nomoto_06_II_imf_ave",
+                                   "ww_95_II_25B", "kobayashi_06_II_20_hn",
+                                   "nugrid_1.65", "nomoto_18_Ia_W7"])
+def test_catalogue_matches_model(model):
+    entry = yields.catalogue()["models"][model]
+    yields_obj = yields.Yields(model)
+    assert entry["mass"] == yields_obj.mass
+    assert entry["metallicities"] == list(yields_obj.metallicity_points)
+    assert entry["isotopes"] == list(yields_obj.abundances.keys())
+    assert entry["family"] == registry.get_model_family(model).name
+
+def test_stale_files_detects_changes(monkeypatch):
+    monkeypatch.setattr(model_catalogue, "file_checksum",
+                        lambda data_file: "not a checksum")
+    assert model_catalogue.stale_files(["nomoto_18_Ia.txt"]) == \
+           ["nomoto_18_Ia.txt"]
@@ -0,0 +1,207 @@
+import yields
+from yields import imf, lifetimes, ssp, delay_times
+
+import pytest
+from pytest import approx
+import numpy as np
+
+kroupa = imf.KroupaIMF()
+age_edges = np.concatenate([[0], np.geomspace(1E-3, 13.8, 200)])
+metallicities = np.array([0, 1E-4, 1E-3, 0.004, 0.01, 0.02])
+elements = ["O", "Fe", "N"]
+table = ssp.make_ssp_table(age_edges, metallicities, elements)
+widths = np.diff(age_edges)
+# numpy 2 renamed trapz
+trapezoid = getattr(np, "trapezoid", None) or np.trapz
+
+# -----------------------------------------------------------
+
+#  IMF
+
+# -----------------------------------------------------------
+def test_imf_normalized():
+    assert kroupa.mass_between(kroupa.min_mass, kroupa.max_mass) == approx(1)
+
+
+def test_imf_continuous_at_break():
+    assert kroupa.number(0.5 - 1E-9) == approx(kroupa.number(0.5 + 1E-9))
+
+
+@pytest.mark.parametrize("low,high", [(0.07, 50), (0.1, 0.4), (0.3, 1),
+                                      (8, 40)])
+def test_imf_integrals_match_numerical(low, high):
+    masses = np.geomspace(low, high, 100001)
+    numbers = kroupa.number(masses)
+    assert kroupa.number_between(low, high) == \
+        approx(trapezoid(numbers, masses), rel=1E-6)
+    assert kroupa.mass_between(low, high) == \
+        approx(trapezoid(numbers * masses, masses), rel=1E-6)
+
+
+def test_imf_zero_outside_range():
+    assert np.all(kroupa.number([0.01, 60]) == 0)
+    assert kroupa.number_between(50, 100) == 0
+
+
+def test_imf_bad_masses():
+    with pytest.raises(ValueError):
+        imf.KroupaIMF(min_mass=10, max_mass=1)
+
+
+# -----------------------------------------------------------
+
+#  Lifetimes
+
+# -----------------------------------------------------------
+@pytest.mark.parametrize("mass,z,age", [(1, 0.02, 12.15), (25, 0.02, 7.58E-3),
+                                        (3, 0.001, 0.2987),
+                                        (7, 0.0001, 4.558E-2)])
+def test_lifetime_table_values(mass, z, age):
+    assert lifetimes.lifetime(mass, z) == approx(age)
+    assert lifetimes.turnoff_mass(age, z) == approx(mass)
+
+
+def test_lifetime_decreases_with_mass():
+    masses = np.geomspace(0.5, 50, 100)
+    for z in [0, 0.001, 0.02, 0.05]:
+        assert np.all(np.diff(lifetimes.lifetime(masses, z)) < 0)
+
+
+def test_turnoff_mass_vectorized():
+    ages = np.array([[0.01, 0.1], [1, 10]])
+    z = np.array([0.001, 0.02])
+    masses = lifetimes.turnoff_mass(ages, z)
+    assert masses.shape == (2, 2)
+    for idx in np.ndindex(2, 2):
+        assert masses[idx] == approx(lifetimes.turnoff_mass(ages[idx],
+                                                            z[idx[1]]))
+
+
+def test_nothing_dies_at_zero_age():
+    assert lifetimes.turnoff_mass(0, 0.02) > kroupa.max_mass
+
+
+# -----------------------------------------------------------
+
+#  SSP tables
+
+# -----------------------------------------------------------
+def test_table_shape():
+    assert table.rates.shape == (len(metallicities), len(age_edges) - 1, 3,
+                                 len(elements) + 1)
+    assert table.quantities == ["total"] + elements
+    assert np.all(table.rates >= 0)
+
+
+def test_elements_less_than_total():
+    assert np.all(table.rates[..., 1:].sum(axis=-1) <= table.rates[..., 0])
+
+
+def test_massive_stars_early_agb_late():
+    """Massive stars are done after ~50 Myr, and AGB stars haven't started
+    before then."""
+    ii = table.channels.index("II")
+    agb = table.channels.index("AGB")
+    early = age_edges[1:] < 0.02
+    late = age_edges[:-1] > 0.06
+    assert np.all(table.rates[:, late, ii] == 0)
+    assert np.all(table.rates[:, early, agb] == 0)
+
+
+def test_ia_follows_dtd():
+    ia = table.channels.index("Ia")
+    dtd = delay_times.PowerLawDTD()
+    assert np.all(table.rates[:, age_edges[1:] < dtd.min_delay, ia] == 0)
+    total = np.sum(table.rates[..., ia, 0] * widths, axis=1)
+    assert total == approx(2.2E-3 * yields.Yields("iwamoto_99_Ia_W7")
+                           .ejecta_sum() * dtd.cumulative(13.8))
+
+
+def test_massive_star_total_matches_imf_integral():
+    """Once all the massive stars are dead, the ejecta should be the IMF
+    integral of the individual model ejecta."""
+    ii = table.channels.index("II")
+    returned = np.sum(table.rates[:, :, ii] * widths[:, np.newaxis], axis=1)
+    masses = np.array([13, 15, 18, 20, 25, 30, 40.0])
+    for z in [0, 0.02]:
+        z_idx = list(metallicities).index(z)
+        models = [yields.Yields("nomoto_06_II_{:g}".format(m)) for m in masses]
+        for model in models:
+            model.set_metallicity(z)
+        # ejecta per unit mass, held fixed outside the models
+        specific = np.array([model.O for model in models]) / masses
+        fine = np.geomspace(8, 50, 200001)
+        integrand = kroupa.number(fine) * fine * \
+            np.interp(fine, masses, specific)
+        assert returned[z_idx, 1] == approx(trapezoid(integrand, fine),
+                                            rel=1E-4)
+
+
+def test_returned_fraction_reasonable():
+    """About 40-50% of the mass of a Kroupa population is returned in a
+    Hubble time."""
+    returned = np.sum(table.rates[..., 0].sum(axis=-1) * widths, axis=1)
+    assert np.all(returned > 0.3)
+    assert np.all(returned < 0.6)
+
+
+def test_lookup():
+    rates = table.lookup([0.005, 1.0, 20], [0.019, 0.0011, 0.02])
+    assert rates.shape == (3, len(elements) + 1)
+    age_idx = np.searchsorted(age_edges, 0.005) - 1
+    assert rates[0] == approx(table.rates[5, age_idx].sum(axis=0))
+    age_idx = np.searchsorted(age_edges, 1.0) - 1
+    assert rates[1] == approx(table.rates[2, age_idx].sum(axis=0))
+    # past the end of the table
+    assert np.all(rates[2] == 0)
+
+
+def test_lookup_channel():
+    rates = table.lookup(2.0, 0.02, channel="Ia")
+    z_idx, age_idx = table.index(2.0, 0.02)
+    assert rates == approx(table.rates[z_idx, age_idx, 2])
+
+
+def test_write_read_roundtrip(tmp_path):
+    filename = str(tmp_path / "ssp.bin")
+    table.write(filename)
+    read = ssp.read_ssp_table(filename)
+    assert np.array_equal(read.rates, table.rates)
+    assert np.array_equal(read.age_edges, table.age_edges)
+    assert read.channels == table.channels
+    assert read.quantities == table.quantities
+    assert not read.rates.flags.writeable
+
+
+def test_read_bad_file(tmp_path):
+    filename = str(tmp_path / "bad.bin")
+    with open(filename, "wb") as out_file:
+        out_file.write(b"not a table at all")
+    with pytest.raises(ValueError):
+        ssp.read_ssp_table(filename)
+
+
+@pytest.mark.parametrize("edges", [[1], [1, 0.5], [-1, 1]])
+def test_bad_ages(edges):
+    with pytest.raises(ValueError):
+        ssp.make_ssp_table(edges, metallicities, elements)
+
+
+def test_not_individual_model():
+    with pytest.raises(ValueError):
+        ssp.make_ssp_table(age_edges, metallicities, elements,
+                           II_models=["nomoto_06_II_imf_ave"])
+
+
+def test_metallicity_points_without_loading(monkeypatch):
+    """The metallicity points come from the catalogue, without loading the
+    models."""
+    models = ["nomoto_06_II_20", "ww_95_II_25A", "nugrid_3"]
+    expected = sorted(set(np.concatenate(
+        [yields.Yields(model).metallicity_points for model in models])))
+
+    def no_loading(*args, **kwargs):
+        raise AssertionError("A model was loaded.")
+
+    monkeypatch.setattr(ssp, "Yields", no_loading)
+    assert list(ssp._metallicity_points(models)) == expected
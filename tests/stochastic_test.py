@@ -0,0 +1,139 @@
+import yields
+from yields import stochastic
+from yields.imf import KroupaIMF
+
+import pytest
+from pytest import approx
+import numpy as np
+
+elements = ["O", "Fe", "N"]
+sampler = stochastic.StochasticYields(elements)
+n_particles = 1000
+masses = np.random.default_rng(83).uniform(100, 1000, n_particles)
+metallicities = np.random.default_rng(84).uniform(0, 0.03, n_particles)
+
+
+# ------------------------------------------------------------------------------
+#
+# Sampling the IMF
+#
+# ------------------------------------------------------------------------------
+def test_imf_sample_range():
+    stars = KroupaIMF().sample(10000, np.random.default_rng(1), 8, 40)
+    assert len(stars) == 10000
+    assert np.all(stars >= 8)
+    assert np.all(stars <= 40)
+
+
+def test_imf_sample_mean_mass():
+    imf = KroupaIMF()
+    stars = imf.sample(1000000, np.random.default_rng(2))
+    expected = imf.mass_between(imf.min_mass, imf.max_mass) / \
+        imf.number_between(imf.min_mass, imf.max_mass)
+    assert np.mean(stars) == approx(expected, rel=0.01)
+
+
+def test_imf_sample_fraction_above_break():
+    imf = KroupaIMF()
+    stars = imf.sample(1000000, np.random.default_rng(3))
+    expected = imf.number_between(0.5, 50) / imf.number_between(0.07, 50)
+    assert np.mean(stars > 0.5) == approx(expected, rel=0.01)
+
+
+def test_imf_sample_empty_range():
+    with pytest.raises(ValueError):
+        KroupaIMF().sample(10, np.random.default_rng(4), 60, 100)
+
+
+# ------------------------------------------------------------------------------
+#
+# Yields of sampled particles
+#
+# ------------------------------------------------------------------------------
+def test_shape():
+    ejecta = sampler.ejecta(masses, metallicities, 1)
+    assert ejecta.shape == (n_particles, len(elements))
+    assert np.all(ejecta >= 0)
+
+
+def test_same_seed_same_stars():
+    assert np.array_equal(sampler.ejecta(masses, metallicities, 5),
+                          sampler.ejecta(masses, metallicities, 5))
+
+
+def test_different_seed_different_stars():
+    assert not np.array_equal(sampler.ejecta(masses, metallicities, 5),
+                              sampler.ejecta(masses, metallicities, 6))
+
+
+def test_zero_mass():
+    ejecta = sampler.ejecta(np.zeros(10), 0.02, 1)
+    assert np.all(ejecta == 0)
+
+
+def test_no_stars_no_ejecta():
+    total, counts = sampler.total_ejecta(masses / 10, metallicities, 7)
+    assert np.any(counts == 0)
+    assert np.all(total[counts == 0] == 0)
+    assert np.all(total[counts > 0] > 0)
+
+
+def test_total_more_than_elements():
+    total, ejecta, _ = sampler.sample_particles(masses, metallicities, 8)
+    assert np.all(np.sum(ejecta, axis=1) <= total)
+
+
+def test_sample_particles_one_draw():
+    """Everything from sample_particles comes from the same stars, and
+    matches the other functions with the same seed."""
+    rng = np.random.default_rng(12)
+    total, ejecta, counts = sampler.sample_particles(masses, metallicities,
+                                                     rng)
+    assert ejecta.shape == (len(masses), len(elements))
+    assert np.all(total[counts == 0] == 0)
+    assert np.all(ejecta[counts == 0] == 0)
+    assert np.array_equal(total, sampler.total_ejecta(
+        masses, metallicities, np.random.default_rng(12))[0])
+    assert np.array_equal(ejecta, sampler.ejecta(
+        masses, metallicities, np.random.default_rng(12)))
+
+
+def test_blocks():
+    """Splitting the particles into blocks still gives the same number of
+    stars on average, and the same yields for each star."""
+    small_blocks = stochastic.StochasticYields(elements)
+    small_blocks._block_size = 37
+    total_small, counts = small_blocks.total_ejecta(masses, 0.02, 9)
+    total, _ = sampler.total_ejecta(masses, 0.02, 9)
+    assert np.sum(counts) == approx(np.sum(masses) * sampler.stars_per_mass,
+                                    rel=0.05)
+    assert np.sum(total_small) == approx(np.sum(total), rel=0.05)
+
+
+def test_mean_matches_ssp_table():
+    """Averaged over many particles, the yields per unit mass should be the
+    IMF integrated yields of the massive stars."""
+    table = yields.make_ssp_table([0, 14.0], [0.02], elements)
+    expected = table.rates[0, 0, table.channels.index("II"), 1:] * 14.0
+    particle_masses = np.full(200000, 300.0)
+    ejecta = sampler.ejecta(particle_masses, 0.02, 10)
+    assert np.sum(ejecta, axis=0) / np.sum(particle_masses) == \
+        approx(expected, rel=0.02)
+
+
+def test_model_family():
+    ww = stochastic.StochasticYields(elements, models="ww_95_II")
+    masses_ww = [stochastic._model_mass(model) for model in ww.models]
+    assert len(masses_ww) == len(set(masses_ww))
+    assert ww.ejecta(1E4, 0.02, 11).shape == (1, len(elements))
+
+
+def test_bad_family():
+    with pytest.raises(ValueError):
+        stochastic.StochasticYields(elements, models="iwamoto_99_Ia")
+
+
+@pytest.mark.parametrize("args", [(-1, 0.02), (1, -0.1), (1, 1.5)])
+def test_bad_input(args):
+    with pytest.raises(ValueError):
+        sampler.ejecta(*args)
@@ -1,4 +1,5 @@
-import yields_base
+from yields import loaders, registry, yields_base
+from yields.loaders import iwamoto, nomoto, testing, ww95
 import pytest
 import numpy as np
 
@@ -93,14 +94,14 @@ def test_metal_fractions(yields_test_case, elt, mass, z):
 
 def test_get_iwamoto_path():
     """Tests the function that gets the path of the Iwamoto yields"""
-    file_loc =  yields_base._get_data_path(yields_base.iwamoto_file)
+    file_loc =  loaders._get_data_path(loaders.iwamoto_file)
     # I know the first line, so I can read that and see what it is
     iwamoto_file = open(file_loc, "r")
     assert iwamoto_file.readline() == "# Table 3 from Iwamoto et al 1999\n"
 
 def test_get_nomoto_path():
     """Tests the function that gets the path of the Iwamoto yields"""
-    file_loc =  yields_base._get_data_path(yields_base.nomoto_file)
+    file_loc =  loaders._get_data_path(loaders.nomoto_file)
     # I know the first line, so I can read that and see what it is
     iwamoto_file = open(file_loc, "r")
     assert iwamoto_file.readline() == "# Table 3 from Nomoto et al 2006\n"
@@ -108,24 +109,24 @@ def test_get_nomoto_path():
 def test_iwamoto_element_parsing():
     """Tests turning the format of the Iwamoto output into the format this
     class needs"""
-    assert yields_base._parse_iwamoto_element("^{8}O") == "O_8"
-    assert yields_base._parse_iwamoto_element("^{12}C") == "C_12"
-    assert yields_base._parse_iwamoto_element("^{55}Mn") == "Mn_55"
-    assert yields_base._parse_iwamoto_element("^{68}Zn") == "Zn_68"
+    assert iwamoto._parse_iwamoto_element("^{8}O") == "O_8"
+    assert iwamoto._parse_iwamoto_element("^{12}C") == "C_12"
+    assert iwamoto._parse_iwamoto_element("^{55}Mn") == "Mn_55"
+    assert iwamoto._parse_iwamoto_element("^{68}Zn") == "Zn_68"
 
 def test_iwamoto_model_parsing():
     """Tests getting the model itself out of the iwamoto name"""
-    assert yields_base._parse_iwamoto_model("iwamoto_99_Ia_W7") == "W7"
-    assert yields_base._parse_iwamoto_model("iwamoto_99_Ia_W70") == "W70"
-    assert yields_base._parse_iwamoto_model("iwamoto_99_Ia_WDD1") == "WDD1"
-    assert yields_base._parse_iwamoto_model("iwamoto_99_Ia_WDD2") == "WDD2"
-    assert yields_base._parse_iwamoto_model("iwamoto_99_Ia_WDD3") == "WDD3"
-    assert yields_base._parse_iwamoto_model("iwamoto_99_Ia_CDD1") == "CDD1"
-    assert yields_base._parse_iwamoto_model("iwamoto_99_Ia_CDD2") == "CDD2"
+    assert iwamoto._parse_iwamoto_model("iwamoto_99_Ia_W7") == "W7"
+    assert iwamoto._parse_iwamoto_model("iwamoto_99_Ia_W70") == "W70"
+    assert iwamoto._parse_iwamoto_model("iwamoto_99_Ia_WDD1") == "WDD1"
+    assert iwamoto._parse_iwamoto_model("iwamoto_99_Ia_WDD2") == "WDD2"
+    assert iwamoto._parse_iwamoto_model("iwamoto_99_Ia_WDD3") == "WDD3"
+    assert iwamoto._parse_iwamoto_model("iwamoto_99_Ia_CDD1") == "CDD1"
+    assert iwamoto._parse_iwamoto_model("iwamoto_99_Ia_CDD2") == "CDD2"
     with pytest.raises(ValueError):
-        yields_base._parse_iwamoto_model("iwamsdfs")
+        iwamoto._parse_iwamoto_model("iwamsdfs")
     with pytest.raises(ValueError):
-        yields_base._parse_iwamoto_model("iwamoto_99_Ia_wer")  #not a valid model
+        iwamoto._parse_iwamoto_model("iwamoto_99_Ia_wer")  #not a valid model
 
 def test_make_iwamoto_w7():
     iwamoto_test = yields_base.Yields("iwamoto_99_Ia_W7")
@@ -250,11 +251,11 @@ def test_normalization_stability(yields_test_case):
 def test_nomoto_parser():
     """Test the funciton that takes the name and element from the Nomoto file
     and puts it in the right format that we want."""
-    assert yields_base._parse_nomoto_element("01", "p") == "H_1"
-    assert yields_base._parse_nomoto_element("02", "d") == "H_2"
-    assert yields_base._parse_nomoto_element("09", "Be") == "Be_9"
-    assert yields_base._parse_nomoto_element("24", "Na") == "Na_24"
-    assert yields_base._parse_nomoto_element("30", "Si") == "Si_30"
+    assert nomoto._parse_nomoto_element("01", "p") == "H_1"
+    assert nomoto._parse_nomoto_element("02", "d") == "H_2"
+    assert nomoto._parse_nomoto_element("09", "Be") == "Be_9"
+    assert nomoto._parse_nomoto_element("24", "Na") == "Na_24"
+    assert nomoto._parse_nomoto_element("30", "Si") == "Si_30"
 
 
 # create simple object for testing
@@ -327,9 +328,9 @@ def test_make_nomoto_interpolation_values(yields_nomoto):
     """Tests that the interpolation is working correctly by directly testing 
        values, not just checking their range."""
     # I want to get a metallicity directly in between in log space, which can
-    # be gotten using the logspace function
+    # be gotten using the logspace function (the middle value)
     middle = np.logspace(yields_base._metallicity_log(0),
-                         yields_base._metallicity_log(0.001), 3)[1]  # get middle val
+                         yields_base._metallicity_log(0.001), 3)[1]
     yields_nomoto.set_metallicity(middle)
     assert np.isclose(yields_nomoto.H_1, np.mean([3.28E-2, 3.14E-2]))
     assert np.isclose(yields_nomoto.Ca_46, np.mean([5.69E-14, 2.06E-10]))
@@ -337,7 +338,7 @@ def test_make_nomoto_interpolation_values(yields_nomoto):
 
     # then repeat for a different metallicity
     middle = np.logspace(yields_base._metallicity_log(0.004),
-                         yields_base._metallicity_log(0.02), 3)[1]  # get middle val
+                         yields_base._metallicity_log(0.02), 3)[1]
     yields_nomoto.set_metallicity(middle)
     assert np.isclose(yields_nomoto.H_1, np.mean([2.96E-2, 2.45E-2]))
     assert np.isclose(yields_nomoto.Ca_46, np.mean([8.71E-10, 3.60E-9]))
@@ -381,11 +382,11 @@ def test_metallicity_sums_with_normalization(yields_nomoto):
 
 def test_parse_nomoto_individual_element():
     """Test whether this parsing works for everything"""
-    assert yields_base._parse_nomoto_individual_element("p") == "H_1"
-    assert yields_base._parse_nomoto_individual_element("d") == "H_2"
-    assert yields_base._parse_nomoto_individual_element("3He") == "He_3"
-    assert yields_base._parse_nomoto_individual_element("18O") == "O_18"
-    assert yields_base._parse_nomoto_individual_element("28Si") == "Si_28"
+    assert nomoto._parse_nomoto_individual_element("p") == "H_1"
+    assert nomoto._parse_nomoto_individual_element("d") == "H_2"
+    assert nomoto._parse_nomoto_individual_element("3He") == "He_3"
+    assert nomoto._parse_nomoto_individual_element("18O") == "O_18"
+    assert nomoto._parse_nomoto_individual_element("28Si") == "Si_28"
 
 def test_individual_nomoto_mass_13():
     individual = yields_base.Yields("nomoto_06_II_13")
@@ -1605,4 +1606,319 @@ def test_nomoto_Ia_w7():
     assert individual.Cl_35 == 1.73E-5
 
 # TODO: handle the cases better for the ww95 models that only have one
-#       metallicity
\ No newline at end of file
+#       metallicity
+# -----------------------------------------------------------------------------
+#
+# Model registry
+#
+# -----------------------------------------------------------------------------
+def test_available_models_no_file_access(monkeypatch):
+    # listing the models should not read anything
+    def fail(*args, **kwargs):
+        raise AssertionError("file was opened")
+    monkeypatch.setattr("builtins.open", fail)
+    models = registry.available_models()
+    assert "iwamoto_99_Ia_W7" in models
+    assert "nomoto_06_II_imf_ave" in models
+    assert "ww_95_II_25B" in models
+    assert "kobayashi_06_II_40_hn" in models
+    assert "nugrid_1.65" in models
+    assert registry.is_valid_model("nomoto_06_II_20_hn")
+    assert not registry.is_valid_model("nomoto_06_II_19")
+
+def test_available_models_family():
+    models = registry.available_models("iwamoto_99_Ia")
+    assert models == ["iwamoto_99_Ia_W7", "iwamoto_99_Ia_W70",
+                      "iwamoto_99_Ia_WDD1", "iwamoto_99_Ia_WDD2",
+                      "iwamoto_99_Ia_WDD3", "iwamoto_99_Ia_CDD1",
+                      "iwamoto_99_Ia_CDD2"]
+
+@pytest.mark.parametrize("model", registry.available_models())
+def test_metadata_matches_model(model):
+    family = registry.get_model_family(model)
+    yields_obj = yields_base.Yields(model)
+    if family.metallicities is not None:
+        assert list(family.metallicities) == \
+               list(yields_obj.metallicity_points)
+    if model in family.masses:
+        assert family.masses[model] == yields_obj.mass
+
+@pytest.mark.parametrize("model", ["ww_95_II_16A", "nugrid_8", "bad_model"])
+def test_get_model_family_error(model):
+    with pytest.raises(ValueError):
+        registry.get_model_family(model)
+
+def test_register_new_family():
+    calls = []
+    def loader(yields_obj, model_set):
+        calls.append(model_set)
+        testing.load_test(yields_obj, model_set)
+
+    registry.register_model_family("fake", "fake_.*", loader, ["fake_1"],
+                                   metallicities=[0, 1])
+    try:
+        assert calls == []  # nothing loaded yet
+        assert registry.is_valid_model("fake_1")
+        yields_obj = yields_base.Yields("fake_1")
+        assert calls == ["fake_1"]
+        assert yields_obj.H_1 == 1.0
+        with pytest.raises(ValueError):
+            yields_base.Yields("fake_2")
+    finally:
+        del registry._families["fake"]
+
+def test_register_loader_string():
+    family = registry.register_model_family(
+        "fake_string", "fake_string", "yields.loaders.testing:load_test",
+        ["fake_string"])
+    try:
+        assert isinstance(family._loader, str)  # not imported yet
+        yields_obj = yields_base.Yields("fake_string")
+        assert family.loader is testing.load_test
+        assert yields_obj.H_1 == 1.0
+    finally:
+        del registry._families["fake_string"]
+
+# -----------------------------------------------------------------------------
+#
+# Storage modes
+#
+# -----------------------------------------------------------------------------
+storage_models = ["nugrid_2", "ww_95_II_20A", "ww_95_II_11A",
+                  "iwamoto_99_Ia_W7", "kobayashi_06_II_25_hn",
+                  "nomoto_06_II_imf_ave"]
+
+@pytest.mark.parametrize("model", storage_models)
+@pytest.mark.parametrize("use_bundle", [True, False])
+def test_element_resolution(model, use_bundle):
+    full = yields_base.Yields(model, use_bundle=use_bundle)
+    element = yields_base.Yields(model, use_bundle=use_bundle,
+                                 resolution="element")
+    assert element.total_metals == pytest.approx(full.total_metals)
+    for z in [0, 0.0003, 0.002, 0.02]:
+        full.set_metallicity(z)
+        element.set_metallicity(z)
+        elements = [key for key in full.abundances if "_" not in key]
+        assert sorted(element.abundances.keys()) == sorted(elements)
+        for elt in elements:
+            assert element.abundances[elt] == \
+                   pytest.approx(full.abundances[elt], rel=1E-12, abs=0)
+            assert element.mass_fraction(elt, z) == \
+                   pytest.approx(full.mass_fraction(elt, z), rel=1E-12)
+        assert element.ejecta_sum() == pytest.approx(full.ejecta_sum())
+
+def test_element_resolution_no_isotopes():
+    element = yields_base.Yields("nomoto_06_II_imf_ave", resolution="element")
+    assert not hasattr(element, "Fe_56")
+    assert "Fe" in element.abundances
+    with pytest.raises(KeyError):
+        element.mass_fraction("Fe_56", 0.01)
+
+def test_bad_resolution():
+    with pytest.raises(ValueError):
+        yields_base.Yields("test", resolution="molecule")
+
+# -----------------------------------------------------------------------------
+#
+# Species subsets
+#
+# -----------------------------------------------------------------------------
+@pytest.mark.parametrize("model", storage_models)
+@pytest.mark.parametrize("use_bundle", [True, False])
+def test_species_subset_same_results(model, use_bundle):
+    species = ["Fe", "O_16", "Mg", "C"]
+    full = yields_base.Yields(model, use_bundle=use_bundle)
+    subset = yields_base.Yields(model, use_bundle=use_bundle, species=species)
+    assert subset.total_metals == pytest.approx(full.total_metals, rel=1E-12)
+    for z in [0, 0.0003, 0.002, 0.02]:
+        full.set_metallicity(z)
+        subset.set_metallicity(z)
+        for key in subset.abundances:
+            assert subset.abundances[key] == full.abundances[key]
+        for metal_only in [True, False]:
+            assert subset.ejecta_sum(metal_only) == \
+                   pytest.approx(full.ejecta_sum(metal_only), rel=1E-12)
+        for key in ["Fe", "Fe_56", "O_16", "Mg", "C"]:
+            assert subset.mass_fraction(key, z) == \
+                   pytest.approx(full.mass_fraction(key, z), rel=1E-12)
+
+@pytest.mark.parametrize("use_bundle", [True, False])
+def test_species_subset_normalized(use_bundle):
+    full = yields_base.Yields("nugrid_3", use_bundle=use_bundle)
+    subset = yields_base.Yields("nugrid_3", use_bundle=use_bundle,
+                                species=["Fe", "O"])
+    full.normalize_metals(2.0)
+    subset.normalize_metals(2.0)
+    assert subset.ejecta_sum(metal_only=True) == pytest.approx(2.0)
+    for z in [0.0001, 0.005, 0.02]:
+        full.set_metallicity(z)
+        subset.set_metallicity(z)
+        assert subset.ejecta_sum(metal_only=True) == pytest.approx(2.0)
+        assert subset.Fe == pytest.approx(full.Fe, rel=1E-12)
+        assert subset.O_16 == pytest.approx(full.O_16, rel=1E-12)
+
+@pytest.mark.parametrize("use_bundle", [True, False])
+def test_species_subset_not_built(use_bundle, monkeypatch):
+    """The isotopes that weren't asked for never get interpolation objects,
+    even while the model is being loaded."""
+    built = []
+    original = yields_base._interpolation_wrapper
+    def wrapper(metallicities, abundances):
+        built.append(abundances)
+        return original(metallicities, abundances)
+    monkeypatch.setattr(yields_base, "_interpolation_wrapper", wrapper)
+    subset = yields_base.Yields("nugrid_2", use_bundle=use_bundle,
+                                species=["Fe"])
+    n_built = len(built)
+    full = yields_base.Yields("nugrid_2", use_bundle=use_bundle)
+    assert all(key.startswith("Fe") for key in subset._abundances_interp)
+    # the totals and the mass fractions of the iron need a few
+    assert n_built < 5 * len(subset._abundances_interp)
+    assert n_built < len(full._abundances_interp)
+
+def test_species_subset_keeps_only_requested():
+    subset = yields_base.Yields("nomoto_06_II_imf_ave",
+                                species=["Fe", "O_16"])
+    assert sorted(subset.abundances.keys()) == \
+           ["Fe", "Fe_54", "Fe_56", "Fe_57", "Fe_58", "O_16"]
+    # we only have one oxygen isotope, so the element shouldn't be made
+    assert not hasattr(subset, "O")
+    assert not hasattr(subset, "Mg_24")
+    with pytest.raises(KeyError):
+        subset.mass_fraction("Mg", 0.01)
+
+# -----------------------------------------------------------------------------
+#
+# Normalization scale factor
+#
+# -----------------------------------------------------------------------------
+@pytest.mark.parametrize("model", ["nugrid_2", "ww_95_II_20A", "test"])
+def test_normalization_is_one_scale_factor(model):
+    raw = yields_base.Yields(model)
+    normed = yields_base.Yields(model)
+    normed.normalize_metals(3.0)
+    normed.normalize_metals(2.0)  # the second one replaces the first
+    for z in [0, 0.001, 0.02]:
+        raw.set_metallicity(z)
+        normed.set_metallicity(z)
+        scale = 2.0 / raw.ejecta_sum(metal_only=True)
+        assert normed._scale_factor == pytest.approx(scale)
+        assert normed.ejecta_sum(metal_only=True) == pytest.approx(2.0)
+        for key in raw.abundances:
+            assert normed.abundances[key] == \
+                   pytest.approx(raw.abundances[key] * scale, rel=1E-12)
+            assert getattr(normed, key) == normed.abundances[key]
+
+def test_unnormalized_scale_factor():
+    yields_obj = yields_base.Yields("nugrid_2")
+    yields_obj.set_metallicity(0.01)
+    assert yields_obj._scale_factor == 1.0
+
+# -----------------------------------------------------------------------------
+#
+# Tabulated totals
+#
+# -----------------------------------------------------------------------------
+@pytest.mark.parametrize("model", storage_models)
+@pytest.mark.parametrize("use_bundle", [True, False])
+@pytest.mark.parametrize("metal_only", [True, False])
+def test_ejecta_sum_array(model, use_bundle, metal_only):
+    yields_obj = yields_base.Yields(model, use_bundle=use_bundle)
+    metallicities = np.array([0, 1E-5, 0.0003, 0.002, 0.011, 0.02, 0.05])
+    totals = yields_obj.ejecta_sum(metal_only, metallicities)
+    assert totals.shape == metallicities.shape
+    for z, total in zip(metallicities, totals):
+        yields_obj.set_metallicity(z)
+        # compare to adding up the elements directly
+        direct = sum([value for key, value in yields_obj.abundances.items()
+                      if "_" not in key and
+                      not (metal_only and key in ["H", "He"])])
+        assert total == pytest.approx(direct, rel=1E-12)
+        assert yields_obj.ejecta_sum(metal_only) == pytest.approx(total,
+                                                                  rel=1E-14)
+
+def test_ejecta_sum_array_normalized():
+    yields_obj = yields_base.Yields("nugrid_3")
+    yields_obj.normalize_metals(2.0)
+    metallicities = np.array([0.0001, 0.003, 0.02])
+    assert yields_obj.ejecta_sum(True, metallicities) == pytest.approx(2.0)
+    totals = yields_obj.ejecta_sum(False, metallicities)
+    for z, total in zip(metallicities, totals):
+        yields_obj.set_metallicity(z)
+        assert yields_obj.ejecta_sum(False) == pytest.approx(total, rel=1E-12)
+
+# -----------------------------------------------------------------------------
+#
+# WW95 reader
+#
+# -----------------------------------------------------------------------------
+def test_ww95_reader_masks():
+    table = ww95._get_ww95_individual()
+    n_models = len(table["models"])
+    assert table["yields"].shape == (n_models, 5, len(table["isotopes"]))
+    present = dict(zip(table["models"], table["present"]))
+    assert present["11A"].tolist() == [False, False, False, False, True]
+    assert present["19A"].tolist() == [False, False, False, False, True]
+    assert present["25B"].tolist() == [True, False, False, False, False]
+    assert present["40C"].all()
+    # everything that's present has values, everything else doesn't
+    assert not np.isnan(table["yields"][table["present"]]).any()
+    assert np.isnan(table["yields"][~table["present"]]).all()
+
+def test_ww95_reader_opens_files_once(monkeypatch):
+    monkeypatch.setattr(ww95, "_ww95_individual", None)
+    opened = []
+    real_open = open
+    def counting_open(filename, *args, **kwargs):
+        opened.append(filename)
+        return real_open(filename, *args, **kwargs)
+    monkeypatch.setattr("builtins.open", counting_open)
+
+    for model in ["12A", "25B", "19A", "30B", "40C"]:
+        yields_base.Yields("ww_95_II_" + model, use_bundle=False)
+    assert len(opened) == 10
+    assert len(set(opened)) == 10
+
+# -----------------------------------------------------------------------------
+#
+# Derivatives with respect to metallicity and normalization
+#
+# -----------------------------------------------------------------------------
+jacobian_z = np.array([0.0005, 0.003, 0.01, 0.015])
+
+def _numerical_z_derivative(func, z, step=1E-7):
+    difference = func(z * (1 + step)) - func(z * (1 - step))
+    return difference / (2 * step * z.reshape(z.shape + (1,) *
+                                              (difference.ndim - z.ndim)))
+
+def test_mass_fraction_derivative():
+    yields_obj = yields_base.Yields("nomoto_06_II_imf_ave")
+    real = yields_obj.mass_fraction_derivative("O", jacobian_z)
+    numerical = _numerical_z_derivative(
+        lambda z: yields_obj.mass_fraction("O", z), jacobian_z)
+    assert real == pytest.approx(numerical, rel=1E-5)
+
+def test_mass_fraction_derivative_outside_models():
+    """The values are constant outside the models, including at zero."""
+    yields_obj = yields_base.Yields("nomoto_06_II_imf_ave")
+    derivative = yields_obj.mass_fraction_derivative("O", [0, 1E-8, 0.05])
+    assert np.all(derivative == 0)
+
+@pytest.mark.parametrize("normalize", [False, True])
+def test_yields_table_jacobian(normalize):
+    yields_obj = yields_base.Yields("nomoto_06_II_imf_ave")
+    if normalize:
+        yields_obj.normalize_metals(2.0)
+    values, d_z, d_norm = yields_obj.yields_table_jacobian(["O", "Fe"],
+                                                           jacobian_z)
+    assert values == pytest.approx(yields_obj.yields_table(["O", "Fe"],
+                                                           jacobian_z))
+    numerical = _numerical_z_derivative(
+        lambda z: yields_obj.yields_table(["O", "Fe"], z),
+        jacobian_z)
+    assert d_z == pytest.approx(numerical, rel=1E-5)
+
+    # the yields are proportional to the normalization
+    yields_obj.normalize_metals(3.0)
+    assert d_norm * 3.0 == pytest.approx(
+        yields_obj.yields_table(["O", "Fe"], jacobian_z))
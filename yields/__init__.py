@@ -1,4 +1,61 @@
+import importlib
+
+from .registry import *
 from .yields_base import *
 from .abundances import *
+# the model families that come with the package register themselves here
+from . import loaders
+
+# Everything else is only imported the first time it's used, so importing the
+# package stays fast. This is what each of those names comes from.
+_lazy_exports = {"AbundanceGrid": "abundance_grid",
+                 "GCEHistory": "chemical_evolution",
+                 "OneZoneGCE": "chemical_evolution",
+                 "primordial_composition": "chemical_evolution",
+                 "ModelComparison": "comparison",
+                 "compare_models": "comparison",
+                 "DelayTimeDistribution": "delay_times",
+                 "PowerLawDTD": "delay_times",
+                 "ExponentialDTD": "delay_times",
+                 "GaussianDTD": "delay_times",
+                 "SingleDelayDTD": "delay_times",
+                 "convolve_history": "delay_times",
+                 "event_rates": "delay_times",
+                 "element_rates": "delay_times",
+                 "YieldsEnsemble": "ensemble",
+                 "AbundanceEnsemble": "ensemble",
+                 "ParticleFeedback": "feedback",
+                 "KroupaIMF": "imf",
+                 "lifetime": "lifetimes",
+                 "turnoff_mass": "lifetimes",
+                 "catalogue": "model_catalogue",
+                 "ssp_format_version": "ssp",
+                 "SSPTable": "ssp",
+                 "read_ssp_table": "ssp",
+                 "make_ssp_table": "ssp",
+                 "StochasticYields": "stochastic"}
+
+# the submodules that aren't imported above
+_lazy_modules = ["abundance_grid", "chemical_evolution", "comparison",
+                 "data_bundle", "delay_times", "ensemble", "feedback", "imf",
+                 "lifetimes", "model_catalogue", "parallel", "ssp",
+                 "stochastic"]
+
+__all__ = (registry.__all__ + yields_base.__all__ + abundances.__all__ +
+           ["solar_z"] + list(_lazy_exports))
+
+
+def __getattr__(name):
+    # solar_z needs the solar abundance file, so we only read it if asked
+    if name == "solar_z":
+        return create_solar_metal_fractions()[0]
+    if name in _lazy_exports:
+        module = importlib.import_module("." + _lazy_exports[name], __name__)
+        return getattr(module, name)
+    if name in _lazy_modules:
+        return importlib.import_module("." + name, __name__)
+    raise AttributeError("module 'yields' has no attribute '{}'".format(name))
+
 
-solar_z = create_solar_metal_fractions()[0]
\ No newline at end of file
+def __dir__():
+    return sorted(set(globals()) | set(__all__) | set(_lazy_modules))
@@ -0,0 +1,249 @@
+import struct
+
+import numpy as np
+
+__all__ = ["AbundanceGrid"]
+
+# identifies the binary file format written by AbundanceGrid.write()
+_grid_file_magic = b"YLDGRID1"
+_grid_name_length = 16
+
+# what each kind of ratio is called in the binary files
+_ratio_names = {"x_on_fe": "{}/Fe", "x_on_h": "{}/H"}
+
+
+def _ratio_name(ratio, element):
+    """Name of one table, like "O/Fe" for [O/Fe]."""
+    return _ratio_names[ratio].format(element)
+
+
+def _parse_ratio_name(name):
+    """Turns the name of a table back into the ratio and element."""
+    element, denom = name.split("/")
+    if denom == "Fe":
+        return "x_on_fe", element
+    else:
+        return "x_on_h", element
+
+
+class AbundanceGrid(object):
+    """Abundance ratios tabulated on a grid of Z_Ia and Z_II.
+
+    The grid is evenly spaced in log(Z) for both the Type Ia and Type II
+    metallicities. Values in between the grid points are found with bilinear
+    interpolation in log(Z) space.
+
+    The accuracy of this is set by the grid spacing. For a smooth function the
+    error of bilinear interpolation is bounded by
+
+    .. math::
+        |\\epsilon| \\leq \\frac{h^2}{8} \\left( \\max|f_{xx}| +
+        \\max|f_{yy}| \\right)
+
+    where h is the spacing in log(Z), so the error shrinks by a factor of four
+    each time the number of points doubles. The yields themselves are
+    piecewise linear in log(Z) with kinks at the metallicities of the models,
+    so rather than trusting the analytic bound we measure the error directly.
+    When the grid is built we evaluate the exact ratio at the center of every
+    grid cell, which is where bilinear interpolation of a smooth function is
+    worst, and along the metallicities of the models, which is where the kinks
+    are. The largest difference (in dex) for each table is stored in the
+    `max_error` dictionary. The tables are exact at the grid points.
+    """
+    def __init__(self, log_z_Ia, log_z_II, tables, max_error=None):
+        """Create the grid from tables that have already been calculated.
+
+        Most users will want to use `from_abundances` or `read` instead.
+
+        :param log_z_Ia: Evenly spaced values of log(Z_Ia) for the first axis
+                         of the tables.
+        :param log_z_II: Evenly spaced values of log(Z_II) for the second axis
+                         of the tables.
+        :param tables: Dictionary where the keys are tuples of the ratio
+                       ("x_on_fe" or "x_on_h") and the element, and the values
+                       are 2D arrays of shape (len(log_z_Ia), len(log_z_II)).
+        :param max_error: Dictionary with the same keys as tables, holding the
+                          maximum interpolation error of each table.
+        """
+        self.log_z_Ia = np.array(log_z_Ia, dtype=np.float64)
+        self.log_z_II = np.array(log_z_II, dtype=np.float64)
+        self.tables = {key: np.ascontiguousarray(value, dtype=np.float64)
+                       for key, value in tables.items()}
+        if max_error is None:
+            max_error = {key: np.nan for key in self.tables}
+        self.max_error = max_error
+
+        # the spacing is what lets us do the lookup without searching
+        self._d_log_z_Ia = self.log_z_Ia[1] - self.log_z_Ia[0]
+        self._d_log_z_II = self.log_z_II[1] - self.log_z_II[0]
+
+    @classmethod
+    def from_abundances(cls, abundances_obj, elements, n_points=256,
+                        z_min=1E-7, z_max=0.1, ratios=("x_on_fe", "x_on_h")):
+        """Tabulate the ratios of an Abundances object.
+
+        :param abundances_obj: Abundances object used to calculate the exact
+                               values on the grid.
+        :param elements: List of elements to tabulate.
+        :param n_points: Number of grid points along each metallicity axis.
+        :param z_min: Smallest metallicity on the grid. Metallicities below
+                      this (including zero) are not covered by the grid.
+        :param z_max: Largest metallicity on the grid.
+        :param ratios: Which ratios to tabulate. Can include "x_on_fe" and
+                       "x_on_h".
+        :returns: AbundanceGrid object
+        """
+        log_z = np.linspace(np.log10(z_min), np.log10(z_max), n_points)
+        # make every combination of metallicity at once
+        Z_Ia, Z_II = [10**z.ravel() for z in np.meshgrid(log_z, log_z,
+                                                           indexing="ij")]
+
+        # We also need the points where we measure the error. These are the
+        # cell centers, plus the metallicities of the models themselves, since
+        # the yields have kinks there that the grid will smooth over.
+        log_z_center = 0.5 * (log_z[1:] + log_z[:-1])
+        test_points = []
+        for yields_obj in [abundances_obj.yields_Ia, abundances_obj.yields_II]:
+            model_z = np.array(yields_obj.metallicity_points, dtype=float)
+            model_z = model_z[(model_z >= z_min) & (model_z <= z_max)]
+            test_points.append(np.union1d(log_z_center, np.log10(model_z)))
+        Z_Ia_c, Z_II_c = [10**z.ravel() for z in np.meshgrid(*test_points,
+                                                             indexing="ij")]
+
+        tables = dict()
+        for ratio in ratios:
+            func = getattr(abundances_obj, "_" + ratio)
+            for elt in elements:
+                tables[(ratio, elt)] = func(Z_Ia, Z_II, elt).reshape(n_points,
+                                                                     n_points)
+
+        grid = cls(log_z, log_z, tables)
+
+        # then measure how well we do at the centers of each cell
+        for key in grid.tables:
+            ratio, elt = key
+            exact = getattr(abundances_obj, "_" + ratio)(Z_Ia_c, Z_II_c, elt)
+            interp, _ = grid.lookup(ratio, elt, Z_Ia_c, Z_II_c)
+            grid.max_error[key] = float(np.max(np.abs(exact - interp)))
+
+        return grid
+
+    def covers(self, ratio, element):
+        """Returns whether this ratio has been tabulated.
+
+        :param ratio: "x_on_fe" or "x_on_h"
+        :param element: Element to be used in place of X.
+        :rtype: bool
+        """
+        return (ratio, element) in self.tables
+
+    def lookup(self, ratio, element, Z_Ia, Z_II):
+        """Find the ratio at the given metallicities with bilinear
+        interpolation.
+
+        :param ratio: "x_on_fe" or "x_on_h"
+        :param element: Element to be used in place of X.
+        :param Z_Ia: array of metallicities from type Ia supernovae
+        :param Z_II: array of metallicities from type II supernovae
+        :returns: Array of values, and a boolean array of which metallicities
+                  were inside the grid. Values outside the grid, or where
+                  the metallicities are nan, are nan.
+        :rtype: tuple of np.ndarray
+        """
+        table = self.tables[(ratio, element)]
+        n_Ia, n_II = table.shape
+
+        # get the position in units of grid cells
+        with np.errstate(divide="ignore", invalid="ignore"):
+            x = np.log10(Z_Ia)
+            y = np.log10(Z_II)
+        x -= self.log_z_Ia[0]
+        x /= self._d_log_z_Ia
+        y -= self.log_z_II[0]
+        y /= self._d_log_z_II
+        inside = (x >= 0) & (x <= n_Ia - 1) & (y >= 0) & (y <= n_II - 1)
+
+        # the index of the lower corner of the cell. The upper edge belongs to
+        # the last cell, so we have to clip there. Points outside the grid
+        # (which includes nan) use the first cell, and get replaced at the end.
+        x[~inside] = 0
+        y[~inside] = 0
+        i = np.minimum(x.astype(np.intp), n_Ia - 2)
+        j = np.minimum(y.astype(np.intp), n_II - 2)
+        x -= i
+        y -= j
+
+        # then do the interpolation using the four corners of the cell
+        flat_table = table.ravel()
+        corner = i * n_II + j
+        v_00 = flat_table[corner]
+        v_10 = flat_table[corner + n_II]
+        v_01 = flat_table[corner + 1]
+        v_11 = flat_table[corner + n_II + 1]
+        values = v_00 + x * (v_10 - v_00) + y * (v_01 - v_00) + \
+                 x * y * (v_11 - v_10 - v_01 + v_00)
+        values[~inside] = np.nan
+        return values, inside
+
+    def write(self, filename):
+        """Write the tables to a binary file that other codes can read.
+
+        Everything is little endian. The layout is:
+
+        - 8 bytes: the characters "YLDGRID1"
+        - 4 x int32: n_Ia, n_II, n_tables, name_length (always 16)
+        - n_Ia x float64: log10(Z_Ia) of the grid points
+        - n_II x float64: log10(Z_II) of the grid points
+        - n_tables x name_length chars: name of each table, like "O/Fe" or
+          "O/H", padded with null characters
+        - n_tables x float64: maximum interpolation error of each table (dex)
+        - n_tables x n_Ia x n_II float64: the tables themselves, in C order.
+          In Fortran this is an array of shape (n_II, n_Ia, n_tables).
+
+        :param filename: Where to write the file.
+        """
+        keys = list(self.tables.keys())
+        names = [_ratio_name(*key).encode("ascii") for key in keys]
+        for name in names:
+            if len(name) >= _grid_name_length:
+                raise ValueError("Table name too long: {}".format(name))
+
+        with open(filename, "wb") as out_file:
+            out_file.write(_grid_file_magic)
+            out_file.write(struct.pack("<4i", len(self.log_z_Ia),
+                                       len(self.log_z_II), len(keys),
+                                       _grid_name_length))
+            out_file.write(self.log_z_Ia.astype("<f8").tobytes())
+            out_file.write(self.log_z_II.astype("<f8").tobytes())
+            for name in names:
+                out_file.write(name.ljust(_grid_name_length, b"\0"))
+            errors = np.array([self.max_error[key] for key in keys])
+            out_file.write(errors.astype("<f8").tobytes())
+            for key in keys:
+                out_file.write(self.tables[key].astype("<f8").tobytes())
+
+    @classmethod
+    def read(cls, filename):
+        """Read tables written by `write`.
+
+        :param filename: Location of the file.
+        :returns: AbundanceGrid object
+        """
+        with open(filename, "rb") as in_file:
+            if in_file.read(len(_grid_file_magic)) != _grid_file_magic:
+                raise ValueError("This is not an abundance grid file.")
+            n_Ia, n_II, n_tables, name_length = struct.unpack("<4i",
+                                                              in_file.read(16))
+            log_z_Ia = np.fromfile(in_file, dtype="<f8", count=n_Ia)
+            log_z_II = np.fromfile(in_file, dtype="<f8", count=n_II)
+            names = [in_file.read(name_length).rstrip(b"\0").decode("ascii")
+                     for _ in range(n_tables)]
+            errors = np.fromfile(in_file, dtype="<f8", count=n_tables)
+            data = np.fromfile(in_file, dtype="<f8",
+                               count=n_tables * n_Ia * n_II)
+
+        data = data.reshape(n_tables, n_Ia, n_II)
+        keys = [_parse_ratio_name(name) for name in names]
+        tables = {key: table for key, table in zip(keys, data)}
+        max_error = {key: float(err) for key, err in zip(keys, errors)}
+        return cls(log_z_Ia, log_z_II, tables, max_error)
@@ -1,32 +1,133 @@
 import os
 
 import numpy as np
-from astropy import table
 
 import yields
 
+__all__ = ["create_solar_metal_fractions", "Abundances", "ChannelAbundances",
+           "AbundanceLikelihood"]
+
+# the solar abundances are only read the first time they are needed
+_solar_abundances = None
+
+
+def _read_solar_abundances():
+    """Read the solar abundance file, or get the results of having already
+    read it.
+
+    The file is simple enough that we can parse it ourselves, which saves
+    having to import something like astropy to read it.
+
+    :returns: Total metallicity of the sun, and dictionary of the mass of
+              each element as a fraction of the total metals.
+    """
+    global _solar_abundances
+    if _solar_abundances is not None:
+        return _solar_abundances
 
-# need to get the solar abundances
-def create_solar_metal_fractions():
     this_dir = os.path.dirname(__file__)
     solar_file = this_dir + '/data/solar_abundance.txt'
-    solar = table.Table.read(solar_file, format="ascii",
-                             names=['Natom', 'name', 'fN', 'log', 'f_mass'])
-    z_mass = np.sum(solar["f_mass"][2:])
+    names = []
+    f_masses = []
+    with open(solar_file, "r") as in_file:
+        for line in in_file:
+            if line.startswith("#") or not line.strip():
+                continue
+            # columns are Natom, name, fN, log, f_mass
+            split_line = line.split()
+            names.append(split_line[1])
+            f_masses.append(float(split_line[4]))
+    f_masses = np.array(f_masses)
+    z_mass = np.sum(f_masses[2:])
 
     metal_fractions = dict()
-    for row in solar:
-        elt = row["name"]
-        f_mass = row["f_mass"]
+    for elt, f_mass in zip(names, f_masses):
         metal_fractions[elt] = f_mass / z_mass
 
-    return z_mass, metal_fractions
+    _solar_abundances = z_mass, metal_fractions
+    return _solar_abundances
+
+
+# need to get the solar abundances
+def create_solar_metal_fractions():
+    z_mass, metal_fractions = _read_solar_abundances()
+    # copy so the user can't change the values everything else uses
+    return z_mass, dict(metal_fractions)
+
+
+class _SolarValue(object):
+    """Class attribute holding some of the solar information. Having this
+    lets us wait to read the solar abundance file until someone uses it."""
+    def __init__(self, idx):
+        self.idx = idx
+
+    def __get__(self, obj, owner):
+        return _read_solar_abundances()[self.idx]
+
+
+class _CacheTable(object):
+    """The cached values of one quantity (like [O/Fe]) at pairs of
+    metallicities.
+
+    Each pair is stored as one complex number, which numpy sorts by the real
+    part (Z_Ia) and then the imaginary part (Z_II). The pairs are kept
+    sorted, so many of them can be looked up at once with np.searchsorted.
+    When there are more than `max_size` pairs, the oldest ones are dropped.
+    """
+    def __init__(self, max_size=None):
+        """
+        :param max_size: Most pairs to keep. None keeps everything.
+        """
+        self.max_size = max_size
+        self.keys = np.zeros(0, dtype=np.complex128)
+        self.values = np.zeros(0, dtype=np.float64)
+        # when each pair was added, counting pairs
+        self.added = np.zeros(0, dtype=np.int64)
+        self._n_added = 0
+
+    def __len__(self):
+        return len(self.keys)
+
+    def lookup(self, keys):
+        """Find the values of some pairs.
+
+        :param keys: Array of pairs, as complex numbers.
+        :returns: Array of the values, which is nan for pairs that aren't
+                  in the table, and boolean array of which pairs are.
+        """
+        if len(self.keys) == 0:
+            return np.full(len(keys), np.nan), np.zeros(len(keys), dtype=bool)
+        idxs = np.minimum(np.searchsorted(self.keys, keys),
+                          len(self.keys) - 1)
+        found = self.keys[idxs] == keys
+        return np.where(found, self.values[idxs], np.nan), found
+
+    def add(self, keys, values):
+        """Put new pairs in the table, then drop the oldest ones if there
+        are too many.
+
+        :param keys: Sorted array of pairs that aren't in the table yet, as
+                     complex numbers.
+        :param values: Array of the values of those pairs.
+        """
+        idxs = np.searchsorted(self.keys, keys)
+        self.keys = np.insert(self.keys, idxs, keys)
+        self.values = np.insert(self.values, idxs, values)
+        self.added = np.insert(self.added, idxs, self._n_added +
+                               np.arange(len(keys)))
+        self._n_added += len(keys)
+        if self.max_size is not None and len(self.keys) > self.max_size:
+            keep = self.added >= self._n_added - self.max_size
+            self.keys = self.keys[keep]
+            self.values = self.values[keep]
+            self.added = self.added[keep]
 
 
 class Abundances(object):
     """Holds infomation about the abundances of an object. """
     # get some of the solar information
-    Z_sun, solar_metal_fractions = create_solar_metal_fractions()
+    Z_sun = _SolarValue(0)
+    solar_metal_fractions = _SolarValue(1)
 
     @classmethod
     def hydrogen(cls, Z_tot):
@@ -46,21 +147,65 @@ class Abundances(object):
 
         return (1 - Z_tot) / (1 + Y/X)
 
-    def __init__(self, II_type="nomoto"):
+    def __init__(self, II_type="nomoto", Ia_type="iwamoto_99_Ia_W7",
+                 cache=False, cache_tolerance=None, cache_size=1000000):
         """Create an abundance object.
 
-        :param II_type: Which model of Type Ia supernovae to use. Either
-                        "nomtoto" or "ww".
+        :param II_type: Which model of Type II supernovae to use. Either
+                        "nomoto" or "ww" for the IMF averaged yields of those
+                        sets, or the name of any model that `yields.Yields`
+                        accepts.
         :type II_type: str
+        :param Ia_type: Which model of Type Ia supernovae to use. This can be
+                        the name of any model that `yields.Yields` accepts.
+        :type Ia_type: str
+        :param cache: Whether to memoize the results of the abundance
+                      calculations. When this is on, each unique pair of
+                      metallicities is only evaluated once, and the results
+                      are scattered back to all the places that pair shows up.
+                      Results are also kept between calls.
+        :type cache: bool
+        :param cache_tolerance: Fractional tolerance used to group nearly
+                                identical metallicities when caching. Each
+                                metallicity is rounded onto a logarithmic grid
+                                with this spacing before being evaluated, so
+                                values that agree to within this fraction
+                                share a cache entry. The default of None only
+                                groups exactly identical values.
+        :type cache_tolerance: float
+        :param cache_size: Most metallicity pairs to keep in the cache for
+                           each quantity (like [O/Fe]). Once there are more,
+                           the ones that were added first are dropped. None
+                           lets the cache grow without limit.
+        :type cache_size: int
         :returns: None, but sets attributes.
         """
 
+        # keep track of how we were made, so worker processes can copy us
+        self._init_kwargs = {"II_type": II_type, "Ia_type": Ia_type}
+        self._pool = None
+        self._pool_workers = None
+
         # create the yield objects that will be used to calculate the SN yields
-        self.yields_Ia = yields.Yields("iwamoto_99_Ia_W7")
+        self.yields_Ia = yields.Yields(Ia_type)
         if II_type == "nomoto":
             self.yields_II = yields.Yields("nomoto_06_II_imf_ave")
         elif II_type == "ww":
             self.yields_II = yields.Yields("ww_95_imf_ave")
+        else:
+            self.yields_II = yields.Yields(II_type)
+
+        # set up the cache. This is one _CacheTable for each function/element
+        # combination, which holds the value at each pair of metallicities
+        self.cache = cache
+        self.cache_tolerance = cache_tolerance
+        self.cache_size = cache_size
+        self._cache = dict()
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+        # there is no precomputed grid until the user asks for one
+        self.grid = None
 
     def _err_checking_z(self, Z_Ia, Z_II):
         """Error checking on the user metallicity value."""
@@ -87,12 +232,12 @@ class Abundances(object):
 
         # the metallicity must be between 0 and 1.
         for z_type in [Z_Ia, Z_II]:
-            if any(z_type < 0) or any(z_type > 1):
+            if np.any(z_type < 0) or np.any(z_type > 1):
                 raise ValueError("Metallicity must be between 0 and 1.")
 
         Z_tot = Z_Ia + Z_II
         # also have to check that the total metallicity isn't larger than one.
-        if any(Z_tot < 0) or any(Z_tot > 1):
+        if np.any(Z_tot < 0) or np.any(Z_tot > 1):
             raise ValueError("Total metallicity can't be larger than one. ")
 
         return Z_Ia, Z_II
@@ -105,7 +250,159 @@ class Abundances(object):
         else:
             return array
 
-    def z_on_h(self, Z_Ia, Z_II):
+    def cache_info(self):
+        """Returns statistics about how well the cache is working.
+
+        Hits are the number of metallicity values that did not need to be
+        evaluated, either because they were already in the cache or because
+        they were duplicates of another value in the same call. Misses are the
+        number of unique metallicity pairs that had to be evaluated.
+
+        :returns: Dictionary with the number of hits, misses, and the number of
+                  values currently stored in the cache.
+        :rtype: dict
+        """
+        size = sum([len(table) for table in self._cache.values()])
+        return {"hits": self.cache_hits, "misses": self.cache_misses,
+                "size": size}
+
+    def clear_cache(self):
+        """Removes everything from the cache and resets the statistics."""
+        self._cache = dict()
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def _quantize(self, Z):
+        """Round metallicities onto the logarithmic grid used by the cache."""
+        if not self.cache_tolerance:
+            return Z
+        # we round in log space, since the metallicities span many orders of
+        # magnitude. Zero is left alone.
+        step = np.log10(1 + self.cache_tolerance)
+        with np.errstate(divide="ignore"):
+            log_z = np.round(np.log10(Z) / step) * step
+        rounded = np.where(Z > 0, 10**log_z, 0)
+        # rounding up could push us past the physical limit
+        return np.clip(rounded, 0, 1)
+
+    def _evaluate(self, func, Z_Ia, Z_II, *args, workers=None,
+                  n_threads=None):
+        """Evaluate one of the calculation functions at these metallicities,
+        going through the cache if the user wants that.
+
+        :param func: Function that does the actual calculation. It must take
+                     arrays of Z_Ia and Z_II, then any other arguments.
+        :param Z_Ia: array of metallicities from type Ia supernovae
+        :param Z_II: array of metallicities from type II supernovae
+        :param args: Other arguments to pass to func, like the element.
+        :param workers: Number of processes to split the calculation over.
+        :param n_threads: Number of threads to split the calculation over.
+        :returns: Array of values at each metallicity pair.
+        :rtype: np.ndarray
+        """
+        if not self.cache:
+            return self._compute(func, Z_Ia, Z_II, *args, workers=workers,
+                                 n_threads=n_threads)
+
+        Z_Ia = self._quantize(Z_Ia)
+        Z_II = self._quantize(Z_II)
+
+        # Compress down to the unique pairs. We can then do the lookup and
+        # calculation on those, and use the inverse indices to put them back
+        # where they belong. Each pair is one complex number, see _CacheTable.
+        pairs = np.asarray(Z_Ia, dtype=np.float64) + \
+            1j * np.asarray(Z_II, dtype=np.float64)
+        unique_pairs, inverse = np.unique(pairs, return_inverse=True)
+        inverse = inverse.reshape(-1)  # numpy versions disagree on the shape
+
+        key = (func.__name__,) + args
+        if key not in self._cache:
+            self._cache[key] = _CacheTable(self.cache_size)
+        this_cache = self._cache[key]
+        unique_values, found = this_cache.lookup(unique_pairs)
+        missing = ~found
+
+        # then calculate the ones we don't have yet, all at once
+        if np.any(missing):
+            new_values = self._compute(func, unique_pairs[missing].real,
+                                       unique_pairs[missing].imag, *args,
+                                       workers=workers, n_threads=n_threads)
+            unique_values[missing] = new_values
+            this_cache.add(unique_pairs[missing], new_values)
+
+        n_missing = int(np.sum(missing))
+        self.cache_misses += n_missing
+        self.cache_hits += len(Z_Ia) - n_missing
+
+        return unique_values[inverse]
+
+    def _compute(self, func, Z_Ia, Z_II, *args, workers=None,
+                 n_threads=None):
+        """Evaluate one of the calculation functions, using the precomputed
+        grid where we can. Arguments are the same as `_evaluate`."""
+        # the grid only holds the ratios that need the yields, which are the
+        # ones that take an element
+        ratio = func.__name__.lstrip("_")
+        if self.grid is None or not args or not self.grid.covers(ratio, *args):
+            return self._exact(func, Z_Ia, Z_II, args, workers, n_threads)
+
+        values, inside = self.grid.lookup(ratio, args[0], Z_Ia, Z_II)
+        # anything outside the grid gets the exact calculation
+        if not np.all(inside):
+            values[~inside] = self._exact(func, Z_Ia[~inside], Z_II[~inside],
+                                          args, workers, n_threads)
+        return values
+
+    def _exact(self, func, Z_Ia, Z_II, args, workers, n_threads):
+        """Evaluate one of the calculation functions directly, splitting it
+        over worker processes or threads if requested."""
+        if workers is not None and workers > 1:
+            # multiprocessing takes a while to import, so only do it if needed
+            from yields import parallel
+
+            return parallel.process_map(self, func.__name__, Z_Ia, Z_II, args,
+                                        workers)
+        if n_threads is not None and n_threads > 1:
+            from yields import parallel
+
+            return parallel.thread_map(func, Z_Ia, Z_II, args, n_threads)
+        return func(Z_Ia, Z_II, *args)
+
+    def close(self):
+        """Shut down any worker processes started by passing `workers` to the
+        calculation functions. They are started again if needed. """
+        # if there's no pool there's nothing to do, and no need to import
+        # multiprocessing
+        if self._pool is None:
+            return
+        from yields import parallel
+
+        parallel.close_pool(self)
+
+    def precompute(self, elements, n_points=256, z_min=1E-7, z_max=0.1):
+        """Tabulate [X/Fe] and [X/H] on a grid of metallicities, so that later
+        calls can use fast bilinear interpolation rather than going through
+        the yield objects.
+
+        The grid is evenly spaced in log(Z_Ia) and log(Z_II). Metallicities
+        outside the grid (including zero) are still calculated exactly. See
+        `yields.AbundanceGrid` for a discussion of the errors this introduces;
+        the measured maximum error of each table is in `self.grid.max_error`.
+        The grid can be saved with `self.grid.write()` to be used by other
+        codes.
+
+        :param elements: List of elements to tabulate.
+        :param n_points: Number of grid points along each metallicity axis.
+        :param z_min: Smallest metallicity on the grid.
+        :param z_max: Largest metallicity on the grid.
+        :returns: None, but sets the grid attribute.
+        """
+        # the cache would hold values calculated the other way
+        self.clear_cache()
+        self.grid = yields.AbundanceGrid.from_abundances(self, elements,
+                                                         n_points, z_min, z_max)
+
+    def z_on_h(self, Z_Ia, Z_II, workers=None, n_threads=None):
         """Calculate [Z/H].
 
         .. math::
@@ -118,21 +415,28 @@ class Abundances(object):
 
         :param Z_Ia: metallicity from type Ia supernovae
         :param Z_II: metallicity from type II supernovae
+        :param workers: Number of processes to split the calculation over.
+                        The default of None does everything in this process.
+        :param n_threads: Number of threads to split the calculation over.
+                          The default of None does everything in this thread.
         :returns: [Z/H]
         :rtype: float if a single metallicity is passed, otherwise np.ndarray
         """
         Z_Ia, Z_II = self._err_checking_z(Z_Ia, Z_II)
 
+        values = self._evaluate(self._z_on_h, Z_Ia, Z_II, workers=workers,
+                                n_threads=n_threads)
+        return self._rtype(values)
+
+    def _z_on_h(self, Z_Ia, Z_II):
+        """Does the actual [Z/H] calculation on arrays. See z_on_h. """
         Z_tot = Z_Ia + Z_II
-        try:
-            star_frac = Z_tot / self.hydrogen(Z_tot)
-            sun_frac  = self.Z_sun / self.hydrogen(self.Z_sun)
-        except ZeroDivisionError:
-            return np.inf
+        star_frac = Z_tot / self.hydrogen(Z_tot)
+        sun_frac  = self.Z_sun / self.hydrogen(self.Z_sun)
 
-        return self._rtype(np.log10(star_frac / sun_frac))
+        return np.log10(star_frac / sun_frac)
 
-    def x_on_h(self, element, Z_Ia, Z_II):
+    def x_on_h(self, element, Z_Ia, Z_II, workers=None, n_threads=None):
         """Calculate [X/H].
 
         This is calculated in the following way.
@@ -155,29 +459,36 @@ class Abundances(object):
         :type element: str
         :param Z_Ia: metallicity from type Ia supernovae
         :param Z_II: metallicity from type II supernovae
+        :param workers: Number of processes to split the calculation over.
+                        The default of None does everything in this process.
+        :param n_threads: Number of threads to split the calculation over.
+                          The default of None does everything in this thread.
         :returns: [X/H]
         :rtype: float if a single metallicity is passed, otherwise np.ndarray
         """
         Z_Ia, Z_II = self._err_checking_z(Z_Ia, Z_II)
 
+        values = self._evaluate(self._x_on_h, Z_Ia, Z_II, element,
+                                workers=workers, n_threads=n_threads)
+        return self._rtype(values)
+
+    def _x_on_h(self, Z_Ia, Z_II, element):
+        """Does the actual [X/H] calculation on arrays. See x_on_h. """
         # get the metal mass fractions
         f_Ia = self.yields_Ia.mass_fraction(element, Z_Ia)
         f_II = self.yields_II.mass_fraction(element, Z_II)
 
-        try:
-            star_num = Z_Ia * f_Ia + Z_II * f_II
-            star_denom = self.hydrogen(Z_Ia + Z_II)
-            star_frac = star_num / star_denom
-        except ZeroDivisionError:
-            return np.inf
+        star_num = Z_Ia * f_Ia + Z_II * f_II
+        star_denom = self.hydrogen(Z_Ia + Z_II)
+        star_frac = star_num / star_denom
 
         sun_num = self.Z_sun * self.solar_metal_fractions[element]
         sun_denom = self.hydrogen(self.Z_sun)
         sun_frac = sun_num / sun_denom
 
-        return self._rtype(np.log10(star_frac / sun_frac))
+        return np.log10(star_frac / sun_frac)
 
-    def x_on_fe(self, element, Z_Ia, Z_II):
+    def x_on_fe(self, element, Z_Ia, Z_II, workers=None, n_threads=None):
         """Calculate [X/Fe].
 
         This is calculated in the following way.
@@ -198,39 +509,693 @@ class Abundances(object):
         :type element: str
         :param Z_Ia: metallicity from type Ia supernovae
         :param Z_II: metallicity from type II supernovae
+        :param workers: Number of processes to split the calculation over.
+                        The default of None does everything in this process.
+        :param n_threads: Number of threads to split the calculation over.
+                          The default of None does everything in this thread.
         :returns: [X/Fe]
         :rtype: float if a single metallicity is passed, otherwise np.ndarray
         """
         Z_Ia, Z_II = self._err_checking_z(Z_Ia, Z_II)
 
+        values = self._evaluate(self._x_on_fe, Z_Ia, Z_II, element,
+                                workers=workers, n_threads=n_threads)
+        return self._rtype(values)
+
+    def _x_on_fe(self, Z_Ia, Z_II, element):
+        """Does the actual [X/Fe] calculation on arrays. See x_on_fe. """
         # get the metal mass fractions
         f_Ia_x = self.yields_Ia.mass_fraction(element, Z_Ia)
         f_II_x = self.yields_II.mass_fraction(element, Z_II)
         f_Ia_Fe = self.yields_Ia.mass_fraction("Fe", Z_Ia)
         f_II_Fe = self.yields_II.mass_fraction("Fe", Z_II)
 
-        try:
-            star_num = Z_Ia * f_Ia_x + Z_II * f_II_x
-            star_denom = Z_Ia * f_Ia_Fe + Z_II * f_II_Fe
-            star_frac = star_num / star_denom
-        except ZeroDivisionError:
-            return np.inf
+        star_num = Z_Ia * f_Ia_x + Z_II * f_II_x
+        star_denom = Z_Ia * f_Ia_Fe + Z_II * f_II_Fe
+        star_frac = star_num / star_denom
 
         sun_num = self.solar_metal_fractions[element]
         sun_denom = self.solar_metal_fractions["Fe"]
         sun_frac = sun_num / sun_denom
 
-        return self._rtype(np.log10(star_frac / sun_frac))
+        return np.log10(star_frac / sun_frac)
 
-    def log_z_over_z_sun(self, Z_Ia, Z_II):
+    def log_z_over_z_sun(self, Z_Ia, Z_II, workers=None, n_threads=None):
         """Returns the value of log(Z/Z_sun).
 
         :param Z_Ia: metallicity from type Ia supernovae
         :param Z_II: metallicity from type II supernovae
+        :param workers: Number of processes to split the calculation over.
+                        The default of None does everything in this process.
+        :param n_threads: Number of threads to split the calculation over.
+                          The default of None does everything in this thread.
         :returns: value of log(Z/Z_sun)
         :rtype: float if a single metallicity is passed, otherwise np.ndarray
         """
         Z_Ia, Z_II = self._err_checking_z(Z_Ia, Z_II)
 
+        values = self._evaluate(self._log_z_over_z_sun, Z_Ia, Z_II,
+                                workers=workers, n_threads=n_threads)
+        return self._rtype(values)
+
+    def _log_z_over_z_sun(self, Z_Ia, Z_II):
+        """Does the actual log(Z/Z_sun) calculation on arrays. """
         Z_tot = Z_Ia + Z_II
-        return self._rtype(np.log10(Z_tot / self.Z_sun))
+        return np.log10(Z_tot / self.Z_sun)
+
+    def _element_mass_jacobian(self, element, Z_Ia, Z_II):
+        """Get the mass fraction of an element, Z_Ia f_Ia + Z_II f_II, and its
+        derivatives with respect to Z_Ia and Z_II."""
+        f_Ia = self.yields_Ia.mass_fraction(element, Z_Ia)
+        f_II = self.yields_II.mass_fraction(element, Z_II)
+        d_Ia = f_Ia + Z_Ia * self.yields_Ia.mass_fraction_derivative(element,
+                                                                     Z_Ia)
+        d_II = f_II + Z_II * self.yields_II.mass_fraction_derivative(element,
+                                                                     Z_II)
+        return Z_Ia * f_Ia + Z_II * f_II, np.stack([d_Ia, d_II], axis=1)
+
+    def _jacobian_rtype(self, values, jacobian):
+        """Like _rtype, but for the values and their derivatives."""
+        if len(values) == 1:
+            return float(values[0]), jacobian[0]
+        return values, jacobian
+
+    def z_on_h_jacobian(self, Z_Ia, Z_II):
+        """Calculate [Z/H] and its derivatives with respect to Z_Ia and Z_II.
+
+        These don't depend on the normalization of the yields, since only
+        the fraction of the metals in each element is used.
+
+        :param Z_Ia: metallicity from type Ia supernovae
+        :param Z_II: metallicity from type II supernovae
+        :returns: [Z/H], and the derivatives of it with respect to Z_Ia and
+                  Z_II, with shape (n, 2).
+        :rtype: float and an array of shape (2,) if a single metallicity is
+                passed, otherwise np.ndarray
+        """
+        Z_Ia, Z_II = self._err_checking_z(Z_Ia, Z_II)
+        Z_tot = Z_Ia + Z_II
+        with np.errstate(divide="ignore"):
+            values = self._z_on_h(Z_Ia, Z_II)
+            # d/dZ of log10(Z / (1 - Z)), which is the same for both types
+            derivative = (1 / Z_tot + 1 / (1 - Z_tot)) / np.log(10)
+        jacobian = np.stack([derivative, derivative], axis=1)
+        return self._jacobian_rtype(values, jacobian)
+
+    def x_on_h_jacobian(self, element, Z_Ia, Z_II):
+        """Calculate [X/H] and its derivatives with respect to Z_Ia and Z_II.
+
+        The metal fractions are linear in log(Z) between the metallicity
+        points of the models, so their derivatives are exact. Exactly at one
+        of the points, the slope of the segment above it is used. See
+        `z_on_h_jacobian` for the normalization.
+
+        :param element: Element to be used in place of X.
+        :type element: str
+        :param Z_Ia: metallicity from type Ia supernovae
+        :param Z_II: metallicity from type II supernovae
+        :returns: [X/H], and the derivatives of it with respect to Z_Ia and
+                  Z_II, with shape (n, 2).
+        :rtype: float and an array of shape (2,) if a single metallicity is
+                passed, otherwise np.ndarray
+        """
+        Z_Ia, Z_II = self._err_checking_z(Z_Ia, Z_II)
+        mass, d_mass = self._element_mass_jacobian(element, Z_Ia, Z_II)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            values = self._x_on_h(Z_Ia, Z_II, element)
+            # the hydrogen in the denominator goes down as Z goes up
+            jacobian = (d_mass / mass[:, np.newaxis] +
+                        1 / (1 - Z_Ia - Z_II)[:, np.newaxis]) / np.log(10)
+        return self._jacobian_rtype(values, jacobian)
+
+    def x_on_fe_jacobian(self, element, Z_Ia, Z_II):
+        """Calculate [X/Fe] and its derivatives with respect to Z_Ia and Z_II.
+        See `x_on_h_jacobian`.
+
+        :param element: Element to be used in place of X.
+        :type element: str
+        :param Z_Ia: metallicity from type Ia supernovae
+        :param Z_II: metallicity from type II supernovae
+        :returns: [X/Fe], and the derivatives of it with respect to Z_Ia and
+                  Z_II, with shape (n, 2).
+        :rtype: float and an array of shape (2,) if a single metallicity is
+                passed, otherwise np.ndarray
+        """
+        Z_Ia, Z_II = self._err_checking_z(Z_Ia, Z_II)
+        mass_x, d_mass_x = self._element_mass_jacobian(element, Z_Ia, Z_II)
+        mass_fe, d_mass_fe = self._element_mass_jacobian("Fe", Z_Ia, Z_II)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            values = self._x_on_fe(Z_Ia, Z_II, element)
+            jacobian = (d_mass_x / mass_x[:, np.newaxis] -
+                        d_mass_fe / mass_fe[:, np.newaxis]) / np.log(10)
+        return self._jacobian_rtype(values, jacobian)
+
+    def solve_metallicity(self, fe_on_h, x_on_fe, tolerance=1E-10,
+                          max_iterations=50):
+        """Find the metallicity from each type of supernova that gives some
+        observed abundances. This is the inverse of `x_on_h` and `x_on_fe`.
+
+        If the metal fractions f are held fixed, the mass in each element is
+        linear in Z_Ia and Z_II. Write q = Z_Ia / Z_tot for the fraction of
+        the metals from Type Ia supernovae. Each [X/Fe] then gives
+
+        .. math::
+            q (f_X^{Ia} - r_X f_{Fe}^{Ia}) +
+            (1 - q) (f_X^{II} - r_X f_{Fe}^{II}) = 0
+
+        where r_X is the observed X/Fe mass ratio, and [Fe/H] gives Z_tot
+        once q is known. With one [X/Fe] this has an exact solution. With
+        several it is solved by weighted least squares, with the weights
+        chosen so the residuals are roughly in dex. The metal fractions do
+        depend a little on the metallicity, so this is repeated with the
+        fractions at the new metallicities until nothing changes. All the
+        stars are done at once, and stars drop out of the iteration once they
+        have converged.
+
+        Ratios that no mix of the two types can reproduce end up with all
+        their metals from one type. These still converge, but have a large
+        residual.
+
+        :param fe_on_h: Observed [Fe/H]. This can be an array.
+        :param x_on_fe: Dictionary where the keys are elements and the values
+                        are the observed [X/Fe] of that element, like
+                        {"O": o_on_fe, "Mg": mg_on_fe}. The values must have
+                        the same shape as fe_on_h.
+        :type x_on_fe: dict
+        :param tolerance: Stop iterating when the fractional change in both
+                          metallicities is less than this.
+        :param max_iterations: Most times to update the metal fractions.
+        :returns: Z_Ia, Z_II, the root mean square difference in dex between
+                  the [X/Fe] of the solution and the observed values, and
+                  whether the iteration converged. Stars with observations
+                  that are not finite are NaN and not converged.
+        :rtype: floats if a single star is passed, otherwise np.ndarray
+        """
+        if len(x_on_fe) == 0:
+            raise ValueError("Need at least one [X/Fe] to solve with.")
+        if "Fe" in x_on_fe:
+            raise ValueError("[Fe/Fe] doesn't constrain anything.")
+        elements = list(x_on_fe.keys())
+        fe_on_h = np.atleast_1d(np.asarray(fe_on_h, dtype=np.float64))
+        observed = np.stack([np.atleast_1d(np.asarray(x_on_fe[elt],
+                                                      dtype=np.float64))
+                             for elt in elements], axis=1)
+        if observed.shape[0] != len(fe_on_h) or fe_on_h.ndim != 1:
+            raise ValueError("All arrays must be the same length. ")
+
+        # the observed mass ratios of each element to iron
+        sun_x = np.array([self.solar_metal_fractions[elt]
+                          for elt in elements])
+        sun_fe = self.solar_metal_fractions["Fe"]
+        ratios = 10**observed * sun_x / sun_fe
+        # and what [Fe/H] means for the mass of iron. If the iron fraction of
+        # the metals is D, the star has Z_tot * D / hydrogen(Z_tot) = g,
+        # where hydrogen(Z) = (1 - Z) / k
+        k = 1 + self.solar_metal_fractions["He"] / \
+            self.solar_metal_fractions["H"]
+        g = 10**fe_on_h * self.Z_sun * sun_fe / self.hydrogen(self.Z_sun)
+
+        n_stars = len(fe_on_h)
+        Z_Ia = np.full(n_stars, np.nan)
+        Z_II = np.full(n_stars, np.nan)
+        converged = np.zeros(n_stars, dtype=bool)
+        # start everyone at solar metallicity, split evenly
+        active = np.where(np.isfinite(fe_on_h) &
+                          np.all(np.isfinite(observed), axis=1))[0]
+        Z_Ia[active] = self.Z_sun / 2
+        Z_II[active] = self.Z_sun / 2
+        q = np.full(n_stars, 0.5)
+
+        for _ in range(max_iterations):
+            if len(active) == 0:
+                break
+            z_ia = Z_Ia[active]
+            z_ii = Z_II[active]
+            r = ratios[active]
+            f_Ia_x = np.stack([self.yields_Ia.mass_fraction(elt, z_ia)
+                               for elt in elements], axis=1)
+            f_II_x = np.stack([self.yields_II.mass_fraction(elt, z_ii)
+                               for elt in elements], axis=1)
+            f_Ia_fe = self.yields_Ia.mass_fraction("Fe", z_ia)[:, np.newaxis]
+            f_II_fe = self.yields_II.mass_fraction("Fe", z_ii)[:, np.newaxis]
+
+            # each element's equation is slope * q + intercept = 0. Dividing
+            # by the iron mass of the current solution times r turns these
+            # into fractional (so roughly logarithmic) residuals.
+            iron = q[active, np.newaxis] * f_Ia_fe + \
+                (1 - q[active, np.newaxis]) * f_II_fe
+            weight = 1 / (r * iron)**2
+            slope = (f_Ia_x - f_II_x) - r * (f_Ia_fe - f_II_fe)
+            intercept = f_II_x - r * f_II_fe
+            numerator = -np.sum(weight * slope * intercept, axis=1)
+            denominator = np.sum(weight * slope**2, axis=1)
+            # if the two types make the same ratios, any mix works
+            with np.errstate(divide="ignore", invalid="ignore"):
+                new_q = np.where(denominator > 0, numerator / denominator,
+                                 q[active])
+            new_q = np.clip(new_q, 0, 1)
+
+            iron = new_q * f_Ia_fe[:, 0] + (1 - new_q) * f_II_fe[:, 0]
+            Z_tot = g[active] / (iron * k + g[active])
+            new_Ia = new_q * Z_tot
+            new_II = (1 - new_q) * Z_tot
+
+            change = np.maximum(np.abs(new_Ia - z_ia), np.abs(new_II - z_ii))
+            done = change <= tolerance * Z_tot
+            q[active] = new_q
+            Z_Ia[active] = new_Ia
+            Z_II[active] = new_II
+            converged[active[done]] = True
+            active = active[~done]
+
+        # then see how well the solution matches
+        finite = np.isfinite(Z_Ia)
+        residual = np.full(n_stars, np.nan)
+        if np.any(finite):
+            predicted = np.stack([self._x_on_fe(Z_Ia[finite], Z_II[finite],
+                                                elt) for elt in elements],
+                                 axis=1)
+            residual[finite] = np.sqrt(np.mean((predicted -
+                                                observed[finite])**2, axis=1))
+
+        if n_stars == 1:
+            converged = bool(converged[0])
+        return self._rtype(Z_Ia), self._rtype(Z_II), \
+            self._rtype(residual), converged
+
+
+class ChannelAbundances(object):
+    """Abundances of objects enriched by any number of channels.
+
+    This is a generalization of `Abundances`, which only has Type Ia and
+    Type II supernovae. Here each channel (like Type Ia, Type II, or AGB) can
+    use any model set, and the metallicity of each object is given by a matrix
+    of shape (n_objects, n_channels), where each column is the metallicity
+    contributed by that channel.
+
+    The mass in a given element is the sum over channels of the metallicity
+    from that channel times the fraction of that channel's metals in that
+    element. The metal fractions are linear in log(Z) between the metallicity
+    points of each model, so this sum can be written as a single matrix
+    product between a matrix of interpolation weights (times the metallicity)
+    for all channels and the metal fraction tables of all channels stacked on
+    top of each other.
+    """
+    # how many objects to do at once. This limits the size of the temporary
+    # interpolation weight matrix.
+    _block_size = 65536
+
+    def __init__(self, models):
+        """Create the object.
+
+        :param models: Dictionary where the keys are the names of the channels
+                       and the values are the names of the model sets to use
+                       for that channel, like
+                       {"Ia": "iwamoto_99_Ia_W7",
+                       "II": "nomoto_06_II_imf_ave",
+                       "AGB": "nugrid_3"}
+                       The order of the channels here sets the order of the
+                       columns in the metallicity matrix.
+        :type models: dict
+        """
+        self.channels = list(models.keys())
+        self.models = dict(models)
+        self.yields = {channel: yields.Yields(model)
+                       for channel, model in self.models.items()}
+
+        # Store the log of the metallicity points for all channels in one
+        # array. The channels can have different numbers of points, so the
+        # empty spots are filled with infinity, which will never be below any
+        # metallicity we look up.
+        log_z_points = [yields.yields_base._metallicity_log(
+                            self.yields[channel].metallicity_points)
+                        for channel in self.channels]
+        self._n_points = np.array([len(log_z) for log_z in log_z_points])
+        self._log_z = np.full((len(self.channels), max(self._n_points)),
+                              np.inf)
+        for idx, log_z in enumerate(log_z_points):
+            self._log_z[idx, :len(log_z)] = log_z
+
+        # the stacked metal fraction tables for each set of elements we've
+        # been asked for
+        self._tables = dict()
+
+    def _err_checking_z(self, Z):
+        """Error checking on the metallicity matrix.
+
+        :returns: The metallicity as a 2D array, and whether the user passed
+                  in a single object.
+        """
+        Z = np.array(Z, dtype=np.float64)
+        single = Z.ndim == 1
+        Z = np.atleast_2d(Z)
+        if Z.ndim != 2 or Z.shape[1] != len(self.channels):
+            raise ValueError("Metallicity must have one column per channel.")
+
+        if np.any(Z < 0) or np.any(Z > 1):
+            raise ValueError("Metallicity must be between 0 and 1.")
+        Z_tot = np.sum(Z, axis=1)
+        if np.any(Z_tot > 1):
+            raise ValueError("Total metallicity can't be larger than one. ")
+
+        return Z, single
+
+    def _rtype(self, array, single):
+        """Return the values for one object if that's what we were given."""
+        if single:
+            array = array[0]
+            if np.ndim(array) == 0:
+                return float(array)
+        return array
+
+    def _metal_fraction_table(self, elements):
+        """Get the metal fraction tables for all channels stacked together.
+
+        :param elements: tuple of elements
+        :returns: Array of shape (n_channels * n_points, n_elements), where
+                  n_points is the largest number of metallicity points of any
+                  channel. Rows for points that a channel doesn't have are
+                  zero. Elements that a model doesn't have are also zero.
+        """
+        if elements not in self._tables:
+            n_points = self._log_z.shape[1]
+            table = np.zeros((len(self.channels), n_points, len(elements)))
+            for c_idx, channel in enumerate(self.channels):
+                yields_obj = self.yields[channel]
+                z_points = yields_obj.metallicity_points
+                for e_idx, elt in enumerate(elements):
+                    if elt in yields_obj.abundances:
+                        table[c_idx, :len(z_points), e_idx] = \
+                            yields_obj.mass_fraction(elt, z_points)
+            self._tables[elements] = table.reshape(-1, len(elements))
+        return self._tables[elements]
+
+    def _interpolation_weights(self, Z):
+        """Get the matrix that turns the stacked metal fraction tables into the
+        mass of each element.
+
+        :param Z: 2D array of metallicities, with one column per channel
+        :returns: Array of shape (n_objects, n_channels * n_points), holding
+                  the metallicity of each channel times the interpolation
+                  weight for each metallicity point.
+        """
+        n_objects, n_channels = Z.shape
+        n_points = self._log_z.shape[1]
+        log_z = yields.yields_base._metallicity_log(Z).reshape(Z.shape)
+
+        # find the metallicity point below each metallicity. Values outside
+        # the range of the models use the closest model, like the Yields
+        # interpolation does.
+        below = np.sum(self._log_z[np.newaxis, :, :] <= log_z[:, :, np.newaxis],
+                       axis=2) - 1
+        below = np.clip(below, 0, self._n_points - 2)
+        z_lo = np.take_along_axis(self._log_z[np.newaxis], below[:, :, None],
+                                  axis=2)[:, :, 0]
+        z_hi = np.take_along_axis(self._log_z[np.newaxis],
+                                  below[:, :, None] + 1, axis=2)[:, :, 0]
+        t = np.clip((log_z - z_lo) / (z_hi - z_lo), 0, 1)
+
+        weights = np.zeros((n_objects, n_channels, n_points))
+        objects = np.arange(n_objects)[:, np.newaxis]
+        channels = np.arange(n_channels)[np.newaxis, :]
+        weights[objects, channels, below] = Z * (1 - t)
+        weights[objects, channels, below + 1] = Z * t
+        return weights.reshape(n_objects, n_channels * n_points)
+
+    def _element_mass_fractions(self, elements, Z):
+        """Calculate the mass fraction of each element on a 2D array of
+        metallicities. See element_mass_fractions."""
+        table = self._metal_fraction_table(tuple(elements))
+        out = np.empty((len(Z), len(elements)))
+        # do things in blocks to keep the weight matrix small
+        for start in range(0, len(Z), self._block_size):
+            end = start + self._block_size
+            weights = self._interpolation_weights(Z[start:end])
+            out[start:end] = np.dot(weights, table)
+        return out
+
+    def element_mass_fractions(self, elements, Z):
+        """Calculate the mass fraction of the given elements.
+
+        .. math::
+            X = \\sum_c Z_c f_X^c(Z_c)
+
+        Where f is the fraction of the metals of channel c that are in
+        element X.
+
+        :param elements: Element or list of elements.
+        :param Z: Metallicity matrix with shape (n_objects, n_channels). A
+                  single object can be passed as a 1D array with one value per
+                  channel.
+        :returns: Mass fraction of each element.
+        :rtype: array of shape (n_objects, n_elements). If a single element is
+                passed the second dimension is removed, and if a single object
+                is passed the first is.
+        """
+        Z, single = self._err_checking_z(Z)
+        single_elt = isinstance(elements, str)
+        if single_elt:
+            elements = [elements]
+        values = self._element_mass_fractions(elements, Z)
+        if single_elt:
+            values = values[:, 0]
+        return self._rtype(values, single)
+
+    def z_on_h(self, Z):
+        """Calculate [Z/H]. See `Abundances.z_on_h`.
+
+        :param Z: Metallicity matrix with shape (n_objects, n_channels).
+        :returns: [Z/H]
+        :rtype: float if a single object is passed, otherwise np.ndarray
+        """
+        Z, single = self._err_checking_z(Z)
+        Z_tot = np.sum(Z, axis=1)
+
+        star_frac = Z_tot / Abundances.hydrogen(Z_tot)
+        sun_frac = Abundances.Z_sun / Abundances.hydrogen(Abundances.Z_sun)
+        with np.errstate(divide="ignore"):
+            return self._rtype(np.log10(star_frac / sun_frac), single)
+
+    def log_z_over_z_sun(self, Z):
+        """Returns the value of log(Z/Z_sun).
+
+        :param Z: Metallicity matrix with shape (n_objects, n_channels).
+        :returns: value of log(Z/Z_sun)
+        :rtype: float if a single object is passed, otherwise np.ndarray
+        """
+        Z, single = self._err_checking_z(Z)
+        Z_tot = np.sum(Z, axis=1)
+        with np.errstate(divide="ignore"):
+            return self._rtype(np.log10(Z_tot / Abundances.Z_sun), single)
+
+    def x_on_h(self, elements, Z):
+        """Calculate [X/H]. See `Abundances.x_on_h`.
+
+        :param elements: Element or list of elements to be used in place of X.
+        :param Z: Metallicity matrix with shape (n_objects, n_channels).
+        :returns: [X/H]
+        :rtype: array of shape (n_objects, n_elements). If a single element is
+                passed the second dimension is removed, and if a single object
+                is passed the first is.
+        """
+        Z, single = self._err_checking_z(Z)
+        single_elt = isinstance(elements, str)
+        if single_elt:
+            elements = [elements]
+
+        star_num = self._element_mass_fractions(elements, Z)
+        star_denom = Abundances.hydrogen(np.sum(Z, axis=1))
+        star_frac = star_num / star_denom[:, np.newaxis]
+
+        sun_num = Abundances.Z_sun * np.array(
+            [Abundances.solar_metal_fractions[elt] for elt in elements])
+        sun_frac = sun_num / Abundances.hydrogen(Abundances.Z_sun)
+
+        with np.errstate(divide="ignore"):
+            values = np.log10(star_frac / sun_frac)
+        if single_elt:
+            values = values[:, 0]
+        return self._rtype(values, single)
+
+    def x_on_fe(self, elements, Z):
+        """Calculate [X/Fe]. See `Abundances.x_on_fe`.
+
+        :param elements: Element or list of elements to be used in place of X.
+        :param Z: Metallicity matrix with shape (n_objects, n_channels).
+        :returns: [X/Fe]
+        :rtype: array of shape (n_objects, n_elements). If a single element is
+                passed the second dimension is removed, and if a single object
+                is passed the first is.
+        """
+        Z, single = self._err_checking_z(Z)
+        single_elt = isinstance(elements, str)
+        if single_elt:
+            elements = [elements]
+
+        # do iron at the same time as everything else
+        masses = self._element_mass_fractions(list(elements) + ["Fe"], Z)
+
+        sun_frac = np.array([Abundances.solar_metal_fractions[elt]
+                             for elt in elements])
+        sun_frac /= Abundances.solar_metal_fractions["Fe"]
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            star_frac = masses[:, :-1] / masses[:, -1:]
+            values = np.log10(star_frac / sun_frac)
+        if single_elt:
+            values = values[:, 0]
+        return self._rtype(values, single)
+
+
+class AbundanceLikelihood(object):
+    """Gaussian likelihood of an observed abundance pattern, for fitting Z_Ia
+    and Z_II with MCMC.
+
+    Everything that doesn't depend on the parameters is done once when the
+    object is created: the metal fractions of all the elements are tabulated
+    at the metallicity points of the models, and the observations are
+    checked and stored. Each evaluation then does the log(Z) interpolation
+    for all the elements at once with one lookup into those tables, and
+    handles a whole ensemble of walkers at once.
+    """
+    def __init__(self, abundances, elements, x_on_fe, x_on_fe_errors,
+                 fe_on_h=None, fe_on_h_error=None):
+        """Set up the likelihood.
+
+        :param abundances: Abundances object with the yields to use.
+        :param elements: List of elements that have observed [X/Fe].
+        :param x_on_fe: Observed [X/Fe] of each element. Elements that are
+                        NaN are left out of the likelihood.
+        :param x_on_fe_errors: Uncertainty on each [X/Fe]. This can also be
+                               a single value for all elements.
+        :param fe_on_h: Observed [Fe/H]. If this is None only the [X/Fe] are
+                        used, and the total metallicity is only constrained
+                        through the metallicity dependence of the yields.
+        :param fe_on_h_error: Uncertainty on [Fe/H].
+        """
+        self.abundances = abundances
+        self.elements = list(elements)
+        if "Fe" in self.elements:
+            raise ValueError("[Fe/Fe] doesn't constrain anything.")
+        observed = np.array(x_on_fe, dtype=np.float64, ndmin=1)
+        errors = np.array(np.broadcast_to(x_on_fe_errors, observed.shape),
+                          dtype=np.float64)
+        if observed.shape != (len(self.elements),):
+            raise ValueError("Need one [X/Fe] for each element.")
+        if fe_on_h is not None and fe_on_h_error is None:
+            raise ValueError("Need an uncertainty on [Fe/H].")
+
+        # missing observations are kept, but with no weight
+        used = np.isfinite(observed)
+        if np.any(~(errors[used] > 0)):
+            raise ValueError("Uncertainties must be positive.")
+        self._observed = np.where(used, observed, 0)
+        self._inverse_errors = np.where(used, 1 / np.where(used, errors, 1),
+                                        0)
+
+        self.fe_on_h = fe_on_h
+        self.fe_on_h_error = fe_on_h_error
+        # the normalization of the Gaussians
+        all_errors = list(errors[used])
+        if fe_on_h is not None:
+            all_errors.append(fe_on_h_error)
+        self._log_norm = -np.sum(np.log(np.sqrt(2 * np.pi) *
+                                        np.array(all_errors)))
+
+        # the metal fraction of each element at each metallicity point, with
+        # iron last
+        species = self.elements + ["Fe"]
+        self._tables = []
+        for yields_obj in [abundances.yields_Ia, abundances.yields_II]:
+            z_points = yields_obj.metallicity_points
+            table = np.zeros((len(z_points), len(species)))
+            for idx, elt in enumerate(species):
+                if elt in yields_obj.abundances:
+                    table[:, idx] = yields_obj.mass_fraction(elt, z_points)
+            self._tables.append(
+                (yields.yields_base._metallicity_log(z_points), table))
+
+        sun = abundances.solar_metal_fractions
+        self._solar_x_on_fe = np.log10(np.array([sun[elt] for elt in
+                                                 self.elements]) / sun["Fe"])
+        self._solar_fe_on_h = np.log10(abundances.Z_sun * sun["Fe"] /
+                                       abundances.hydrogen(abundances.Z_sun))
+
+    def _element_masses(self, Z_Ia, Z_II):
+        """Get the mass fraction of each element, with iron last, for 1D
+        arrays of metallicities."""
+        total = 0
+        for (log_z_points, table), Z in zip(self._tables, [Z_Ia, Z_II]):
+            idx, weight = yields.yields_base._log_z_weights(
+                log_z_points, yields.yields_base._metallicity_log(Z))
+            weight = weight[:, np.newaxis]
+            fractions = table[idx] * (1 - weight) + \
+                table[np.minimum(idx + 1, len(table) - 1)] * weight
+            total = total + Z[:, np.newaxis] * fractions
+        return total
+
+    def _parameters(self, params):
+        """Turn the parameters into flat arrays of Z_Ia and Z_II, along with
+        which ones are allowed. Ones that aren't are set to zero."""
+        params = np.asarray(params, dtype=np.float64)
+        if params.ndim == 0 or params.shape[-1] != 2:
+            raise ValueError("Parameters must be (Z_Ia, Z_II) pairs.")
+        flat = params.reshape(-1, 2)
+        allowed = np.all(flat >= 0, axis=1) & (np.sum(flat, axis=1) <= 1)
+        flat = np.where(allowed[:, np.newaxis], flat, 0)
+        return flat[:, 0], flat[:, 1], allowed, params.shape[:-1]
+
+    def predict(self, params):
+        """Get the predicted [X/Fe] of all the elements.
+
+        :param params: Array of (Z_Ia, Z_II), with shape (..., 2).
+        :returns: Array of shape (..., n_elements). Parameters outside the
+                  allowed range are NaN.
+        """
+        Z_Ia, Z_II, allowed, shape = self._parameters(params)
+        masses = self._element_masses(Z_Ia, Z_II)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            values = np.log10(masses[:, :-1] / masses[:, -1:]) - \
+                self._solar_x_on_fe
+        values[~allowed] = np.nan
+        return values.reshape(shape + (len(self.elements),))
+
+    def log_likelihood(self, params):
+        """Get the log of the likelihood of the observations.
+
+        :param params: Array of (Z_Ia, Z_II), with shape (..., 2). For an
+                       ensemble of walkers this is (n_walkers, 2).
+        :returns: Log likelihood with the shape of params without the last
+                  axis. Parameters outside the allowed range (negative
+                  metallicities, or a total of one or more) or that make no
+                  iron are -inf.
+        """
+        Z_Ia, Z_II, allowed, shape = self._parameters(params)
+        masses = self._element_masses(Z_Ia, Z_II)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            predicted = np.log10(masses[:, :-1] / masses[:, -1:]) - \
+                self._solar_x_on_fe
+            chi = (predicted - self._observed) * self._inverse_errors
+            # elements without observations have no weight, even if the
+            # prediction isn't finite
+            chi[:, self._inverse_errors == 0] = 0
+            chi_squared = np.sum(chi**2, axis=1)
+
+            if self.fe_on_h is not None:
+                Z_tot = Z_Ia + Z_II
+                fe_on_h = np.log10(masses[:, -1] /
+                                   self.abundances.hydrogen(Z_tot)) - \
+                    self._solar_fe_on_h
+                chi_squared += ((fe_on_h - self.fe_on_h) /
+                                self.fe_on_h_error)**2
+
+        values = np.where(allowed & np.isfinite(chi_squared),
+                          self._log_norm - 0.5 * chi_squared, -np.inf)
+        if len(shape) == 0:
+            return float(values[0])
+        return values.reshape(shape)
+
+    def __call__(self, params):
+        """Same as `log_likelihood`, so this object can be passed straight to
+        samplers."""
+        return self.log_likelihood(params)
@@ -0,0 +1,277 @@
+"""
+One-zone galactic chemical evolution.
+
+The gas in the zone is described by its total mass, its mass in metals, and
+the mass of each species we follow, all as NumPy arrays. The star formation
+history is given ahead of time, so the only thing that depends on the
+composition of the gas is the metallicity the yields are evaluated at. Each
+timestep then does one batched interpolation of the yield tables per
+channel for every history at once, rather than calling `set_metallicity`.
+
+Any of the parameters can have extra leading axes, which are broadcast
+together and run as a batch. For example, a star formation history of shape
+(10, n_times) and mass loading factors of shape (5, 1) run 50 models.
+
+Masses are in solar masses and times in Gyr.
+"""
+import numpy as np
+
+from .delay_times import PowerLawDTD, SingleDelayDTD, _check_times, \
+    convolve_history
+from .yields_base import Yields
+
+__all__ = ["primordial_composition", "GCEHistory", "OneZoneGCE"]
+
+# mass fractions of the gas that flows in, which hasn't been enriched
+primordial_composition = {"H_1": 0.75, "He_4": 0.25}
+
+class _Channel(object):
+    """One source of enrichment, like Type Ia supernovae."""
+    def __init__(self, name, model_set, number_per_mass, delay=None):
+        """
+        :param name: Name of the channel, like "Ia"
+        :param model_set: Name of the model set for `yields.Yields`
+        :param number_per_mass: Name of the argument to OneZoneGCE.run that
+                                gives the number of events per solar mass of
+                                stars formed.
+        :param delay: DelayTimeDistribution object, or None if the events
+                      happen as soon as the stars form.
+        """
+        self.name = name
+        self.model_set = model_set
+        self.yields = Yields(model_set)
+        self.number_per_mass = number_per_mass
+        self.delay = delay
+
+
+class GCEHistory(object):
+    """The result of a one-zone chemical evolution model.
+
+    The arrays have the batch shape first, then time, then (for the species
+    masses) the species.
+    """
+    def __init__(self, times, species, sfr, gas_mass, metal_mass,
+                 species_mass):
+        self.times = times
+        self.species = list(species)
+        self.sfr = sfr
+        self.gas_mass = gas_mass
+        self.metal_mass = metal_mass
+        self.species_mass = species_mass
+        with np.errstate(divide="ignore", invalid="ignore"):
+            self.metallicity = np.where(gas_mass > 0, metal_mass / gas_mass,
+                                        0)
+
+    def mass(self, species):
+        """Get the mass of one species in the gas.
+
+        :param species: Isotope (like "Fe_56") or element (like "Fe"). If an
+                        element wasn't followed directly, its isotopes are
+                        added up.
+        :returns: Array with the batch shape and time.
+        """
+        if species in self.species:
+            return self.species_mass[..., self.species.index(species)]
+        idxs = [idx for idx, name in enumerate(self.species)
+                if name.split("_")[0] == species]
+        if len(idxs) == 0:
+            raise ValueError("{} was not followed in this model."
+                             .format(species))
+        return np.sum(self.species_mass[..., idxs], axis=-1)
+
+    def mass_fraction(self, species):
+        """Get the mass fraction of one species in the gas. See `mass`."""
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(self.gas_mass > 0,
+                            self.mass(species) / self.gas_mass, 0)
+
+
+class OneZoneGCE(object):
+    """One-zone galactic chemical evolution with a given star formation
+    history.
+
+    Type II supernovae return their ejecta as soon as the stars form. Type Ia
+    supernovae follow a delay time distribution, and AGB stars return their
+    ejecta after a single delay time. The delayed rates are found for the
+    whole star formation history at once with
+    `delay_times.convolve_history`. The delayed channels use the yields at
+    the metallicity of the gas at the time they happen.
+
+    The timesteps are simple Euler steps, with the rates at the start of each
+    step. If the star formation history and outflows ask for more gas than
+    there is, they are limited to the gas there is in that step, and only
+    the stars that actually formed make supernovae and AGB stars later.
+    """
+    def __init__(self, II_type="nomoto_06_II_imf_ave",
+                 Ia_type="iwamoto_99_Ia_W7", AGB_type=None, species=None,
+                 Ia_dtd=None, AGB_delay=1.0):
+        """Create the model.
+
+        :param II_type: Model set for Type II supernovae. The IMF integrated
+                        models give the ejecta per solar mass of stars formed.
+        :param Ia_type: Model set for Type Ia supernovae.
+        :param AGB_type: Model set for AGB stars, like "nugrid_2". The
+                         default of None leaves them out.
+        :param species: List of isotopes and elements to follow. The default
+                        is all the isotopes in any of the models.
+        :param Ia_dtd: DelayTimeDistribution object for Type Ia supernovae.
+                       The default is a power law with slope -1.1 starting at
+                       150 Myr.
+        :param AGB_delay: Delay between star formation and the AGB ejecta, in
+                          Gyr.
+        """
+        if Ia_dtd is None:
+            Ia_dtd = PowerLawDTD()
+        self.channels = [_Channel("II", II_type, "n_II"),
+                         _Channel("Ia", Ia_type, "n_Ia", Ia_dtd)]
+        if AGB_type is not None:
+            self.channels.append(_Channel("AGB", AGB_type, "n_AGB",
+                                          SingleDelayDTD(AGB_delay)))
+
+        if species is None:
+            species = list(primordial_composition.keys())
+            for channel in self.channels:
+                for key in channel.yields._abundances_interp:
+                    if "_" in key and key not in species:
+                        species.append(key)
+        self.species = list(species)
+        self._primordial = np.array([primordial_composition.get(name, 0.0)
+                                     for name in self.species])
+
+    def run(self, times, sfr, inflow=0.0, mass_loading=0.0, initial_gas=0.0,
+            n_II=1.0, n_Ia=2.2E-3, n_AGB=0.05):
+        """Integrate the composition of the gas over time.
+
+        All the arguments other than the times can have extra leading axes,
+        which are broadcast together to run many models at once.
+
+        :param times: Evenly spaced times in Gyr, starting when star
+                      formation begins.
+        :param sfr: Star formation rate in solar masses per Gyr at each time.
+                    Time is the last axis.
+        :param inflow: Rate of primordial gas flowing in, in solar masses per
+                       Gyr. Either a number, or an array with time as the
+                       last axis.
+        :param mass_loading: Ratio of the outflow rate to the star formation
+                             rate. The outflow has the composition of the
+                             gas.
+        :param initial_gas: Mass of primordial gas at the first time.
+        :param n_II: Number of Type II supernovae per solar mass of stars
+                     formed. This is 1 for the IMF integrated models, since
+                     their yields are already per unit mass.
+        :param n_Ia: Number of Type Ia supernovae per solar mass of stars
+                     formed.
+        :param n_AGB: Number of AGB stars per solar mass of stars formed.
+        :returns: GCEHistory object holding the star formation rate that
+                  actually happened, the gas mass, metal mass, and mass of
+                  each species at each time.
+        """
+        dt = _check_times(times)
+        times = np.asarray(times, dtype=np.float64)
+        n_times = len(times)
+
+        sfr = np.asarray(sfr, dtype=np.float64)
+        inflow = np.asarray(inflow, dtype=np.float64)
+        if inflow.ndim == 0:
+            inflow = np.full(n_times, inflow)
+        if sfr.shape[-1:] != (n_times,) or inflow.shape[-1:] != (n_times,):
+            raise ValueError("sfr and inflow must have time as the last "
+                             "axis.")
+        if np.any(sfr < 0) or np.any(inflow < 0):
+            raise ValueError("Rates can't be negative.")
+        numbers = {"n_II": n_II, "n_Ia": n_Ia, "n_AGB": n_AGB}
+        scalars = [np.asarray(value, dtype=np.float64) for value in
+                   [mass_loading, initial_gas] + list(numbers.values())]
+
+        # flatten all the batch dimensions into one
+        batch_shape = np.broadcast_shapes(sfr.shape[:-1], inflow.shape[:-1],
+                                          *[value.shape for value in scalars])
+        n_batch = int(np.prod(batch_shape))
+
+        def flat(value, timed=False):
+            shape = batch_shape + ((n_times,) if timed else ())
+            return np.broadcast_to(value, shape).reshape(n_batch, *shape[len(
+                batch_shape):])
+
+        # this becomes the star formation that actually happened, which can
+        # be less than asked for if the gas runs out
+        sfr_flat = np.array(flat(sfr, True))
+        inflow_flat = flat(inflow, True)
+        mass_loading, initial_gas = [flat(value) for value in scalars[:2]]
+        numbers = {key: flat(value) for key, value
+                   in zip(numbers.keys(), scalars[2:])}
+
+        # The rate of events in each channel, per Gyr, and the fraction of
+        # the events from each timestep of star formation that happen in
+        # each later timestep.
+        rates = []
+        weights = []
+        for channel in self.channels:
+            number = numbers[channel.number_per_mass]
+            if channel.delay is None:
+                rates.append(number[:, np.newaxis] * sfr_flat)
+                weights.append(np.zeros(n_times))
+                weights[-1][0] = 1
+            else:
+                weights.append(channel.delay.weights(n_times, dt))
+                rates.append(number[:, np.newaxis] *
+                             convolve_history(sfr_flat, weights[-1]))
+
+        n_species = len(self.species)
+        gas = np.empty((n_batch, n_times))
+        metals = np.empty((n_batch, n_times))
+        masses = np.empty((n_batch, n_times, n_species))
+        gas[:, 0] = initial_gas
+        metals[:, 0] = 0
+        masses[:, 0] = initial_gas[:, np.newaxis] * self._primordial
+
+        for n in range(n_times - 1):
+            with np.errstate(divide="ignore", invalid="ignore"):
+                has_gas = gas[:, n] > 0
+                z = np.where(has_gas, metals[:, n] / gas[:, n], 0)
+                composition = np.where(has_gas[:, np.newaxis],
+                                       masses[:, n] / gas[:, n, np.newaxis],
+                                       0)
+            z = np.clip(z, 0, 1)
+
+            # star formation and outflows take gas with its composition,
+            # while the inflow is primordial. The star formation history is
+            # fixed, so it can ask for more gas than there is. Don't let it
+            # take more than there is when that happens, and take the events
+            # from the stars that didn't form out of the rates.
+            requested = (1 + mass_loading) * sfr_flat[:, n]
+            limited = requested > gas[:, n] / dt
+            removed = np.where(limited, gas[:, n] / dt, requested)
+            if np.any(limited):
+                formed = removed / (1 + mass_loading)
+                missing = np.where(limited, sfr_flat[:, n] - formed, 0)
+                sfr_flat[:, n] = np.where(limited, formed, sfr_flat[:, n])
+                for channel, rate, weight in zip(self.channels, rates,
+                                                 weights):
+                    number = numbers[channel.number_per_mass]
+                    rate[:, n:] -= (number * missing)[:, np.newaxis] * \
+                        weight[:n_times - n]
+                    # rounding can take the rates slightly below zero
+                    np.maximum(rate[:, n:], 0, out=rate[:, n:])
+            d_gas = inflow_flat[:, n] - removed
+            d_metals = -removed * z
+            d_masses = inflow_flat[:, n, np.newaxis] * self._primordial - \
+                removed[:, np.newaxis] * composition
+
+            for channel, rate in zip(self.channels, rates):
+                yields_obj = channel.yields
+                d_gas += rate[:, n] * yields_obj.ejecta_sum(metallicity=z)
+                d_metals += rate[:, n] * yields_obj.ejecta_sum(True,
+                                                               metallicity=z)
+                d_masses += rate[:, n, np.newaxis] * \
+                    yields_obj.yields_table(self.species, z)
+
+            gas[:, n + 1] = gas[:, n] + d_gas * dt
+            metals[:, n + 1] = metals[:, n] + d_metals * dt
+            masses[:, n + 1] = masses[:, n] + d_masses * dt
+
+        return GCEHistory(times, self.species,
+                          sfr_flat.reshape(batch_shape + (n_times,)),
+                          gas.reshape(batch_shape + (n_times,)),
+                          metals.reshape(batch_shape + (n_times,)),
+                          masses.reshape(batch_shape + (n_times, n_species)))
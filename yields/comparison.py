@@ -0,0 +1,142 @@
+"""
+Comparing many models at once.
+
+`compare_models` evaluates any selection of models at a common set of
+metallicities, and returns the yields (or mass fractions) of some species as
+one array with a model axis, a metallicity axis, and a species axis. Each
+model is loaded (from the binary bundle if it's there) and evaluated at all
+the metallicities in one go, without setting the metallicity of the Yields
+objects. The models can also be spread over a pool of worker processes.
+"""
+import fnmatch
+
+import numpy as np
+
+from .registry import available_models
+from .yields_base import Yields
+
+__all__ = ["ModelComparison", "compare_models"]
+
+# what compare_models can get for each model
+_quantities = ["yields", "metal_fraction", "mass_fraction"]
+
+
+def _expand_models(models):
+    """Turn a list of model names and patterns (like "nugrid_*") into a list
+    of model names, keeping the order and dropping duplicates."""
+    all_models = available_models()
+    if models is None:
+        return all_models
+    if isinstance(models, str):
+        models = [models]
+    expanded = []
+    for pattern in models:
+        matches = fnmatch.filter(all_models, pattern)
+        if len(matches) == 0:
+            raise ValueError("No models match {}.".format(pattern))
+        expanded += [model for model in matches if model not in expanded]
+    return expanded
+
+
+def _evaluate_model(task):
+    """Get the values for one model, as an array of shape
+    (n_metallicities, n_species). This runs in the worker processes."""
+    model_set, metallicities, species, quantity, use_bundle = task
+    yields_obj = Yields(model_set, use_bundle=use_bundle)
+    if quantity == "yields":
+        return yields_obj.yields_table(species, metallicities)
+
+    values = np.zeros((len(metallicities), len(species)))
+    for idx, name in enumerate(species):
+        if name in yields_obj._metal_fractions_log_z:
+            values[:, idx] = yields_obj.mass_fraction(
+                name, metallicities, metal_only=quantity == "metal_fraction")
+    return values
+
+
+class ModelComparison(object):
+    """Values of some species for many models at many metallicities."""
+    def __init__(self, models, metallicities, species, quantity, values):
+        """
+        :param models: List of the model names.
+        :param metallicities: Array of the metallicities.
+        :param species: List of the isotopes and elements.
+        :param quantity: What the values are. See `compare_models`.
+        :param values: Array of shape (n_models, n_metallicities, n_species).
+        """
+        self.models = list(models)
+        self.metallicities = np.asarray(metallicities)
+        self.species = list(species)
+        self.quantity = quantity
+        self.values = values
+
+    def select(self, models=None, species=None):
+        """Get the values of some of the models and species.
+
+        :param models: Name of a model, or list of names. The default of None
+                       keeps all the models.
+        :param species: Name of a species, or list of names. The default of
+                        None keeps all the species.
+        :returns: Array with a model axis, a metallicity axis, and a species
+                  axis. The model and species axes are removed if a single
+                  name (rather than a list) is given for them.
+        """
+        values = self.values
+        # the species are always last, even if the model axis is removed
+        for axis, names, labels in [(0, models, self.models),
+                                    (-1, species, self.species)]:
+            if names is None:
+                continue
+            try:
+                idx = labels.index(names) if isinstance(names, str) else \
+                    [labels.index(name) for name in names]
+            except ValueError:
+                raise ValueError("{} is not in this comparison."
+                                 .format(names))
+            values = np.take(values, idx, axis=axis)
+        return values
+
+
+def compare_models(metallicities, species, models=None, quantity="yields",
+                   workers=None, use_bundle=True):
+    """Get some species from many models at a common set of metallicities.
+
+    :param metallicities: Metallicities to evaluate all the models at.
+    :param species: List of isotopes (like "Fe_56") and elements (like "Fe").
+                    Ones that a model doesn't have are zero for that model.
+    :param models: List of model names, which can also be patterns like
+                   "iwamoto_99_Ia_*" or "nugrid_*". The default of None uses
+                   every model that's available.
+    :param quantity: What to get for each species. "yields" for the yields
+                     (in solar masses per supernova), "metal_fraction" for
+                     the fraction of the metals in each species, or
+                     "mass_fraction" for the fraction of all the ejecta.
+    :param workers: Number of worker processes to load and evaluate the
+                    models with. The default of None does everything in this
+                    process, which is fastest when the models are in the
+                    bundle.
+    :param use_bundle: Passed on to `Yields`.
+    :returns: ModelComparison object
+    """
+    if quantity not in _quantities:
+        raise ValueError("quantity must be one of {}.".format(_quantities))
+    metallicities = np.array(metallicities, dtype=np.float64, ndmin=1)
+    if metallicities.ndim != 1:
+        raise ValueError("Metallicities must be a 1D array.")
+    species = [species] if isinstance(species, str) else list(species)
+    models = _expand_models(models)
+
+    tasks = [(model_set, metallicities, species, quantity, use_bundle)
+             for model_set in models]
+    if workers is not None and workers > 1:
+        # multiprocessing takes a while to import, so only do it if needed
+        import multiprocessing
+
+        with multiprocessing.Pool(workers) as pool:
+            results = pool.map(_evaluate_model, tasks)
+    else:
+        results = [_evaluate_model(task) for task in tasks]
+
+    values = np.stack(results, axis=0) if results else \
+        np.zeros((0, len(metallicities), len(species)))
+    return ModelComparison(models, metallicities, species, quantity, values)
@@ -13,7 +13,6 @@
 '''
 
 
-import matplotlib.pyplot as plt
 import numpy as np
 import os
 
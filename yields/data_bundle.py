@@ -0,0 +1,300 @@
+"""
+All the bundled yield tables packed into one binary file.
+
+Loading a model from the ASCII data files means opening and parsing up to
+five files. The bundle holds the tables for every model in one file, which is
+memory mapped the first time it's needed. After that, loading a model just
+makes views into the mapped file, without opening or parsing anything.
+
+The bundle is built ahead of time from the ASCII files by running this module
+as a script::
+
+    python -m yields.data_bundle
+
+It records the data version of the data files it was made from, their sizes,
+and the version of the loaders that read them. The bundle is only used if the
+data version matches the one in the model catalogue, the data files still
+have the same sizes, and the loaders are the same, so if any of those change
+and the bundle isn't rebuilt, the models are read from the data files
+instead. These checks don't open any data files, which would defeat the point
+of the bundle.
+
+Since the tables are read-only views into the mapped file, every process
+using the same bundle shares one physical copy of them, whether the
+processes were forked or started separately. Each Yields object only holds
+the yields at its current metallicity. Other sets of models (like ones
+registered by other packages) can be put in their own bundles with
+`write_bundle` and used with `Yields(model_set, use_bundle=filename)`.
+"""
+import json
+import mmap
+import os
+import struct
+
+import numpy as np
+
+from . import registry
+from .model_catalogue import catalogue, current_data_version
+from .yields_base import Yields, _LogZInterpolator, _metallicity_log, \
+    loader_version
+
+__all__ = ["bundle_format_version", "bundle_file", "model_tables",
+           "write_bundle", "read_bundle", "get_bundle", "load_from_bundle"]
+
+# identifies the file format
+_bundle_magic = b"YLDBNDL1"
+bundle_format_version = 3
+bundle_file = "yields_bundle.bin"
+
+# all arrays start at a multiple of this many bytes from the start of the file
+_alignment = 64
+
+# the other dictionaries of the Yields objects that are keyed by metallicity.
+# These are stored as lists of (Z, value) pairs in the header.
+_z_dicts = ["mass_cuts", "total_end_ejecta", "wind_ejecta", "energy_erg"]
+
+# The tables stored for each model, and the dictionary of interpolation
+# objects in the Yields objects they come from. The yields are the isotopes
+# (and elements for models that have them) in the data files, while the
+# fractions include the summed elements too.
+_tables = [("yields", "_abundances_interp"),
+           ("metal_fractions", "_metal_fractions_log_z"),
+           ("mass_fractions", "_mass_fractions_log_z")]
+
+# The total ejecta and total metals are stored in one more table with these
+# rows. In the Yields objects they are keyed by the metal_only argument of
+# ejecta_sum.
+_ejecta_sum_rows = [("all", False), ("metals", True)]
+
+# The bundles that have been opened, keyed by filename. The values are tuples
+# of the header and the memory mapped file, or None if the bundle couldn't be
+# used.
+_bundles = dict()
+
+
+def _get_data_path(data_file):
+    """Returns the path of a file in the data directory."""
+    return os.path.join(os.path.dirname(__file__), "data", data_file)
+
+
+def _data_file_sizes():
+    """Get the size in bytes of every data file any model family uses. This
+    only looks at the directory entries, without opening the files."""
+    sizes = dict()
+    for family in registry.model_families():
+        for data_file in family.data_files:
+            sizes[data_file] = os.path.getsize(_get_data_path(data_file))
+    return sizes
+
+
+def _aligned(offset):
+    """Round an offset up to the next multiple of the alignment."""
+    return -(-offset // _alignment) * _alignment
+
+
+def model_tables(yields_obj):
+    """Get the yields and mass fractions of a model as tables.
+
+    :param yields_obj: Yields object.
+    :returns: Dictionary where the keys are the names of the tables
+              ("yields", "metal_fractions", and "mass_fractions") and the
+              values are tuples of the list of isotopes and a 2D array, where
+              the first axis is the isotopes and the second is the
+              metallicity points of the model. There is also an
+              "ejecta_sums" table with the total ejecta ("all") and total
+              metals ("metals"), which are created if the Yields object
+              doesn't have them yet.
+    """
+    log_z = _metallicity_log(yields_obj.metallicity_points)
+    tables = dict()
+    for name, attr in _tables:
+        interps = getattr(yields_obj, attr)
+        isotopes = list(interps.keys())
+        table = np.empty((len(isotopes), len(log_z)), dtype=np.float64)
+        for idx, isotope in enumerate(isotopes):
+            table[idx] = interps[isotope](log_z)
+        tables[name] = (isotopes, table)
+
+    if len(yields_obj._ejecta_sum_log_z) == 0:
+        yields_obj._create_ejecta_sums()
+    sums = np.array([yields_obj._ejecta_sum_log_z[metal_only](log_z)
+                     for _, metal_only in _ejecta_sum_rows])
+    tables["ejecta_sums"] = ([row for row, _ in _ejecta_sum_rows], sums)
+    return tables
+
+
+def write_bundle(filename=None, models=None):
+    """Pack the yields of many models into one binary file.
+
+    The layout is:
+
+    - 8 bytes: the characters "YLDBNDL1"
+    - uint32: format version
+    - uint32: unused, always zero
+    - uint64: length of the header in bytes
+    - the header, which is JSON text padded with spaces so the first array is
+      aligned. It holds the format version, the data version of the data
+      files, their sizes, the version of the loaders, and a dictionary of
+      the models. For each model it lists the metallicity points, the mass,
+      the other metallicity dependent quantities (like mass cuts), and for
+      each table (the "yields",
+      "metal_fractions", "mass_fractions" and "ejecta_sums") the isotopes
+      (or other rows) in it and its byte offset and shape.
+    - The tables, each as little endian float64 in C order, with the
+      isotopes along the first axis and the metallicity along the second.
+      Every table starts at a multiple of 64 bytes.
+
+    :param filename: Where to write the bundle. The default is the file in
+                     the data directory, which is what the Yields objects use.
+    :param models: List of models to include. The default is all registered
+                   models.
+    """
+    if filename is None:
+        filename = _get_data_path(bundle_file)
+    if models is None:
+        models = registry.available_models()
+
+    # first load everything from the original files
+    header_models = dict()
+    tables = []
+    offset = 0
+    for model in models:
+        yields_obj = Yields(model, use_bundle=False)
+        entry = {"metallicities": [float(z) for z in
+                                   yields_obj.metallicity_points],
+                 "mass": yields_obj.mass,
+                 "tables": dict()}
+        for name in _z_dicts:
+            entry[name] = [[float(z), float(value)] for z, value
+                           in getattr(yields_obj, name).items()]
+        for name, (isotopes, table) in model_tables(yields_obj).items():
+            entry["tables"][name] = {"isotopes": isotopes,
+                                     "offset": offset,
+                                     "shape": list(table.shape)}
+            tables.append(table)
+            offset = _aligned(offset + table.nbytes)
+        header_models[model] = entry
+
+    header = {"format_version": bundle_format_version,
+              "data_version": current_data_version(),
+              "file_sizes": _data_file_sizes(),
+              "loader_version": loader_version,
+              "models": header_models}
+    header_bytes = json.dumps(header, sort_keys=True).encode("utf-8")
+    # the offsets in the header are relative to the end of the header, which
+    # we pad so that the data starts aligned.
+    data_start = _aligned(len(_bundle_magic) + 16 + len(header_bytes))
+    header_bytes = header_bytes.ljust(data_start - len(_bundle_magic) - 16,
+                                      b" ")
+
+    with open(filename, "wb") as out_file:
+        out_file.write(_bundle_magic)
+        out_file.write(struct.pack("<IIQ", bundle_format_version, 0,
+                                   len(header_bytes)))
+        out_file.write(header_bytes)
+        for table in tables:
+            data = table.astype("<f8").tobytes()
+            out_file.write(data)
+            out_file.write(b"\0" * (_aligned(len(data)) - len(data)))
+
+
+def read_bundle(filename):
+    """Open a bundle and memory map it.
+
+    :param filename: Location of the bundle.
+    :returns: The header (a dictionary), and a buffer holding the tables.
+    """
+    with open(filename, "rb") as in_file:
+        if in_file.read(len(_bundle_magic)) != _bundle_magic:
+            raise ValueError("This is not a yields bundle.")
+        version, _, header_length = struct.unpack("<IIQ", in_file.read(16))
+        if version != bundle_format_version:
+            raise ValueError("This bundle has the wrong format version.")
+        header = json.loads(in_file.read(header_length).decode("utf-8"))
+        data_start = len(_bundle_magic) + 16 + header_length
+        # the map stays valid after the file is closed
+        mapped = mmap.mmap(in_file.fileno(), 0, access=mmap.ACCESS_READ)
+    return header, memoryview(mapped)[data_start:]
+
+
+def get_bundle(filename=None):
+    """Get a bundle, opening it if this is the first time it's needed.
+
+    :param filename: Location of the bundle. The default is the bundle in the
+                     data directory. That one is only used if it matches the
+                     model catalogue, the sizes of the data files, and the
+                     loaders we have now, but other bundles are always used
+                     as they are.
+    :returns: The header and data buffer (see `read_bundle`), or None if
+              there's no usable bundle.
+    """
+    if filename not in _bundles:
+        bundle = None
+        if filename is not None:
+            bundle = read_bundle(filename)
+        elif os.path.exists(_get_data_path(bundle_file)):
+            header, data = read_bundle(_get_data_path(bundle_file))
+            # Hashing the data files would mean reading all of them, so
+            # compare with the catalogue instead. The sizes catch most data
+            # files that changed without the catalogue being rebuilt.
+            if header["data_version"] == catalogue()["data_version"] and \
+                    header.get("loader_version") == loader_version and \
+                    header.get("file_sizes") == _data_file_sizes():
+                bundle = (header, data)
+        _bundles[filename] = bundle
+    return _bundles[filename]
+
+
+def _get_table(data, table_entry):
+    """Make the view of one table in the bundle."""
+    n_isotopes, n_z = table_entry["shape"]
+    return np.frombuffer(data, dtype="<f8", count=n_isotopes * n_z,
+                         offset=table_entry["offset"]).reshape(n_isotopes,
+                                                               n_z)
+
+
+def load_from_bundle(yields_obj, model_set, filename=None):
+    """Put the yields of a model into a Yields object, using a bundle.
+
+    The yields and mass fractions are read-only views into the memory mapped
+    bundle.
+
+    :param yields_obj: Yields object to fill.
+    :param model_set: Name of the model.
+    :param filename: Location of the bundle. The default is the bundle in the
+                     data directory.
+    :returns: Whether the model was found in the bundle. If not, nothing is
+              done to the Yields object.
+    :rtype: bool
+    """
+    bundle = get_bundle(filename)
+    if bundle is None:
+        return False
+    header, data = bundle
+    try:
+        entry = header["models"][model_set]
+    except KeyError:
+        return False
+
+    yields_obj.metallicity_points = entry["metallicities"]
+    yields_obj.mass = entry["mass"]
+    log_z = _metallicity_log(entry["metallicities"])
+    for name, attr in _tables:
+        interps = getattr(yields_obj, attr)
+        table_entry = entry["tables"][name]
+        table = _get_table(data, table_entry)
+        for idx, isotope in enumerate(table_entry["isotopes"]):
+            if yields_obj._wanted(isotope):
+                interps[isotope] = _LogZInterpolator(log_z, table[idx])
+    table = _get_table(data, entry["tables"]["ejecta_sums"])
+    for idx, (_, metal_only) in enumerate(_ejecta_sum_rows):
+        yields_obj._ejecta_sum_log_z[metal_only] = \
+            _LogZInterpolator(log_z, table[idx])
+    for name in _z_dicts:
+        getattr(yields_obj, name).update({z: value
+                                          for z, value in entry[name]})
+    return True
+
+
+if __name__ == "__main__":
+    write_bundle()
@@ -0,0 +1,226 @@
+"""
+Delay time distributions, and the rates of delayed events (like Type Ia
+supernovae) for star formation histories.
+
+The rate of events at time t is the star formation history convolved with the
+delay time distribution. On a grid of n times, doing the sum directly takes
+n^2 operations for each history, while doing it with FFTs takes n log(n).
+All the histories in a batch share the transform of the delay time
+distribution, so fitting thousands of histories only needs one of those.
+
+Times are in Gyr.
+"""
+import abc
+import math
+
+import numpy as np
+
+from .yields_base import Yields
+
+__all__ = ["DelayTimeDistribution", "PowerLawDTD", "ExponentialDTD",
+           "GaussianDTD", "SingleDelayDTD", "convolve_history", "event_rates",
+           "element_rates"]
+
+# age of the universe in Gyr, used as the end of the power law delay time
+# distribution
+_t_max = 13.8
+
+
+class DelayTimeDistribution(abc.ABC):
+    """Base class for the distribution of delay times between star formation
+    and some event.
+
+    Subclasses only need to define `cumulative`, the fraction of events that
+    have happened by some delay. The distribution is normalized so that this
+    goes to one.
+    """
+    @abc.abstractmethod
+    def cumulative(self, delay):
+        """Fraction of the events that have happened by some delay.
+
+        :param delay: Array of delays in Gyr.
+        :returns: Array of the same shape.
+        """
+
+    def weights(self, n_times, dt):
+        """Get the fraction of the events from the stars formed in one
+        timestep that happen in each later timestep.
+
+        This integrates the distribution over each timestep, so the events
+        are conserved no matter how coarse the grid is.
+
+        :param n_times: Number of timesteps.
+        :param dt: Length of the timesteps in Gyr.
+        :returns: Array where index j is the fraction of events that happen j
+                  timesteps after the stars form.
+        """
+        edges = np.arange(n_times + 1) * dt
+        return np.diff(self.cumulative(edges))
+
+
+class PowerLawDTD(DelayTimeDistribution):
+    """Power law delay time distribution, which starts at a minimum delay."""
+    def __init__(self, slope=-1.1, min_delay=0.15, max_delay=_t_max):
+        """
+        :param slope: Power law slope, so the rate goes as delay^slope.
+        :param min_delay: Delay before any events happen, in Gyr.
+        :param max_delay: Delay after which no events happen, in Gyr. The
+                          distribution is normalized over the delays between
+                          these two.
+        """
+        if not 0 < min_delay < max_delay:
+            raise ValueError("Need 0 < min_delay < max_delay.")
+        self.slope = slope
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+
+    def cumulative(self, delay):
+        delay = np.clip(delay, self.min_delay, self.max_delay)
+        if self.slope == -1:
+            return (np.log(delay / self.min_delay) /
+                    np.log(self.max_delay / self.min_delay))
+        power = self.slope + 1
+        return ((delay**power - self.min_delay**power) /
+                (self.max_delay**power - self.min_delay**power))
+
+
+class ExponentialDTD(DelayTimeDistribution):
+    """Exponentially declining delay time distribution, which starts at a
+    minimum delay."""
+    def __init__(self, timescale=1.5, min_delay=0.15):
+        """
+        :param timescale: e-folding time of the rate, in Gyr.
+        :param min_delay: Delay before any events happen, in Gyr.
+        """
+        if timescale <= 0 or min_delay < 0:
+            raise ValueError("The timescale must be positive and min_delay "
+                             "can't be negative.")
+        self.timescale = timescale
+        self.min_delay = min_delay
+
+    def cumulative(self, delay):
+        delay = np.maximum(delay - self.min_delay, 0)
+        return 1 - np.exp(-delay / self.timescale)
+
+
+class GaussianDTD(DelayTimeDistribution):
+    """Gaussian delay time distribution, cut off at zero delay."""
+    def __init__(self, mean=1.0, sigma=0.5):
+        """
+        :param mean: Center of the Gaussian, in Gyr.
+        :param sigma: Width of the Gaussian, in Gyr.
+        """
+        if sigma <= 0:
+            raise ValueError("sigma must be positive.")
+        self.mean = mean
+        self.sigma = sigma
+
+    def _normal_cumulative(self, delay):
+        # scipy takes a while to import, so only do it if this is used
+        from scipy.special import erf
+
+        scaled = (np.asarray(delay, dtype=np.float64) - self.mean) / \
+                 (self.sigma * math.sqrt(2))
+        return 0.5 * (1 + erf(scaled))
+
+    def cumulative(self, delay):
+        # no events can happen before the stars form, so we normalize what's
+        # left after zero delay
+        at_zero = self._normal_cumulative(0)
+        delay = np.maximum(delay, 0)
+        return (self._normal_cumulative(delay) - at_zero) / (1 - at_zero)
+
+
+class SingleDelayDTD(DelayTimeDistribution):
+    """All events happen at the same delay."""
+    def __init__(self, delay):
+        """
+        :param delay: The delay in Gyr.
+        """
+        self.delay = delay
+
+    def cumulative(self, delay):
+        return np.where(delay > self.delay, 1.0, 0.0)
+
+
+def _check_times(times):
+    """Get the timestep of an evenly spaced grid of times."""
+    times = np.asarray(times, dtype=np.float64)
+    if times.ndim != 1 or len(times) < 2:
+        raise ValueError("times must be a 1D array of at least two times.")
+    dt = times[1] - times[0]
+    if dt <= 0 or not np.allclose(np.diff(times), dt):
+        raise ValueError("times must be increasing and evenly spaced.")
+    return dt
+
+
+def convolve_history(sfr, weights):
+    """Convolve star formation histories with the binned delay times.
+
+    :param sfr: Star formation rates, with time along the last axis. Any
+                other axes are a batch of histories.
+    :param weights: Fraction of events that happen each number of timesteps
+                    after star formation, like from
+                    `DelayTimeDistribution.weights`.
+    :returns: The rate of events per unit of stars formed, with the same
+              shape as sfr.
+    """
+    sfr = np.asarray(sfr, dtype=np.float64)
+    n_times = sfr.shape[-1]
+    # pad to a power of two so that the circular convolution doesn't wrap
+    # around
+    n_fft = 2**int(np.ceil(np.log2(2 * n_times - 1)))
+    transform = np.fft.rfft(sfr, n_fft, axis=-1) * \
+        np.fft.rfft(weights[:n_times], n_fft)
+    rates = np.fft.irfft(transform, n_fft, axis=-1)[..., :n_times]
+    # the rates can't be negative, but rounding can make zeros slightly so
+    return np.maximum(rates, 0)
+
+
+def event_rates(times, sfr, dtd, number_per_mass=1.0):
+    """Get the rate of delayed events for star formation histories.
+
+    :param times: Evenly spaced times in Gyr.
+    :param sfr: Star formation rates in solar masses per Gyr, with time along
+                the last axis. Any other axes are a batch of histories.
+    :param dtd: DelayTimeDistribution object.
+    :param number_per_mass: Number of events per solar mass of stars formed.
+                            This can be an array that broadcasts with the
+                            batch axes of sfr.
+    :returns: Rate of events per Gyr, with the same shape as sfr.
+    """
+    dt = _check_times(times)
+    rates = convolve_history(sfr, dtd.weights(len(times), dt))
+    return np.asarray(number_per_mass)[..., np.newaxis] * rates
+
+
+def element_rates(times, sfr, elements, dtd=None, model_set="iwamoto_99_Ia_W7",
+                  number_per_mass=2.2E-3, metallicity=0):
+    """Get the rate at which Type Ia supernovae produce some elements.
+
+    :param times: Evenly spaced times in Gyr.
+    :param sfr: Star formation rates in solar masses per Gyr, with time along
+                the last axis. Any other axes are a batch of histories.
+    :param elements: List of elements (like "Fe") or isotopes (like "Fe_56").
+    :param dtd: DelayTimeDistribution object. The default is a power law with
+                slope -1.1 starting at 150 Myr.
+    :param model_set: Name of the Type Ia model, or a Yields object.
+    :param number_per_mass: Number of supernovae per solar mass of stars
+                            formed. This can be an array that broadcasts with
+                            the batch axes of sfr.
+    :param metallicity: Metallicity the yields are evaluated at. This can be
+                        an array that broadcasts with sfr, like the
+                        metallicity of the gas at each time.
+    :returns: Mass of each element made per Gyr, with the shape of sfr plus
+              one more axis for the elements.
+    """
+    if dtd is None:
+        dtd = PowerLawDTD()
+    if isinstance(model_set, Yields):
+        yields_obj = model_set
+    else:
+        yields_obj = Yields(model_set)
+    rates = event_rates(times, sfr, dtd, number_per_mass)
+    # mass of each element per supernova
+    ejecta = yields_obj.yields_table(elements, metallicity)
+    return rates[..., np.newaxis] * ejecta
@@ -0,0 +1,367 @@
+"""
+Ensembles of yields, for propagating the uncertainties in the yields.
+
+An ensemble holds K realizations of the yields of a model, as one array
+with the realizations along the first axis. The realizations can either be
+random perturbations of one model, with some fractional error on each
+isotope, or a list of different models. Every query is then done for all
+the realizations at once, and returns arrays with K along the first axis.
+
+Like `Yields`, the yields are linear in log(Z) between the metallicity
+points. An ensemble of different models uses all the metallicity points any
+of them have. Each model is also linear between these points, so nothing
+changes by doing this.
+"""
+import numpy as np
+
+from .abundances import Abundances
+from .yields_base import Yields, _log_z_weights, _metallicity_log
+
+__all__ = ["YieldsEnsemble", "AbundanceEnsemble"]
+
+
+def _as_yields(model_set):
+    """Get a Yields object, making one if we were given a name."""
+    if isinstance(model_set, Yields):
+        return model_set
+    return Yields(model_set)
+
+
+def _add_up_elements(values, species=None):
+    """Replace the elements in a dictionary of yields with the sum of their
+    isotopes, like `Yields._point_values` does. Elements without isotopes are
+    left alone."""
+    isotopes = dict()
+    for key, value in values.items():
+        if "_" not in key:
+            continue
+        element = key.split("_")[0]
+        if species is not None and element not in species:
+            continue
+        isotopes.setdefault(element, []).append(value)
+    for element, element_values in isotopes.items():
+        values[element] = np.sum(element_values, axis=0)
+    return values
+
+
+class YieldsEnsemble(object):
+    """Several realizations of the yields of a model."""
+    def __init__(self, values, metallicity_points, total_metals=None,
+                 fractions=None):
+        """Create the ensemble from the yields of each realization. Most of
+        the time `perturbed` or `from_models` is easier to use.
+
+        :param values: Dictionary where the keys are the isotopes and elements
+                       and the values are arrays of shape
+                       (n_realizations, n_points) holding the yields at each
+                       metallicity point.
+        :param metallicity_points: Increasing array of the metallicity points.
+        :param total_metals: If this is not None, the yields of each
+                             realization are normalized to have this total
+                             metal mass, like `Yields.normalize_metals`.
+        :param fractions: Dictionary with the keys True and False, holding
+                          dictionaries like values with the fraction of the
+                          metals (True) or of all the ejecta (False) in each
+                          species. The default of None gets these by dividing
+                          the yields by the totals at each point.
+        """
+        self.metallicity_points = np.array(metallicity_points,
+                                           dtype=np.float64)
+        self._log_z = _metallicity_log(self.metallicity_points)
+        self._values = {key: np.array(value, dtype=np.float64, ndmin=2)
+                        for key, value in values.items()}
+        shapes = set(value.shape for value in self._values.values())
+        if len(shapes) != 1 or \
+                list(shapes)[0][1] != len(self.metallicity_points):
+            raise ValueError("The yields of every species need the shape "
+                             "(n_realizations, n_points).")
+        self.n_realizations = list(shapes)[0][0]
+        self.total_metals = total_metals
+
+        self._totals = {metal_only: Yields._total(self._values, metal_only)
+                        for metal_only in [True, False]}
+        if fractions is None:
+            fractions = dict()
+            for metal_only, totals in self._totals.items():
+                with np.errstate(divide="ignore", invalid="ignore"):
+                    fractions[metal_only] = {
+                        key: np.where(totals > 0, value / totals, 0)
+                        for key, value in self._values.items()}
+        self._fractions = fractions
+        # the stacked tables of each set of species we've been asked for
+        self._tables = dict()
+
+    @classmethod
+    def perturbed(cls, model_set, n_realizations, errors, rng=None):
+        """Make an ensemble by randomly perturbing the yields of a model.
+
+        The yields of each isotope are multiplied by exp(sigma * epsilon),
+        where epsilon is drawn from a unit normal distribution separately for
+        each isotope and realization. For small errors sigma is the
+        fractional error. The same factor is used at all metallicities. The
+        elements are then the sums of their perturbed isotopes, so elements
+        with several isotopes end up with smaller errors.
+
+        :param model_set: Name of the model, or a Yields object.
+        :param n_realizations: Number of realizations to make.
+        :param errors: Fractional error on the yields. This is either one
+                       value for all the isotopes, or a dictionary where the
+                       keys are isotopes or elements and the values are their
+                       errors. An element in the dictionary sets the error
+                       of all its isotopes. Anything not in the dictionary
+                       is not perturbed.
+        :param rng: numpy.random.Generator, or a seed to make one with.
+        :returns: YieldsEnsemble object
+        """
+        if not isinstance(rng, np.random.Generator):
+            rng = np.random.default_rng(rng)
+        yields_obj = _as_yields(model_set)
+        log_z = _metallicity_log(yields_obj.metallicity_points)
+
+        values = dict()
+        for key, interp in yields_obj._abundances_interp.items():
+            if isinstance(errors, dict):
+                sigma = errors.get(key, errors.get(key.split("_")[0], 0))
+            else:
+                sigma = errors
+            if sigma < 0:
+                raise ValueError("Errors can't be negative.")
+            factors = np.exp(sigma * rng.standard_normal(n_realizations))
+            values[key] = factors[:, np.newaxis] * interp(log_z)
+
+        total_metals = yields_obj.total_metals \
+            if yields_obj.has_normalization else None
+        return cls(_add_up_elements(values, yields_obj.species),
+                   yields_obj.metallicity_points, total_metals)
+
+    @classmethod
+    def from_models(cls, model_sets):
+        """Make an ensemble where each realization is a different model, like
+        ["nomoto_06_II_imf_ave", "ww_95_imf_ave"]. Isotopes that some models
+        don't have are zero in those models.
+
+        :param model_sets: List of model names or Yields objects.
+        :returns: YieldsEnsemble object
+        """
+        models = [_as_yields(model_set) for model_set in model_sets]
+        if any(model.has_normalization for model in models):
+            raise ValueError("Models in an ensemble can't be normalized.")
+        metallicities = np.unique(np.concatenate(
+            [model.metallicity_points for model in models]))
+        log_z = _metallicity_log(metallicities)
+
+        species = set()
+        for model in models:
+            species.update(model._abundances_interp.keys())
+        values = {key: np.zeros((len(models), len(metallicities)))
+                  for key in species}
+        for idx, model in enumerate(models):
+            for key, interp in model._abundances_interp.items():
+                values[key][idx] = interp(log_z)
+        values = _add_up_elements(values)
+
+        # the fractions are linear in log(Z) between the points of each model,
+        # not the new ones, so they have to come from the models themselves
+        fractions = dict()
+        for metal_only in [True, False]:
+            fractions[metal_only] = {
+                key: np.zeros((len(models), len(metallicities)))
+                for key in values}
+            for idx, model in enumerate(models):
+                for key in values:
+                    if key in model.abundances:
+                        fractions[metal_only][key][idx] = \
+                            model.mass_fraction(key, metallicities,
+                                                metal_only)
+        return cls(values, metallicities, fractions=fractions)
+
+    def _table(self, species, kind):
+        """Get the yields (kind "yields"), fraction of the metals ("metals"),
+        or fraction of the ejecta ("ejecta") of some species at each
+        metallicity point, stacked into one array of shape
+        (n_realizations, n_points, n_species)."""
+        key = (tuple(species), kind)
+        if key not in self._tables:
+            zeros = np.zeros((self.n_realizations,
+                              len(self.metallicity_points)))
+            source = self._values if kind == "yields" else \
+                self._fractions[kind == "metals"]
+            self._tables[key] = np.stack([source.get(name, zeros)
+                                          for name in species], axis=2)
+        return self._tables[key]
+
+    def _interpolate(self, table, metallicity):
+        """Interpolate a table with realizations along the first axis and
+        metallicity points along the second to some metallicities.
+
+        There are only a few metallicity points, so this is done as a matrix
+        product between the interpolation weights of each metallicity and
+        the table, which handles all the realizations at once."""
+        log_z = _metallicity_log(metallicity).ravel()
+        idx, weight = _log_z_weights(self._log_z, log_z)
+        upper = np.minimum(idx + 1, len(self._log_z) - 1)
+        weights = np.zeros((len(log_z), len(self._log_z)))
+        rows = np.arange(len(log_z))
+        weights[rows, idx] = 1 - weight
+        # with a single point, upper is the same as idx
+        weights[rows, upper] += weight
+
+        if table.ndim == 2:
+            return np.dot(table, weights.T).reshape((len(table),) +
+                                                     metallicity.shape)
+        return np.matmul(weights, table).reshape(
+            (len(table),) + metallicity.shape + table.shape[2:])
+
+    def _normalization(self, metallicity):
+        """Get what the yields of each realization are multiplied by to get
+        the right total metals, or 1 if there is no normalization."""
+        if self.total_metals is None:
+            return 1
+        return self.total_metals / \
+            self._interpolate(self._totals[True], metallicity)
+
+    def yields_table(self, species, metallicity):
+        """Get the yields of many species at many metallicities, for all the
+        realizations.
+
+        :param species: List of isotopes (like "Fe_56") and elements (like
+                        "Fe"). Ones the models don't have are zero.
+        :param metallicity: Metallicity, which can be an array of any shape.
+        :returns: Array of shape (n_realizations,) + metallicity.shape +
+                  (n_species,).
+        """
+        metallicity = np.asarray(metallicity, dtype=np.float64)
+        values = self._interpolate(self._table(species, "yields"),
+                                   metallicity)
+        return values * np.expand_dims(self._normalization(metallicity), -1)
+
+    def ejecta_sum(self, metallicity, metal_only=False):
+        """Get the total mass ejected.
+
+        :param metallicity: Metallicity, which can be an array of any shape.
+        :param metal_only: Whether to only include metals, or everything.
+        :returns: Array of shape (n_realizations,) + metallicity.shape.
+        """
+        metallicity = np.asarray(metallicity, dtype=np.float64)
+        return self._interpolate(self._totals[metal_only], metallicity) * \
+            self._normalization(metallicity)
+
+    def mass_fraction(self, species, metallicity, metal_only=True):
+        """Get the fraction of the metals (or of all the ejecta) in some
+        species.
+
+        :param species: List of isotopes and elements.
+        :param metallicity: Metallicity, which can be an array of any shape.
+        :param metal_only: Whether to get the fraction of the metals, or of
+                           everything.
+        :returns: Array of shape (n_realizations,) + metallicity.shape +
+                  (n_species,).
+        """
+        metallicity = np.asarray(metallicity, dtype=np.float64)
+        kind = "metals" if metal_only else "ejecta"
+        return self._interpolate(self._table(species, kind), metallicity)
+
+
+class AbundanceEnsemble(object):
+    """Abundances calculated with ensembles of Type Ia and Type II yields.
+    This works like `Abundances`, but each result has the realizations along
+    the first axis."""
+    def __init__(self, Ia, II):
+        """
+        :param Ia: YieldsEnsemble for Type Ia supernovae.
+        :param II: YieldsEnsemble for Type II supernovae. If one of the
+                   ensembles has a single realization, it is used with all
+                   the realizations of the other one.
+        """
+        if Ia.n_realizations > 1 and II.n_realizations > 1 and \
+                Ia.n_realizations != II.n_realizations:
+            raise ValueError("Both ensembles need the same number of "
+                             "realizations.")
+        self.Ia = Ia
+        self.II = II
+        self.n_realizations = max(Ia.n_realizations, II.n_realizations)
+
+    @classmethod
+    def perturbed(cls, abundances, n_realizations, Ia_errors=0.0,
+                  II_errors=0.0, rng=None):
+        """Perturb the yields of an Abundances object. See
+        `YieldsEnsemble.perturbed` for the errors.
+
+        :param abundances: Abundances object to perturb.
+        :param n_realizations: Number of realizations to make.
+        :param Ia_errors: Errors on the Type Ia yields.
+        :param II_errors: Errors on the Type II yields.
+        :param rng: numpy.random.Generator, or a seed to make one with.
+        :returns: AbundanceEnsemble object
+        """
+        if not isinstance(rng, np.random.Generator):
+            rng = np.random.default_rng(rng)
+        return cls(YieldsEnsemble.perturbed(abundances.yields_Ia,
+                                            n_realizations, Ia_errors, rng),
+                   YieldsEnsemble.perturbed(abundances.yields_II,
+                                            n_realizations, II_errors, rng))
+
+    def _err_checking_z(self, Z_Ia, Z_II):
+        """Error checking on the metallicities, which are broadcast together.
+        """
+        Z_Ia, Z_II = np.broadcast_arrays(np.asarray(Z_Ia, dtype=np.float64),
+                                         np.asarray(Z_II, dtype=np.float64))
+        for z_type in [Z_Ia, Z_II]:
+            if np.any(z_type < 0) or np.any(z_type > 1):
+                raise ValueError("Metallicity must be between 0 and 1.")
+        if np.any(Z_Ia + Z_II > 1):
+            raise ValueError("Total metallicity can't be larger than one. ")
+        return Z_Ia, Z_II
+
+    def _element_masses(self, elements, Z_Ia, Z_II):
+        """Get the mass fraction of some elements in each realization, with
+        shape (n_realizations,) + Z.shape + (n_elements,)."""
+        f_Ia = self.Ia.mass_fraction(elements, Z_Ia)
+        f_II = self.II.mass_fraction(elements, Z_II)
+        return Z_Ia[..., np.newaxis] * f_Ia + Z_II[..., np.newaxis] * f_II
+
+    def x_on_h(self, elements, Z_Ia, Z_II):
+        """Calculate [X/H]. See `Abundances.x_on_h`.
+
+        :param elements: Element or list of elements to be used in place of X.
+        :param Z_Ia: metallicity from type Ia supernovae
+        :param Z_II: metallicity from type II supernovae
+        :returns: Array of shape (n_realizations,) + Z.shape + (n_elements,).
+                  If a single element is passed, the last axis is removed.
+        """
+        Z_Ia, Z_II = self._err_checking_z(Z_Ia, Z_II)
+        single_elt = isinstance(elements, str)
+        if single_elt:
+            elements = [elements]
+
+        star_frac = self._element_masses(elements, Z_Ia, Z_II) / \
+            Abundances.hydrogen(Z_Ia + Z_II)[..., np.newaxis]
+        sun_frac = Abundances.Z_sun * np.array(
+            [Abundances.solar_metal_fractions[elt] for elt in elements]) / \
+            Abundances.hydrogen(Abundances.Z_sun)
+        with np.errstate(divide="ignore"):
+            values = np.log10(star_frac / sun_frac)
+        return values[..., 0] if single_elt else values
+
+    def x_on_fe(self, elements, Z_Ia, Z_II):
+        """Calculate [X/Fe]. See `Abundances.x_on_fe`.
+
+        :param elements: Element or list of elements to be used in place of X.
+        :param Z_Ia: metallicity from type Ia supernovae
+        :param Z_II: metallicity from type II supernovae
+        :returns: Array of shape (n_realizations,) + Z.shape + (n_elements,).
+                  If a single element is passed, the last axis is removed.
+        """
+        Z_Ia, Z_II = self._err_checking_z(Z_Ia, Z_II)
+        single_elt = isinstance(elements, str)
+        if single_elt:
+            elements = [elements]
+
+        # do iron at the same time as everything else
+        masses = self._element_masses(list(elements) + ["Fe"], Z_Ia, Z_II)
+        sun_frac = np.array([Abundances.solar_metal_fractions[elt]
+                             for elt in elements]) / \
+            Abundances.solar_metal_fractions["Fe"]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            values = np.log10(masses[..., :-1] / masses[..., -1:] / sun_frac)
+        return values[..., 0] if single_elt else values
@@ -0,0 +1,156 @@
+"""
+Mass and elements returned by star particles in simulations.
+
+Each star particle is a simple stellar population with some initial mass,
+age, and metallicity. The mass it returns between two ages is the IMF
+weighted ejecta of the stars whose lifetimes end between those ages, plus
+the Type Ia supernovae in that time.
+
+The IMF weighted ejecta of all the stars above each mass are tabulated once,
+on a fine grid of masses and at the metallicity points of the individual
+models (see `ssp`). The yields are linear in log(Z) between those points, so
+interpolating the table in log(Z) is exact. Each particle then only needs its
+turnoff masses from `lifetimes.turnoff_mass` and a few lookups into the
+table, all of which are done on whole arrays of particles at once.
+
+Masses are in solar masses and times in Gyr.
+"""
+import numpy as np
+
+from .delay_times import PowerLawDTD
+from .imf import KroupaIMF
+from .lifetimes import turnoff_mass
+from .ssp import _cumulative_ejecta, _default_AGB_models, \
+    _default_II_models, _ejecta_above, _metallicity_points
+from .yields_base import Yields, _log_z_weights, _metallicity_log
+
+__all__ = ["ParticleFeedback"]
+
+
+class ParticleFeedback(object):
+    """Ejecta of star particles between two ages."""
+    # how many particles to do at once. This limits the size of the temporary
+    # arrays.
+    _block_size = 65536
+
+    def __init__(self, elements, II_models=None, AGB_models=None,
+                 Ia_type="iwamoto_99_Ia_W7", imf=None, Ia_dtd=None,
+                 n_Ia=2.2E-3, transition_mass=8.0):
+        """Tabulate the ejecta of the stellar populations.
+
+        :param elements: Elements (like "Fe") or isotopes (like "Fe_56") to
+                         find the ejecta of.
+        :param II_models: List of individual massive star models, which are
+                          used from the transition mass to the top of the
+                          IMF. The default is the Nomoto 2006 models without
+                          hypernovae.
+        :param AGB_models: List of individual AGB models, which are used from
+                           the bottom of the IMF to the transition mass. The
+                           default is the NuGrid models below the transition
+                           mass.
+        :param Ia_type: Model set for Type Ia supernovae.
+        :param imf: IMF object. The default is `imf.KroupaIMF()`.
+        :param Ia_dtd: DelayTimeDistribution object for Type Ia supernovae.
+                       The default is a power law with slope -1.1 starting at
+                       150 Myr.
+        :param n_Ia: Number of Type Ia supernovae per solar mass formed.
+        :param transition_mass: Mass separating AGB stars from massive stars.
+        """
+        if imf is None:
+            imf = KroupaIMF()
+        if Ia_dtd is None:
+            Ia_dtd = PowerLawDTD()
+        if II_models is None:
+            II_models = _default_II_models()
+        if AGB_models is None:
+            AGB_models = _default_AGB_models(transition_mass)
+        self.elements = list(elements)
+        self.Ia_dtd = Ia_dtd
+        self.n_Ia = n_Ia
+        self._quantities = ["total"] + self.elements
+
+        # tabulate at all the metallicity points any of the models have
+        self.metallicities = _metallicity_points(list(II_models) +
+                                                 list(AGB_models))
+        self._log_z = _metallicity_log(self.metallicities)
+
+        self._tables = [_cumulative_ejecta(models, self._quantities,
+                                           self.metallicities, imf, low, high)
+                        for models, low, high in
+                        [(II_models, transition_mass, imf.max_mass),
+                         (AGB_models, imf.min_mass, transition_mass)]]
+        self._ia = Yields(Ia_type)
+
+    def _returned_by(self, age, metallicity, z_idx, z_weight):
+        """Ejecta of the stars that have died by some age, per solar mass
+        formed, for one block of particles."""
+        turnoff = turnoff_mass(age, metallicity)
+        # the tables are linear in log(Z) between the metallicities, so we
+        # interpolate between the two on either side of each particle
+        total = 0
+        for fine, above in self._tables:
+            total = total + _ejecta_above(fine, above, turnoff, z_idx,
+                                          z_weight)
+        return total
+
+    def _evaluate(self, masses, metallicities, age_start, age_end):
+        """Get the total ejecta and the ejecta of each element, as one array
+        with the total in the first column."""
+        masses, metallicities, age_start, age_end = [
+            np.ravel(array) for array in np.broadcast_arrays(
+                np.asarray(masses, dtype=np.float64),
+                np.asarray(metallicities, dtype=np.float64),
+                np.asarray(age_start, dtype=np.float64),
+                np.asarray(age_end, dtype=np.float64))]
+        if np.any(masses < 0):
+            raise ValueError("Particle masses can't be negative.")
+        if np.any(metallicities < 0) or np.any(metallicities > 1):
+            raise ValueError("Metallicity must be between zero and one.")
+        if np.any(age_start < 0) or np.any(age_end < age_start):
+            raise ValueError("Need 0 <= age_start <= age_end.")
+
+        n_particles = len(masses)
+        result = np.empty((n_particles, len(self._quantities)))
+        for start in range(0, n_particles, self._block_size):
+            block = slice(start, start + self._block_size)
+            z = metallicities[block]
+            log_z = _metallicity_log(z)
+            z_idx, z_weight = _log_z_weights(self._log_z, log_z)
+
+            ejecta = self._returned_by(age_end[block], z, z_idx, z_weight) - \
+                self._returned_by(age_start[block], z, z_idx, z_weight)
+
+            # then the Type Ia supernovae
+            n_sn = self.n_Ia * (self.Ia_dtd.cumulative(age_end[block]) -
+                                self.Ia_dtd.cumulative(age_start[block]))
+            ejecta[:, 0] += n_sn * self._ia.ejecta_sum(metallicity=z)
+            ejecta[:, 1:] += n_sn[:, np.newaxis] * \
+                self._ia.yields_table(self.elements, z)
+
+            result[block] = masses[block, np.newaxis] * ejecta
+        return result
+
+    def ejecta(self, masses, metallicities, age_start, age_end):
+        """Get the mass of each element returned by star particles between two
+        ages.
+
+        All the arguments can be arrays, which are broadcast together and
+        flattened.
+
+        :param masses: Initial masses of the particles, in solar masses.
+        :param metallicities: Metallicities of the particles.
+        :param age_start: Age of the particles at the start of the interval,
+                          in Gyr.
+        :param age_end: Age of the particles at the end of the interval.
+        :returns: Array of shape (n_particles, n_elements).
+        """
+        return self._evaluate(masses, metallicities, age_start, age_end)[:, 1:]
+
+    def total_ejecta(self, masses, metallicities, age_start, age_end):
+        """Get the total mass returned by star particles between two ages.
+
+        See `ejecta` for the arguments.
+
+        :returns: Array of shape (n_particles,).
+        """
+        return self._evaluate(masses, metallicities, age_start, age_end)[:, 0]
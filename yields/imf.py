@@ -0,0 +1,142 @@
+"""
+The initial mass function (IMF) of stars.
+
+The IMF is normalized so that one solar mass of stars is formed, so the
+number of stars it gives is the number per solar mass formed. This is the
+same normalization as the IMF integrated yields in the package, which use
+the Kroupa IMF from 0.07 to 50 solar masses.
+"""
+import numpy as np
+
+__all__ = ["KroupaIMF"]
+
+
+def _power_integral(low, high, power):
+    """Integral of m^power from low to high, for arrays of limits."""
+    if power == -1:
+        return np.log(high / low)
+    return (high**(power + 1) - low**(power + 1)) / (power + 1)
+
+
+class KroupaIMF(object):
+    """Broken power law IMF from Kroupa (2001), where
+    dN/dm is proportional to m^-low_slope below break_mass and m^-high_slope
+    above it."""
+    def __init__(self, min_mass=0.07, max_mass=50, break_mass=0.5,
+                 low_slope=1.3, high_slope=2.3):
+        """
+        :param min_mass: Lowest stellar mass, in solar masses.
+        :param max_mass: Highest stellar mass, in solar masses.
+        :param break_mass: Mass where the slope changes.
+        :param low_slope: Slope below the break. This is positive, like the
+                          usual Salpeter slope of 2.35.
+        :param high_slope: Slope above the break.
+        """
+        if not 0 < min_mass < max_mass:
+            raise ValueError("Need 0 < min_mass < max_mass.")
+        self.min_mass = min_mass
+        self.max_mass = max_mass
+        self.break_mass = break_mass
+
+        # each segment is (low mass, high mass, slope, coefficient), with the
+        # coefficients chosen so the IMF is continuous at the break
+        low_coefficient = 1.0
+        high_coefficient = break_mass**(high_slope - low_slope)
+        segments = [(min_mass, min(break_mass, max_mass), low_slope,
+                     low_coefficient),
+                    (max(break_mass, min_mass), max_mass, high_slope,
+                     high_coefficient)]
+        self._segments = [segment for segment in segments
+                          if segment[0] < segment[1]]
+
+        # then normalize to one solar mass
+        total = self._integral(min_mass, max_mass, 1)
+        self._segments = [(low, high, slope, coefficient / total)
+                          for low, high, slope, coefficient in self._segments]
+
+    def _integral(self, low, high, moment):
+        """Integral of m^moment dN/dm between two masses, which can be
+        arrays."""
+        low = np.asarray(low, dtype=np.float64)
+        high = np.asarray(high, dtype=np.float64)
+        total = 0
+        for seg_low, seg_high, slope, coefficient in self._segments:
+            lo = np.clip(low, seg_low, seg_high)
+            hi = np.clip(high, seg_low, seg_high)
+            total = total + coefficient * _power_integral(lo, hi,
+                                                          moment - slope)
+        return total
+
+    def number(self, mass):
+        """Get dN/dm, the number of stars per unit mass per solar mass of
+        stars formed.
+
+        :param mass: Stellar mass, which can be an array.
+        :returns: dN/dm, which is zero outside the mass range.
+        """
+        mass = np.asarray(mass, dtype=np.float64)
+        result = np.zeros(mass.shape)
+        for seg_low, seg_high, slope, coefficient in self._segments:
+            in_segment = (mass >= seg_low) & (mass <= seg_high)
+            result = np.where(in_segment, coefficient * mass**-slope, result)
+        return result
+
+    def number_between(self, low, high):
+        """Get the number of stars between two masses, per solar mass of stars
+        formed.
+
+        :param low: Lower mass, which can be an array.
+        :param high: Upper mass, which can be an array.
+        """
+        return self._integral(low, high, 0)
+
+    def mass_between(self, low, high):
+        """Get the fraction of the mass formed in stars between two masses.
+
+        :param low: Lower mass, which can be an array.
+        :param high: Upper mass, which can be an array.
+        """
+        return self._integral(low, high, 1)
+
+    def sample(self, n_stars, rng, min_mass=None, max_mass=None):
+        """Draw stellar masses from the IMF.
+
+        Each segment of the power law can be inverted exactly, so this first
+        picks the segment of each star by the number of stars in it, then
+        inverts the power law in that segment.
+
+        :param n_stars: Number of stars to draw.
+        :param rng: numpy.random.Generator to draw with.
+        :param min_mass: Only draw stars above this mass. The default is the
+                         bottom of the IMF.
+        :param max_mass: Only draw stars below this mass. The default is the
+                         top of the IMF.
+        :returns: Array of stellar masses.
+        """
+        low = self.min_mass if min_mass is None else max(min_mass,
+                                                         self.min_mass)
+        high = self.max_mass if max_mass is None else min(max_mass,
+                                                          self.max_mass)
+        if not low < high:
+            raise ValueError("There are no stars in this mass range.")
+
+        limits = [(max(seg_low, low), min(seg_high, high), slope)
+                  for seg_low, seg_high, slope, _ in self._segments
+                  if max(seg_low, low) < min(seg_high, high)]
+        numbers = np.array([self.number_between(seg_low, seg_high)
+                            for seg_low, seg_high, _ in limits])
+        segment = np.searchsorted(np.cumsum(numbers) / np.sum(numbers),
+                                  rng.random(n_stars), side="right")
+        segment = np.minimum(segment, len(limits) - 1)
+
+        uniform = rng.random(n_stars)
+        masses = np.empty(n_stars)
+        for idx, (seg_low, seg_high, slope) in enumerate(limits):
+            this = segment == idx
+            if slope == 1:
+                masses[this] = seg_low * (seg_high / seg_low)**uniform[this]
+            else:
+                power = 1 - slope
+                masses[this] = (seg_low**power + uniform[this] *
+                                (seg_high**power - seg_low**power))**(1 / power)
+        return masses
@@ -0,0 +1,131 @@
+"""
+Lifetimes of stars, from the NuGrid stellar models.
+
+The NuGrid yield tables list the lifetime of each model, for 12 masses from 1
+to 25 solar masses at 5 metallicities. We interpolate linearly in log(mass)
+and log(lifetime), and in log(Z) between the metallicities. Outside the range
+of masses the relation is extended as a power law through the two nearest
+models, while outside the range of metallicities we use the nearest one.
+
+Times are in Gyr.
+"""
+import numpy as np
+
+from .loaders import _get_data_path, nugrid_agb
+from .yields_base import _log_z_weights, _metallicity_log
+
+__all__ = ["lifetime", "turnoff_mass"]
+
+# the table of lifetimes, once it's been read
+_lifetimes = None
+
+
+def _read_lifetimes():
+    """Read the lifetimes out of the NuGrid yield table.
+
+    Each model in the file has a header with lines like
+    "H Table: (M=1.0,Z=0.02)" and "H Lifetime: 1.215E+10", so we only need to
+    look at those, rather than use the NuGrid reader.
+
+    :returns: Array of the log of the masses, array of the log of the
+              metallicities, and array of the log of the lifetimes in Gyr,
+              with shape (metallicity, mass).
+    """
+    global _lifetimes
+    if _lifetimes is not None:
+        return _lifetimes
+
+    lifetimes = dict()
+    with open(_get_data_path(nugrid_agb), "r") as in_file:
+        for line in in_file:
+            if line.startswith("H Table:"):
+                mass_part, z_part = line.split("(")[1].split(")")[0].split(",")
+                model = (float(mass_part[2:]), float(z_part[2:]))
+            elif line.startswith("H Lifetime:"):
+                # the file has years
+                lifetimes[model] = float(line.split(":")[1]) / 1E9
+
+    masses = sorted(set(mass for mass, _ in lifetimes))
+    metallicities = sorted(set(z for _, z in lifetimes))
+    table = np.array([[lifetimes[(mass, z)] for mass in masses]
+                      for z in metallicities])
+    _lifetimes = (np.log10(masses), _metallicity_log(metallicities),
+                  np.log10(table))
+    return _lifetimes
+
+
+def _extrapolated_interp(x, x_points, y_points):
+    """Linear interpolation that extends the first and last segments past the
+    ends of the points, rather than holding the end values constant.
+
+    :param x: array of values to interpolate to
+    :param x_points: increasing array of points
+    :param y_points: array of the values at those points
+    """
+    idx = np.clip(np.searchsorted(x_points, x) - 1, 0, len(x_points) - 2)
+    slope = (y_points[idx + 1] - y_points[idx]) / \
+            (x_points[idx + 1] - x_points[idx])
+    return y_points[idx] + slope * (x - x_points[idx])
+
+
+def _interpolate_z(values, log_z_points, metallicity):
+    """Interpolate in log(Z) between values found at each metallicity point.
+
+    :param values: array with the metallicity points along the first axis
+    :param log_z_points: log of the metallicity points
+    :param metallicity: array of metallicities, which broadcasts with the
+                        other axes of values
+    """
+    metallicity = np.asarray(metallicity, dtype=np.float64)
+    log_z = _metallicity_log(metallicity).reshape(metallicity.shape)
+    idx, weight = _log_z_weights(log_z_points, log_z)
+    lower = np.take_along_axis(values, idx[np.newaxis], axis=0)[0]
+    upper = np.take_along_axis(values, np.minimum(idx + 1,
+                                                  len(values) - 1)[np.newaxis],
+                               axis=0)[0]
+    return lower * (1 - weight) + upper * weight
+
+
+def lifetime(mass, metallicity):
+    """Get the lifetime of stars.
+
+    :param mass: Stellar mass in solar masses. This can be an array.
+    :param metallicity: Metallicity of the stars. This can be an array that
+                        broadcasts with the mass.
+    :returns: Lifetime in Gyr.
+    """
+    log_m_points, log_z_points, log_t_table = _read_lifetimes()
+    mass, metallicity = np.broadcast_arrays(
+        np.asarray(mass, dtype=np.float64),
+        np.asarray(metallicity, dtype=np.float64))
+    log_m = np.log10(mass)
+    log_t = np.array([_extrapolated_interp(log_m, log_m_points, row)
+                      for row in log_t_table])
+    return 10**_interpolate_z(log_t, log_z_points, metallicity)
+
+
+def turnoff_mass(age, metallicity):
+    """Get the mass of the stars that are dying at a given age, so all stars
+    above this mass have died.
+
+    This inverts the lifetime relation at each metallicity point, then
+    interpolates between metallicities, so it's only approximately the
+    inverse of `lifetime` between the metallicity points.
+
+    :param age: Age of the stars in Gyr. This can be an array.
+    :param metallicity: Metallicity of the stars. This can be an array that
+                        broadcasts with the age.
+    :returns: Mass in solar masses.
+    """
+    log_m_points, log_z_points, log_t_table = _read_lifetimes()
+    age, metallicity = np.broadcast_arrays(
+        np.asarray(age, dtype=np.float64),
+        np.asarray(metallicity, dtype=np.float64))
+    # nothing has died at zero age, which a tiny age takes care of while
+    # keeping the logs finite
+    log_t = np.log10(np.maximum(age, 1E-10))
+    # the lifetimes go down with mass, so flip them to be increasing
+    log_m = np.array([_extrapolated_interp(log_t, row[::-1],
+                                           log_m_points[::-1])
+                      for row in log_t_table])
+    return 10**_interpolate_z(log_m, log_z_points, metallicity)
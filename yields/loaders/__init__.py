@@ -0,0 +1,146 @@
+"""
+The model families that come with this package, and the functions that load
+them.
+
+Each family is registered below with what we know about it without reading
+any files, and the loader as a "module:function" string. The loader modules
+are only imported the first time one of their models is read from the data
+files, so importing the package (or using the bundle) never imports them.
+
+Adding a family means adding a module here with a function that takes a Yields
+object and the name of the model and fills in its yields (with
+`Yields._add_yields`, so that only the species that were asked for are kept),
+then registering it at the bottom of this file. Other packages can do the
+same with `register_model_family`.
+"""
+import os
+
+from ..registry import register_model_family
+
+iwamoto_file = "iwamoto_99_Ia_yields.txt"
+
+nomoto_file = "nomoto_06_imf_weighted_II.txt"
+
+my_nomoto_ave_file = "nomoto_06_imf_weighted_II_my_ave.txt"
+my_nomoto_hn_file = "nomoto_06_imf_weighted_II_my_hn.txt"
+my_nomoto_reg_file = "nomoto_06_imf_weighted_II_my_no_hn.txt"
+my_ww_file = "ww_95_imf_weighted_II.txt"
+
+nomoto_ind_0 = "nomoto_individual/z_0.txt"
+nomoto_ind_0_001 = "nomoto_individual/z_0.001.txt"
+nomoto_ind_0_004 = "nomoto_individual/z_0.004.txt"
+nomoto_ind_0_02 = "nomoto_individual/z_0.02.txt"
+
+nomoto_ind_0_hn = "nomoto_individual/z_0_hn.txt"
+nomoto_ind_0_001_hn = "nomoto_individual/z_0.001_hn.txt"
+nomoto_ind_0_004_hn = "nomoto_individual/z_0.004_hn.txt"
+nomoto_ind_0_02_hn = "nomoto_individual/z_0.02_hn.txt"
+
+kobayashi_sn = "kobayashi_individual/sn_ejecta.txt"
+kobayashi_hn = "kobayashi_individual/hn_ejecta.txt"
+
+ww_ind_sol_a = "ww_individual/ww95_5a.txt"
+ww_ind_sol_b = "ww_individual/ww95_5b.txt"
+ww_ind_0_1_sol_a = "ww_individual/ww95_10a.txt"
+ww_ind_0_1_sol_b = "ww_individual/ww95_10b.txt"
+ww_ind_0_01_sol_a = "ww_individual/ww95_12a.txt"
+ww_ind_0_01_sol_b = "ww_individual/ww95_12b.txt"
+ww_ind_4_sol_a = "ww_individual/ww95_14a.txt"
+ww_ind_4_sol_b = "ww_individual/ww95_14b.txt"
+ww_ind_0_a = "ww_individual/ww95_16a.txt"
+ww_ind_0_b = "ww_individual/ww95_16b.txt"
+
+nugrid_agb = "nugrid_agb/isotope_yield_table_MESAonly_fryer12_delay_winds.txt"
+
+nomoto_w7 = "nomoto_18_Ia.txt"
+
+# store the known metallicity values
+z_values_nomoto = [0, 0.001, 0.004, 0.02]
+
+# we know the metallicity of the models WW95 used
+z_sun_ww = 0.02
+z_values_ww = [0, (10**-4) * z_sun_ww, 0.01 * z_sun_ww, 0.1 * z_sun_ww,
+               z_sun_ww]
+
+
+def _get_data_path(data_file):
+    """Returns the path of a file in the data directory.
+
+    We know the relative path of it compared to this file, so it's easy to
+    know where it is."""
+    return os.path.join(os.path.dirname(os.path.dirname(__file__)), "data",
+                        data_file)
+
+
+_iwamoto_models = ["W7", "W70", "WDD1", "WDD2", "WDD3", "CDD1", "CDD2"]
+_nomoto_masses = ["13", "15", "18", "20", "25", "30", "40"]
+_hn_masses = ["20", "25", "30", "40"]
+_ww_models = ["11A", "12A", "13A", "15A", "18A", "19A", "20A", "22A", "25A",
+              "25B", "30A", "30B", "35A", "35B", "35C", "40A", "40B", "40C"]
+_nugrid_masses = [1, 1.65, 2, 3, 4, 5, 6, 7, 12, 15, 20, 25]
+
+register_model_family("test", "test", "yields.loaders.testing:load_test",
+                      ["test"], metallicities=[0, 1])
+register_model_family("iwamoto_99_Ia", "iwamoto_99_Ia_.*",
+                      "yields.loaders.iwamoto:load_iwamoto_99_Ia",
+                      ["iwamoto_99_Ia_" + m for m in _iwamoto_models],
+                      metallicities=[0, 1], data_files=[iwamoto_file])
+register_model_family("nomoto_18_Ia", "nomoto_18_Ia_.*",
+                      "yields.loaders.nomoto:load_nomoto_18_Ia",
+                      ["nomoto_18_Ia_W7"], metallicities=[0.002, 0.02],
+                      data_files=[nomoto_w7])
+register_model_family("nomoto_06_II", "nomoto_06_II",
+                      "yields.loaders.nomoto:load_nomoto_06_II",
+                      ["nomoto_06_II"], metallicities=z_values_nomoto,
+                      data_files=[nomoto_file])
+register_model_family("nomoto_06_II_imf", "nomoto.*imf.*",
+                      "yields.loaders.imf_integrated:load_imf_integrated",
+                      ["nomoto_06_II_imf_ave", "nomoto_06_II_imf_hn",
+                       "nomoto_06_II_imf_no_hn"],
+                      metallicities=z_values_nomoto,
+                      data_files=[my_nomoto_ave_file, my_nomoto_hn_file,
+                                  my_nomoto_reg_file])
+register_model_family("ww_95_imf", "ww_95.*imf.*",
+                      "yields.loaders.imf_integrated:load_imf_integrated",
+                      ["ww_95_imf_ave"], metallicities=z_values_ww,
+                      data_files=[my_ww_file])
+register_model_family("nomoto_06_II_individual", "nomoto_06.*",
+                      "yields.loaders.nomoto:load_nomoto_06_II_individual",
+                      ["nomoto_06_II_" + m for m in _nomoto_masses] +
+                      ["nomoto_06_II_{}_hn".format(m) for m in _hn_masses],
+                      metallicities=z_values_nomoto,
+                      masses=dict([("nomoto_06_II_" + m, float(m))
+                                   for m in _nomoto_masses] +
+                                  [("nomoto_06_II_{}_hn".format(m), float(m))
+                                   for m in _hn_masses]),
+                      data_files=[nomoto_ind_0, nomoto_ind_0_001,
+                                  nomoto_ind_0_004, nomoto_ind_0_02,
+                                  nomoto_ind_0_hn, nomoto_ind_0_001_hn,
+                                  nomoto_ind_0_004_hn, nomoto_ind_0_02_hn])
+register_model_family("kobayashi_06_II", "kobayashi.*",
+                      "yields.loaders.kobayashi:load_kobayashi_06_II",
+                      ["kobayashi_06_II_" + m for m in _nomoto_masses] +
+                      ["kobayashi_06_II_{}_hn".format(m) for m in _hn_masses],
+                      metallicities=z_values_nomoto,
+                      masses=dict([("kobayashi_06_II_" + m, float(m))
+                                   for m in _nomoto_masses] +
+                                  [("kobayashi_06_II_{}_hn".format(m),
+                                    float(m)) for m in _hn_masses]),
+                      data_files=[kobayashi_sn, kobayashi_hn])
+register_model_family("ww_95_II", "ww_95_II.*",
+                      "yields.loaders.ww95:load_ww_95_II",
+                      ["ww_95_II_" + m for m in _ww_models],
+                      metallicities=z_values_ww,
+                      masses={"ww_95_II_" + m: float(m[:-1])
+                              for m in _ww_models},
+                      data_files=[ww_ind_sol_a, ww_ind_sol_b, ww_ind_0_1_sol_a,
+                                  ww_ind_0_1_sol_b, ww_ind_0_01_sol_a,
+                                  ww_ind_0_01_sol_b, ww_ind_4_sol_a,
+                                  ww_ind_4_sol_b, ww_ind_0_a, ww_ind_0_b])
+register_model_family("nugrid", "nugrid.*",
+                      "yields.loaders.nugrid:load_nugrid",
+                      ["nugrid_{:g}".format(m) for m in _nugrid_masses],
+                      metallicities=[0.0001, 0.001, 0.006, 0.01, 0.02],
+                      masses={"nugrid_{:g}".format(m): float(m)
+                              for m in _nugrid_masses},
+                      data_files=[nugrid_agb, "nugrid_agb/read_yields.py"])
@@ -0,0 +1,51 @@
+"""
+The IMF integrated Type II supernova yields made from the Nomoto 2006 and
+Woosley & Weaver 1995 individual models.
+"""
+from . import _get_data_path, my_nomoto_ave_file, my_nomoto_hn_file, \
+    my_nomoto_reg_file, my_ww_file, z_values_nomoto, z_values_ww
+from .ww95 import _handle_iron_ww
+
+# which file holds each of the IMF integrated model sets
+_imf_files = {"nomoto_06_II_imf_ave": my_nomoto_ave_file,
+              "nomoto_06_II_imf_hn": my_nomoto_hn_file,
+              "nomoto_06_II_imf_no_hn": my_nomoto_reg_file,
+              "ww_95_imf_ave": my_ww_file}
+
+
+def load_imf_integrated(yields_obj, model_set):
+    """Populates the model with IMF integrated yields, which are per unit
+    mass of stars formed.
+
+    :param yields_obj: Yields object to fill.
+    :param model_set: Name of the model, like "nomoto_06_II_imf_ave" or
+                      "ww_95_imf_ave".
+    """
+    yields_obj.mass = "IMF"
+    # we need to get the metallicities used here
+    if model_set.startswith("nomoto"):
+        yields_obj.metallicity_points = z_values_nomoto
+    else:  # use WW
+        yields_obj.metallicity_points = z_values_ww
+
+    # then iterate through each line and handle it appropriately
+    with open(_get_data_path(_imf_files[model_set]), "r") as in_file:
+        for line in in_file:
+            # ignore the comments
+            if not line.startswith("#"):
+                # We then need to get the appropriate values from the line.
+                # to do this we split it on spaces, then we know where
+                # everything is
+                split_line = line.split()
+                elt = split_line[0]
+                these_abundances = split_line[1:]
+
+                # the element is already formatted properly, so we don't
+                # have to change anything there
+                yields_obj._add_yields(elt, these_abundances)
+
+    if model_set.startswith("ww_95"):
+        _handle_iron_ww(yields_obj)
+
+    #TODO: handle the mass, and various ejecta variables more properly for
+    # both the WW set and the IMF integrated set.
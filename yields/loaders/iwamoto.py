@@ -0,0 +1,79 @@
+"""
+The Type Ia supernova models of Iwamoto et al. 1999.
+"""
+from . import _get_data_path, iwamoto_file
+
+
+def _parse_iwamoto_element(original_string):
+    """Parses the LaTeX formatted string into an element that the code can use
+
+    The original format is like "^{12}C". To parse this, we just find the 
+    location of the brackets, then use that to know where the number and name
+    are. This holds no matter how long the elemental names or numbers are"""
+
+    first_bracket = original_string.index("{")
+    second_bracket = original_string.index("}")
+    # then use those locations to get the actual values we need.
+    number = original_string[first_bracket + 1:second_bracket]
+    name = original_string[second_bracket + 1:]
+    return "{}_{}".format(name, number)
+
+def _parse_iwamoto_model(full_name):
+    """Parses the full name to get the needed model.
+    
+    :param full_name: Name of the model, in the format "iwamoto_99_Ia_MODEL" 
+                      The valid names for MODEL are "W7", "W70", "WDD1", 
+                      "WDD2", "WDD3", "CDD1", and "CDD2". 
+    :returns: name of the model being used
+    :rtype: str
+    """
+    # first check that the beginning is what we want
+    if full_name[:14] != "iwamoto_99_Ia_":
+        raise ValueError("This is not an Iwamoto model.")
+
+    # we can then get the portion that is the model name
+    model_name = full_name.split("_")[-1]
+
+    # then check that it is indeed the right model
+    acceptable_models = ["W7", "W70", "WDD1", "WDD2", "WDD3", "CDD1", "CDD2"]
+    if model_name in acceptable_models:
+        return model_name
+    else:
+        raise ValueError("Model supplied is not a valid Iwamoto 99 Ia model.")
+
+
+def load_iwamoto_99_Ia(yields_obj, model_set):
+    """Populates the object with the type Ia supernova abundances from
+    Iwamoto et al 1999
+
+    :param yields_obj: Yields object to fill.
+    :param model_set: Name of the model, like "iwamoto_99_Ia_W7". The options
+                      for the model are "W7", "W70", "WDD1", "WDD2", "WDD3",
+                      "CDD1", "CDD2". The "W7" model is typically the one
+                      that is used the most.
+    """
+    model = _parse_iwamoto_model(model_set)
+    yields_obj.metallicity_points = [0, 1]
+    # get the index of the correct column
+    column_idxs = {"W7":2, "W70":3, "WDD1":4, "WDD2":5, "WDD3":6, 
+                   "CDD1":7, "CDD2":8}
+    our_idx = column_idxs[model]
+
+    # then iterate through each line and handle it appropriately
+    with open(_get_data_path(iwamoto_file), "r") as in_file:
+        for line in in_file:
+            # ignore the comments
+            if not line.startswith("#"):
+                # We then need to get the appropriate values from the line.
+                # to do this we split it on spaces, then use the index
+                # we had above
+                split_line = line.split()
+                element = split_line[0]
+                abundance = split_line[our_idx]
+
+                # the elements are formatted in LaTeX in the table, so we
+                # need to format it properly
+                formatted_element = _parse_iwamoto_element(element)
+                # This will be the same at all metallicities, so this is easy
+                yields_obj._add_yields(formatted_element,
+                                       [float(abundance)]*2)
@@ -0,0 +1,103 @@
+"""
+The individual Type II supernova and hypernova models of Kobayashi et al.
+2006.
+"""
+from . import _get_data_path, kobayashi_hn, kobayashi_sn, z_values_nomoto
+
+
+def _parse_kobayashi_individual_element(name):
+    """
+    Take the raw value for the elements in the data file and format it nicely.
+
+    :param name: The raw value for the element
+    :type name: str
+    :return: Nicely formatted value for the element.
+    :rtype: str
+    """
+    # other than p and d, elements are in the format of ^mass_number^elt_name
+    if name == "p":
+        return "H_1"
+    elif name == "d":
+        return "H_2"
+    else:
+        # we have to know where to put the underscore
+        _, num, sym = name.split("^")
+        return "{}_{}".format(sym, num)
+
+
+def load_kobayashi_06_II(yields_obj, model_set):
+    """
+    Populate the class with yields from Kobayashi+ 2006.
+
+    :param yields_obj: Yields object to fill.
+    :param model_set: Name of the model, like "kobayashi_06_II_20" or
+                      "kobayashi_06_II_20_hn" for the hypernovae.
+    :return: None
+    """
+    hn = model_set.endswith("_hn")
+    mass = model_set[-5:-3] if hn else model_set[-2:]
+    # set the moetallicity and mass
+    yields_obj.metallicity_points = z_values_nomoto
+    yields_obj.mass = float(mass)
+
+    # get the correct file, and the indices for the mass models in that file
+    if hn:
+        in_file = kobayashi_hn
+        idxs = {"20": 2, "25": 3, "30": 4, "40": 5}
+    else:
+        in_file = kobayashi_sn
+        idxs = {"13": 2, "15": 3, "18": 4, "20": 5, "25": 6, "30": 7,
+                "40": 8}
+
+    # verify that the use passed in a model that exists
+    try:
+        idx = idxs[mass]
+    except KeyError:
+        raise ValueError("This model was not found: {}".format(model_set))
+
+    # Set the energies
+    if hn:
+        energies = {"20": 10E51, "25": 10E51, "30": 20E51, "40": 30E51}
+        for z in yields_obj.metallicity_points:
+            yields_obj.energy_erg[z] = energies[mass]
+    else:
+        # all models have 1E51 ergs of energy
+        for z in yields_obj.metallicity_points:
+            yields_obj.energy_erg[z] = 1E51
+
+    # create temporary dictionary for reading the file, due to
+    # its unhelpful format.
+    temp_items = {z:dict() for z in yields_obj.metallicity_points}
+    # read the file
+    with open(_get_data_path(in_file), "r") as data_file:
+        for line in data_file:
+            if line.startswith("#"):  # comment lines
+                continue
+
+            # otherwise we have an actual data line
+            split_line = line.split()
+            z = float(split_line[0])
+            elt = str(split_line[1])
+            value = float(split_line[idx])
+
+            # what we do with it depends on what the "elt" is.
+            if elt == "M_cut_":
+                yields_obj.mass_cuts[z] = value  # store this directly
+            elif elt == "M_final_":
+                # store the mass lost to winds
+                yields_obj.wind_ejecta[z] = yields_obj.mass - value
+            else:
+                # store this in the temporary container after parsing elt.
+                elt = _parse_kobayashi_individual_element(elt)
+                temp_items[z][elt] = value
+
+    # then we can parse the ejected values into the appropriate format
+    for elt in temp_items[0].keys():
+        # get all the values for a given element
+        values = [temp_items[z][elt] for z in yields_obj.metallicity_points]
+        yields_obj._add_yields(elt, values)
+
+    # finally we can set the ejected mass by using the other values.
+    for z in yields_obj.metallicity_points:
+        yields_obj.total_end_ejecta[z] = yields_obj.mass - \
+            (yields_obj.mass_cuts[z] + yields_obj.wind_ejecta[z])
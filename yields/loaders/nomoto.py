@@ -0,0 +1,156 @@
+"""
+The Type II supernova models of Nomoto et al. 2006, both the individual
+supernovae and the IMF integrated yields from the paper, and the Type Ia W7
+model of Nomoto & Leung 2018.
+"""
+from . import _get_data_path, nomoto_file, nomoto_ind_0, nomoto_ind_0_001, \
+    nomoto_ind_0_004, nomoto_ind_0_02, nomoto_ind_0_hn, nomoto_ind_0_001_hn, \
+    nomoto_ind_0_004_hn, nomoto_ind_0_02_hn, nomoto_w7, z_values_nomoto
+
+
+def _parse_nomoto_element(number, name):
+    """The Nomoto 2006 file has a separate column for the name and the 
+    mass number, so we can take those and turn them into one thing like
+    the code wants. One minor hassle is that the file uses "p" and "d" for
+    Hydrogen and Deuterium, respectively."""
+    if number == "01" and name == "p":
+        return "H_1"
+    elif number == "02" and name == "d":
+        return "H_2"
+    else:
+        return "{}_{}".format(name, number.lstrip("0"))
+
+def _parse_nomoto_individual_element(name):
+    """The file has elements in the format NumberName, like 9Be or 22Na"""
+    if name == "p":
+        return "H_1"
+    elif name == "d":
+        return "H_2"
+    else:
+        # we have to know where to put the underscore
+        if name[1].isalpha():
+            num = name[0]
+            sym = name[1:]
+        else:
+            num = name[0:2]
+            sym = name[2:]
+        return "{}_{}".format(sym, num)
+
+
+def load_nomoto_06_II(yields_obj, model_set):
+    """Populates the model with the yields from the Nomoto 2006 models
+
+    :param yields_obj: Yields object to fill.
+    :param model_set: Name of the model, which is always "nomoto_06_II".
+    """
+    yields_obj.metallicity_points = z_values_nomoto
+
+    # then iterate through each line and handle it appropriately
+    with open(_get_data_path(nomoto_file), "r") as in_file:
+        for line in in_file:
+            # ignore the comments
+            if not line.startswith("#"):
+                # We then need to get the appropriate values from the line.
+                # to do this we split it on spaces, then we know where
+                # everything is
+                split_line = line.split()
+                mass_number = split_line[0]
+                atomic_name = split_line[1]
+                these_abundances = split_line[2:]
+
+                # We can then parse the string to get the elemental format
+                # we need
+                formatted_element = _parse_nomoto_element(mass_number,
+                                                          atomic_name)
+                yields_obj._add_yields(formatted_element, these_abundances)
+
+
+def _read_nomoto_files_ind(yields_obj, idx, data_files):
+    """Read one supernova out of the files of the individual Nomoto 2006
+    models.
+
+    :param yields_obj: Yields object to fill.
+    :param idx: Column of the supernova in the files.
+    :param data_files: The files at each metallicity, in the same order as
+                       the metallicity points.
+    """
+    in_files = [open(_get_data_path(data_file), "r")
+                for data_file in data_files]
+    try:
+        # Each file is a given metallicity and has all mass models, so we
+        # want to iterate through all files at the same time. The rows are
+        # the same row in each file.
+        for rows in zip(*[in_file.readlines() for in_file in in_files]):
+            elt = rows[0].split()[0]
+            # ignore rows that don't matter
+            if elt in ["M", "E"]:
+                continue
+
+            # Get the column with the right SN in it for each file
+            items = [row.split()[idx] for row in rows]
+
+            # then parse it appropriately
+            if elt == "Mcut":
+                for z, item in zip(yields_obj.metallicity_points, items):
+                    yields_obj.mass_cuts[z] = float(item)
+            else:  # a regular element
+                # parse the element name
+                elt = _parse_nomoto_individual_element(elt)
+
+                yields_obj._add_yields(elt, items)
+    finally:
+        for in_file in in_files:
+            in_file.close()
+
+
+def load_nomoto_06_II_individual(yields_obj, model_set):
+    """Populates the model with the yields from the Nomoto 2006
+    individual supernova values, not the IMF integrated ones.
+
+    :param yields_obj: Yields object to fill.
+    :param model_set: Name of the model, like "nomoto_06_II_20" or
+                      "nomoto_06_II_20_hn" for the hypernovae.
+    """
+    yields_obj.metallicity_points = z_values_nomoto
+    # we know the format of the files, so we know which column the mass we
+    # want is in.
+    if model_set.endswith("_hn"):
+        mass = model_set[-5:-3]
+        data_files = [nomoto_ind_0_hn, nomoto_ind_0_001_hn,
+                      nomoto_ind_0_004_hn, nomoto_ind_0_02_hn]
+        idxs = {"20": 1, "25": 2, "30": 3, "40": 4}
+    else:
+        mass = model_set[-2:]
+        data_files = [nomoto_ind_0, nomoto_ind_0_001, nomoto_ind_0_004,
+                      nomoto_ind_0_02]
+        idxs = {"13": 1, "15": 2, "18": 3, "20": 4, "25": 5, "30": 6, "40": 7}
+    try:
+        idx = idxs[mass]
+    except KeyError:
+        raise ValueError("This model was not found: {}".format(model_set))
+
+    _read_nomoto_files_ind(yields_obj, idx, data_files)
+    yields_obj.mass = float(mass)
+
+
+def load_nomoto_18_Ia(yields_obj, model_set):
+    """
+    Populate the model with data from the Nomoto 2018 W7 models.
+
+    :param yields_obj: Yields object to fill.
+    :param model_set: Name of the model, which is always "nomoto_18_Ia_W7".
+    :return: None
+    """
+    # manually enter the metallicity points (solar and 0.1 solar)
+    yields_obj.metallicity_points = [0.002, 0.02]
+
+    with open(_get_data_path(nomoto_w7), "r") as data_file:
+        for row in data_file:
+            if row.startswith("#"):
+                continue
+            # the data is just three values: element, then yields at the
+            # two metallicities
+            elt, val_solar, val_subsolar = row.split()
+            elt = _parse_nomoto_individual_element(elt)
+
+            yields_obj._add_yields(elt, [val_subsolar, val_solar])
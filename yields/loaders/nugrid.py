@@ -0,0 +1,77 @@
+"""
+The AGB star models from NuGrid, read with the reader NuGrid provides.
+"""
+import importlib.util
+
+from . import _get_data_path, nugrid_agb
+
+# the NuGrid reader is only imported when those models are used
+_read_yields = None
+# and the table is only read once, since that takes a while
+_nugrid_table = None
+
+
+def _get_read_yields():
+    """Get the module NuGrid provides to read their yield tables.
+
+    It lives in the data directory next to the tables, rather than being part
+    of this package, so we load it directly from the file."""
+    global _read_yields
+    if _read_yields is None:
+        spec = importlib.util.spec_from_file_location(
+            "read_yields", _get_data_path("nugrid_agb/read_yields.py"))
+        _read_yields = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(_read_yields)
+    return _read_yields
+
+
+def _get_nugrid_table():
+    """Read the NuGrid yield table, or get it if it's already been read."""
+    global _nugrid_table
+    if _nugrid_table is None:
+        read_yields = _get_read_yields()
+        _nugrid_table = read_yields.read_nugrid_yields(
+            _get_data_path(nugrid_agb))
+    return _nugrid_table
+
+
+def load_nugrid(yields_obj, model_set):
+    """
+    Populate the model with data from the NuGrid AGB models.
+
+    :param yields_obj: Yields object to fill.
+    :param model_set: Name of the model, like "nugrid_2", where the number
+                      is the mass in solar masses.
+    :return: None
+    """
+    mass = model_set.split("_")[-1]
+    yields_obj.mass = float(mass)
+    # use the NuGrid code to read the yields
+    nugrid_read = _get_nugrid_table()
+    # get the metallicity points and masses
+    yields_obj.metallicity_points = sorted(nugrid_read.metallicities)
+    masses = nugrid_read.get(Z=0.02, quantity="masses")
+    # check for valid mass
+    if yields_obj.mass not in masses:
+        raise ValueError("This model was not found:"
+                         " nugrid_{}".format(mass))
+    # get the isotopes present in the model, and slightly parse them
+    isotopes = nugrid_read.header_attrs["Isotopes"].split(" ")
+    isotopes = [iso.replace(",", "") for iso in isotopes]
+
+    # get the yields of all the isotopes at each metallicity at once, rather
+    # than asking the NuGrid code for each isotope separately
+    tables = []
+    for z in yields_obj.metallicity_points:
+        names = nugrid_read.get(M=yields_obj.mass, Z=z, quantity="Isotopes")
+        values = nugrid_read.get(M=yields_obj.mass, Z=z, quantity="Yields")
+        tables.append(dict(zip(names, values)))
+
+    for isotope in isotopes:
+        yields = [table[isotope] for table in tables]
+        # format the name before puttting in the interpolation object
+        yields_obj._add_yields(isotope.replace("-", "_"), yields)
+
+    totals = yields_obj._total(yields_obj._point_values(), metal_only=False)
+    for z, total in zip(yields_obj.metallicity_points, totals):
+        yields_obj.total_end_ejecta[z] = float(total)
@@ -0,0 +1,16 @@
+"""
+The "test" model, which has made up values for testing.
+"""
+
+
+def load_test(yields_obj, model_set):
+    """Fill a Yields object with the test model.
+
+    :param yields_obj: Yields object to fill.
+    :param model_set: Name of the model, which is always "test".
+    """
+    # totally arbitrary values for testing
+    yields_obj.metallicity_points = [0, 1]
+    for idx, isotope in enumerate(["H_1", "He_2", "Li_3", "Be_4", "B_5",
+                                   "C_6", "N_7", "O_8", "F_9", "Na_10"]):
+        yields_obj._add_yields(isotope, [idx + 1, idx + 2])
@@ -0,0 +1,125 @@
+"""
+The individual Type II supernova models of Woosley & Weaver 1995.
+"""
+import numpy as np
+
+from . import _get_data_path, ww_ind_0_01_sol_a, ww_ind_0_01_sol_b, \
+    ww_ind_0_1_sol_a, ww_ind_0_1_sol_b, ww_ind_0_a, ww_ind_0_b, \
+    ww_ind_4_sol_a, ww_ind_4_sol_b, ww_ind_sol_a, ww_ind_sol_b, z_values_ww
+from .nomoto import _parse_nomoto_individual_element
+
+# The files holding the individual WW95 models, in order of increasing
+# metallicity (the same order as z_values_ww). The "a" files have the models
+# below 30 solar masses, and the "b" files have the rest.
+ww_ind_files = [(ww_ind_0_a, ww_ind_0_b),
+                (ww_ind_4_sol_a, ww_ind_4_sol_b),
+                (ww_ind_0_01_sol_a, ww_ind_0_01_sol_b),
+                (ww_ind_0_1_sol_a, ww_ind_0_1_sol_b),
+                (ww_ind_sol_a, ww_ind_sol_b)]
+
+# all the individual WW95 models, once they've been read
+_ww95_individual = None
+
+
+def _get_ww95_individual():
+    """Read all the individual WW95 models at once.
+
+    Each file has one column per model, with a header like "Z12A" (the first
+    letter marks the metallicity), so we can find the columns from the header
+    rather than knowing them ahead of time. Not every model was run at every
+    metallicity, so we keep track of which ones exist.
+
+    :returns: Dictionary with the "models" (like "12A"), "isotopes", the
+              "yields" array of shape (model, metallicity, isotope), and a
+              "present" boolean array of shape (model, metallicity) that is
+              False where a model doesn't exist. "order" holds the indices of
+              the isotopes in the order they appear in the first file each
+              model is in.
+    """
+    global _ww95_individual
+    if _ww95_individual is not None:
+        return _ww95_individual
+
+    # first parse everything into dictionaries, since the files don't all
+    # list the isotopes in the same order
+    columns = dict()  # (model, z index) -> {isotope: value}
+    file_order = dict()  # model -> isotopes in the first file it's in
+    isotopes = []
+    for z_idx, file_pair in enumerate(ww_ind_files):
+        for data_file in file_pair:
+            with open(_get_data_path(data_file), "r") as in_file:
+                rows = [row.split() for row in in_file if row.strip()]
+            models = [name[1:] for name in rows[0][1:]]
+            for row in rows[1:]:
+                if row[0] in ["KE", "Mass"]:
+                    continue
+                isotope = _parse_nomoto_individual_element(row[0])
+                if isotope not in isotopes:
+                    isotopes.append(isotope)
+                for model, item in zip(models, row[1:]):
+                    columns.setdefault((model, z_idx), dict())[isotope] = \
+                        float(item)
+                    file_order.setdefault(model, dict())[isotope] = None
+
+    all_models = sorted(file_order.keys(), key=lambda m: (int(m[:-1]), m))
+    isotope_idx = {isotope: idx for idx, isotope in enumerate(isotopes)}
+    yields = np.full((len(all_models), len(ww_ind_files), len(isotopes)),
+                     np.nan)
+    present = np.zeros((len(all_models), len(ww_ind_files)), dtype=bool)
+    for (model, z_idx), values in columns.items():
+        m_idx = all_models.index(model)
+        present[m_idx, z_idx] = True
+        for isotope, value in values.items():
+            yields[m_idx, z_idx, isotope_idx[isotope]] = value
+
+    _ww95_individual = {"models": all_models,
+                        "isotopes": isotopes,
+                        "yields": yields,
+                        "present": present,
+                        "order": {model: [isotope_idx[isotope]
+                                          for isotope in file_order[model]]
+                                  for model in all_models}}
+    return _ww95_individual
+
+
+def _handle_iron_ww(yields_obj):
+    """In the WW 95 yields, the 56 Ni should decay to Fe 56 after a longer
+    period of time, but the evolution stops too early. To fix this, we add
+    all the 56Ni to the 56Fe. The Iron is also too high, so we divide
+    it by two."""
+    real_56_fe_abundances = (yields_obj._yields_at_points("Ni_56") +
+                             yields_obj._yields_at_points("Fe_56")) / 2.0
+    real_56_ni_abundances = np.zeros(len(real_56_fe_abundances))
+
+    yields_obj._add_yields("Ni_56", real_56_ni_abundances)
+    yields_obj._add_yields("Fe_56", real_56_fe_abundances)
+
+
+def load_ww_95_II(yields_obj, model_set):
+    """Populates the model with the data from the individual
+    WW95 models
+
+    :param yields_obj: Yields object to fill.
+    :param model_set: Name of the model, like "ww_95_II_20A".
+    """
+    model = model_set[9:]
+    yields_obj.metallicity_points = z_values_ww
+
+    ww95 = _get_ww95_individual()
+    try:
+        m_idx = ww95["models"].index(model)
+    except ValueError:
+        raise ValueError("This is not a valid WW95 model. ")
+
+    # Some models only exist at one metallicity (11A and 19A are only
+    # solar, 25B is only zero metallicity). Interpolating over just the
+    # metallicities the model has makes these constant.
+    present = ww95["present"][m_idx]
+    metallicities = np.array(z_values_ww)[present]
+    for i_idx in ww95["order"][model]:
+        values = ww95["yields"][m_idx, present, i_idx]
+        yields_obj._add_yields(ww95["isotopes"][i_idx], values,
+                               metallicities)
+
+    yields_obj.mass = float(model[:-1])
+    _handle_iron_ww(yields_obj)
@@ -0,0 +1,178 @@
+"""
+An index of all the models and data files that come with this package.
+
+The index is stored in data/catalogue.json, which is built ahead of time by
+running this module as a script::
+
+    python -m yields.model_catalogue
+
+It lists every model, along with its mass, the metallicities it's tabulated
+at, and the isotopes it has, plus a checksum of every data file. That lets
+code choose models without creating any Yields objects, which would have to
+read and parse the data files. The checksums let us tell when the index (or
+anything else built from the data files) no longer matches the data.
+"""
+import hashlib
+import json
+import os
+
+from . import registry
+from .yields_base import Yields
+
+__all__ = ["catalogue_format_version", "catalogue_file", "file_checksum",
+           "current_data_version", "build_catalogue", "write_catalogue",
+           "catalogue", "stale_files"]
+
+# Increase this whenever the layout of the catalogue changes
+catalogue_format_version = 1
+
+catalogue_file = "catalogue.json"
+
+# the catalogue once it's been read, so we only do that once
+_catalogue = None
+
+
+def _get_data_path(data_file):
+    """Returns the path of a file in the data directory."""
+    return os.path.join(os.path.dirname(__file__), "data", data_file)
+
+
+def file_checksum(data_file):
+    """Calculate the SHA-256 checksum of a file in the data directory.
+
+    :param data_file: Path of the file, relative to the data directory.
+    :returns: Hex digest of the checksum.
+    :rtype: str
+    """
+    sha = hashlib.sha256()
+    with open(_get_data_path(data_file), "rb") as in_file:
+        for block in iter(lambda: in_file.read(1 << 20), b""):
+            sha.update(block)
+    return sha.hexdigest()
+
+
+def _data_version(checksums):
+    """Combine the checksums of all the files into one value that changes if
+    any of them do."""
+    sha = hashlib.sha256()
+    for data_file in sorted(checksums):
+        sha.update("{} {}\n".format(data_file, checksums[data_file])
+                   .encode("ascii"))
+    return sha.hexdigest()[:16]
+
+
+def _all_checksums():
+    """Checksums of every data file any model family uses."""
+    checksums = dict()
+    for family in registry.model_families():
+        for data_file in family.data_files:
+            checksums[data_file] = file_checksum(data_file)
+    return checksums
+
+
+def current_data_version():
+    """Calculate the data version of the data files as they are now. This
+    reads every file, so it's slow.
+
+    :returns: Data version, which can be compared to the one in the catalogue.
+    :rtype: str
+    """
+    return _data_version(_all_checksums())
+
+
+def build_catalogue():
+    """Create the catalogue by loading every registered model.
+
+    This is slow, since it reads all the data. Most users will want
+    `catalogue` instead, which reads the one that was already built.
+
+    :returns: Dictionary holding the catalogue. See `catalogue` for the
+              layout.
+    """
+    families = dict()
+    models = dict()
+    checksums = _all_checksums()
+    for family in registry.model_families():
+        families[family.name] = {"models": list(family.models),
+                                 "files": list(family.data_files)}
+
+        for model in family.models:
+            yields_obj = Yields(model, use_bundle=False)
+            models[model] = {"family": family.name,
+                             "mass": yields_obj.mass,
+                             "metallicities":
+                                 [float(z) for z in
+                                  yields_obj.metallicity_points],
+                             "isotopes": list(yields_obj.abundances.keys())}
+
+    return {"format_version": catalogue_format_version,
+            "data_version": _data_version(checksums),
+            "families": families,
+            "models": models,
+            "checksums": checksums}
+
+
+def write_catalogue(filename=None):
+    """Build the catalogue and write it to a file.
+
+    :param filename: Where to write it. The default is the catalogue file in
+                     the data directory, which is what `catalogue` reads.
+    """
+    if filename is None:
+        filename = _get_data_path(catalogue_file)
+    with open(filename, "w") as out_file:
+        json.dump(build_catalogue(), out_file, indent=1, sort_keys=True)
+        out_file.write("\n")
+
+
+def catalogue():
+    """Get the index of all the models that come with this package.
+
+    This is read from a file the first time it's called, then reused. It is a
+    dictionary with the following keys:
+
+    - "format_version": version of the layout of this dictionary
+    - "data_version": identifies the contents of all the data files. This
+      changes if any of the data files change.
+    - "families": dictionary where the keys are the names of model families
+      and the values are dictionaries with the "models" in that family and
+      the "files" they are read from.
+    - "models": dictionary where the keys are the model names and the values
+      are dictionaries with the "family" the model belongs to, its "mass"
+      (None if that doesn't apply), the "metallicities" it's tabulated at,
+      and the "isotopes" it has.
+    - "checksums": dictionary of the SHA-256 checksum of each data file,
+      where the keys are the paths relative to the data directory.
+
+    Don't modify what's returned, since the same dictionary is returned each
+    time.
+
+    :returns: Dictionary holding the catalogue.
+    """
+    global _catalogue
+    if _catalogue is None:
+        with open(_get_data_path(catalogue_file), "r") as in_file:
+            this_catalogue = json.load(in_file)
+        if this_catalogue["format_version"] != catalogue_format_version:
+            raise ValueError("The model catalogue is out of date. Rebuild it "
+                             "with `python -m yields.model_catalogue`.")
+        _catalogue = this_catalogue
+    return _catalogue
+
+
+def stale_files(data_files=None):
+    """Find data files that have changed since the catalogue was built.
+
+    :param data_files: Which files to check. The default of None checks all
+                       files in the catalogue.
+    :returns: List of files whose checksums don't match the catalogue.
+    """
+    checksums = catalogue()["checksums"]
+    if data_files is None:
+        data_files = sorted(checksums)
+    return [data_file for data_file in data_files
+            if checksums.get(data_file) != file_checksum(data_file)]
+
+
+if __name__ == "__main__":
+    write_catalogue()
@@ -0,0 +1,174 @@
+"""
+Tools for spreading the abundance calculations over many processes or
+threads.
+
+The metallicity arrays and results are put into shared memory blocks, so the
+only thing sent to the worker processes for each task is the name of the
+block and the slice to work on. Each worker builds its own Abundances object
+once when it starts, and reuses it for every task after that.
+
+Threads are lighter, since they don't need their own copies of anything. Most
+of the work is done by numpy functions that release the GIL, so threads can
+still run at the same time.
+"""
+from concurrent.futures import ThreadPoolExecutor
+import multiprocessing
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+import yields
+
+__all__ = ["get_pool", "close_pool", "process_map", "thread_map"]
+
+# This is the Abundances object each worker process uses. It gets created by
+# _init_worker() when the process starts.
+_worker_abundances = None
+
+# how many tasks to give each worker. More than one lets the pool balance
+# things if some chunks take longer.
+_tasks_per_worker = 4
+
+# How many metallicity values each thread works on at once. Blocks of this
+# size keep the temporary arrays in the CPU cache.
+_thread_block_size = 8192
+
+
+def _init_worker(init_kwargs):
+    """Create the Abundances object this worker will use for all its tasks."""
+    global _worker_abundances
+    _worker_abundances = yields.Abundances(**init_kwargs)
+
+
+def _worker_evaluate(task):
+    """Evaluate one chunk of the metallicity arrays inside a worker.
+
+    :param task: tuple of the function name, the extra arguments to the
+                 function, the names of the input and output shared memory
+                 blocks, the total number of values, and the start and end of
+                 the chunk this worker should do.
+    """
+    func_name, args, in_name, out_name, n, start, end = task
+    in_block = shared_memory.SharedMemory(name=in_name)
+    out_block = shared_memory.SharedMemory(name=out_name)
+    try:
+        z = np.ndarray((2, n), dtype=np.float64, buffer=in_block.buf)
+        out = np.ndarray((n,), dtype=np.float64, buffer=out_block.buf)
+
+        func = getattr(_worker_abundances, func_name)
+        out[start:end] = func(z[0, start:end], z[1, start:end], *args)
+        # the views have to be gone before we can close the blocks
+        del z, out
+    finally:
+        in_block.close()
+        out_block.close()
+
+
+def get_pool(abundances_obj, workers):
+    """Get the pool of worker processes for this Abundances object.
+
+    The pool is kept on the object so that the workers (and the yields they
+    loaded) can be reused by later calls. If the number of workers changes,
+    the old pool is shut down and a new one is made.
+
+    :param abundances_obj: Abundances object the workers should copy.
+    :param workers: Number of worker processes.
+    :returns: multiprocessing.Pool
+    """
+    if abundances_obj._pool is not None:
+        if abundances_obj._pool_workers == workers:
+            return abundances_obj._pool
+        close_pool(abundances_obj)
+
+    # The workers need to share our resource tracker, which keeps track of the
+    # shared memory blocks. If it isn't running yet each worker would start
+    # its own, and those would complain about blocks we clean up ourselves.
+    resource_tracker.ensure_running()
+    abundances_obj._pool = multiprocessing.Pool(
+        workers, initializer=_init_worker,
+        initargs=(abundances_obj._init_kwargs,))
+    abundances_obj._pool_workers = workers
+    return abundances_obj._pool
+
+
+def close_pool(abundances_obj):
+    """Shut down the worker processes for this Abundances object, if any."""
+    if abundances_obj._pool is not None:
+        abundances_obj._pool.close()
+        abundances_obj._pool.join()
+    abundances_obj._pool = None
+    abundances_obj._pool_workers = None
+
+
+def process_map(abundances_obj, func_name, Z_Ia, Z_II, args, workers):
+    """Evaluate one of the Abundances calculation functions using a pool of
+    worker processes.
+
+    :param abundances_obj: Abundances object doing the calculation.
+    :param func_name: Name of the method that does the calculation on arrays,
+                      like "_x_on_fe".
+    :param Z_Ia: array of metallicities from type Ia supernovae
+    :param Z_II: array of metallicities from type II supernovae
+    :param args: tuple of other arguments to the function, like the element.
+    :param workers: Number of worker processes.
+    :returns: Array of values at each metallicity pair.
+    :rtype: np.ndarray
+    """
+    n = len(Z_Ia)
+    if n == 0:
+        return np.zeros(0)
+    pool = get_pool(abundances_obj, workers)
+
+    in_block = shared_memory.SharedMemory(create=True, size=2 * n * 8)
+    out_block = shared_memory.SharedMemory(create=True, size=n * 8)
+    try:
+        z = np.ndarray((2, n), dtype=np.float64, buffer=in_block.buf)
+        z[0] = Z_Ia
+        z[1] = Z_II
+        out = np.ndarray((n,), dtype=np.float64, buffer=out_block.buf)
+
+        # split into chunks, which only need the edges to be sent
+        edges = np.linspace(0, n, workers * _tasks_per_worker + 1).astype(int)
+        tasks = [(func_name, args, in_block.name, out_block.name, n,
+                  start, end)
+                 for start, end in zip(edges[:-1], edges[1:]) if end > start]
+        pool.map(_worker_evaluate, tasks)
+
+        result = out.copy()
+        del z, out
+    finally:
+        in_block.close()
+        in_block.unlink()
+        out_block.close()
+        out_block.unlink()
+
+    return result
+
+
+def thread_map(func, Z_Ia, Z_II, args, n_threads,
+               block_size=_thread_block_size):
+    """Evaluate one of the Abundances calculation functions using a pool of
+    threads, each working on small blocks of the arrays.
+
+    :param func: Function that does the calculation on arrays, like
+                 Abundances._x_on_fe.
+    :param Z_Ia: array of metallicities from type Ia supernovae
+    :param Z_II: array of metallicities from type II supernovae
+    :param args: tuple of other arguments to the function, like the element.
+    :param n_threads: Number of threads.
+    :param block_size: Number of values each thread does at a time.
+    :returns: Array of values at each metallicity pair.
+    :rtype: np.ndarray
+    """
+    n = len(Z_Ia)
+    out = np.empty(n, dtype=np.float64)
+
+    def evaluate_block(start):
+        end = min(start + block_size, n)
+        out[start:end] = func(Z_Ia[start:end], Z_II[start:end], *args)
+
+    with ThreadPoolExecutor(n_threads) as executor:
+        # list() makes sure any errors get raised here
+        list(executor.map(evaluate_block, range(0, n, block_size)))
+
+    return out
@@ -0,0 +1,140 @@
+import importlib
+import re
+
+__all__ = ["ModelFamily", "register_model_family", "model_families",
+           "get_model_family", "available_models", "is_valid_model"]
+
+# All the model families that have been registered, in the order they were
+# registered. The keys are the family names.
+_families = dict()
+
+
+class ModelFamily(object):
+    """Information about a family of yield models, like all the Iwamoto 1999
+    Type Ia models, and how to load them.
+
+    Everything here is known without reading any data files, so looking
+    through the families is cheap. The loader is only imported and run when a
+    model is actually created."""
+    def __init__(self, name, pattern, loader, models, metallicities=None,
+                 masses=None, data_files=None):
+        """Create the family. See `register_model_family`."""
+        self.name = name
+        self.pattern = re.compile(pattern)
+        self._loader = loader
+        self.models = list(models)
+        self._model_set = set(self.models)
+        self.metallicities = metallicities
+        self.masses = masses if masses is not None else dict()
+        self.data_files = list(data_files) if data_files is not None else []
+
+    def __repr__(self):
+        return "ModelFamily({})".format(self.name)
+
+    def matches(self, model_set):
+        """Whether this name looks like it belongs to this family. It still
+        may not be a model that exists. """
+        return self.pattern.fullmatch(model_set) is not None
+
+    def has_model(self, model_set):
+        """Whether this model is in this family."""
+        return model_set in self._model_set
+
+    @property
+    def loader(self):
+        """The function that loads a model into a Yields object. If it was
+        registered as a string, this is where the import happens."""
+        if isinstance(self._loader, str):
+            module_name, func_name = self._loader.split(":")
+            module = importlib.import_module(module_name)
+            self._loader = getattr(module, func_name)
+        return self._loader
+
+    def load(self, yields_obj, model_set):
+        """Put the data for this model into a Yields object.
+
+        :param yields_obj: Yields object to fill.
+        :param model_set: Name of the model.
+        """
+        self.loader(yields_obj, model_set)
+
+
+def register_model_family(name, pattern, loader, models, metallicities=None,
+                          masses=None, data_files=None):
+    """Add a new family of models that Yields objects can use.
+
+    Registering a family with the same name as an existing one replaces it.
+
+    :param name: Name of the family, like "iwamoto_99_Ia".
+    :type name: str
+    :param pattern: Regular expression that all model names in this family
+                    match, like "iwamoto_99_Ia_.*". This is used to give
+                    good error messages for names that look like they are in
+                    the family but aren't.
+    :type pattern: str
+    :param loader: Function that takes a Yields object and the name of the
+                   model, and fills the Yields object with the data. This can
+                   also be a string like "package.module:function", in which
+                   case the module is only imported the first time a model
+                   from this family is created.
+    :param models: List of all the model names in this family.
+    :param metallicities: Metallicities at which the models are tabulated.
+    :param masses: Dictionary of the stellar mass of each model, for families
+                   where that makes sense.
+    :param data_files: Files in the data directory the loader reads. These are
+                       checksummed in the model catalogue.
+    :returns: The ModelFamily object that was registered.
+    """
+    family = ModelFamily(name, pattern, loader, models, metallicities, masses,
+                         data_files)
+    _families[name] = family
+    return family
+
+
+def model_families():
+    """Get all the registered model families.
+
+    :returns: List of ModelFamily objects.
+    """
+    return list(_families.values())
+
+
+def get_model_family(model_set):
+    """Find the family a model belongs to.
+
+    :param model_set: Name of the model, like "iwamoto_99_Ia_W7".
+    :returns: ModelFamily object
+    :raises ValueError: If no family has this model.
+    """
+    # go backwards so families registered later take precedence
+    for family in reversed(list(_families.values())):
+        if family.has_model(model_set):
+            return family
+    for family in reversed(list(_families.values())):
+        if family.matches(model_set):
+            raise ValueError("This model was not found: {}".format(model_set))
+    raise ValueError("This model is not supported. Make sure you\n" +
+                     "entered it correctly.")
+
+
+def available_models(family=None):
+    """List the names of all models that can be used.
+
+    :param family: Only list the models in the family with this name. The
+                   default of None lists the models in all families.
+    :returns: List of model names.
+    """
+    if family is not None:
+        return list(_families[family].models)
+    return [model for family in _families.values()
+            for model in family.models]
+
+
+def is_valid_model(model_set):
+    """Check whether a model exists, without loading anything.
+
+    :param model_set: Name of the model.
+    :rtype: bool
+    """
+    return any([family.has_model(model_set)
+                for family in _families.values()])
@@ -0,0 +1,398 @@
+"""
+Tables of the mass and elements returned by simple stellar populations (SSPs)
+over time, for use in hydrodynamics codes.
+
+A table holds the rate at which one solar mass of stars returns mass to the
+gas, as a function of the age and metallicity of the stars, for each of
+massive stars (Type II supernovae), AGB stars, and Type Ia supernovae. The
+whole (age x metallicity) grid is made at once:
+
+- The yields of each individual model (like "nomoto_06_II_20") are
+  interpolated to all the metallicities with `Yields.yields_table`, then
+  interpolated in mass onto a fine grid of masses, per unit of stellar mass.
+- Multiplying by the IMF and adding up from the top of the mass range gives
+  the ejecta of all stars above each mass.
+- The stars dying at each age are the ones above the turnoff mass from
+  `lifetimes.turnoff_mass`, so looking up the ejecta at the turnoff mass of
+  each age and taking differences gives the rate in each age bin.
+- Type Ia supernovae use a delay time distribution from `delay_times`.
+
+The tables can be written to a binary file that's read with a single memory
+map. Masses are in solar masses and times in Gyr.
+"""
+import json
+import mmap
+import struct
+
+import numpy as np
+
+from .delay_times import PowerLawDTD
+from .imf import KroupaIMF
+from .lifetimes import turnoff_mass
+from .registry import get_model_family
+from .yields_base import Yields, _metallicity_log
+
+__all__ = ["ssp_format_version", "SSPTable", "read_ssp_table",
+           "make_ssp_table"]
+
+# identifies the file format
+_ssp_magic = b"YLDSSPT1"
+ssp_format_version = 1
+
+# the table starts at a multiple of this many bytes from the start of the file
+_alignment = 64
+
+# number of masses in the fine grid each channel is integrated over
+_n_fine_masses = 512
+
+
+def _default_II_models():
+    """The Nomoto 2006 individual models, without the hypernovae."""
+    return [model for model in
+            get_model_family("nomoto_06_II_13").models
+            if not model.endswith("_hn")]
+
+
+def _default_AGB_models(transition_mass):
+    """The NuGrid models below the massive stars."""
+    family = get_model_family("nugrid_1")
+    return [model for model in family.models
+            if family.masses[model] < transition_mass]
+
+
+def _model_mass(model_set):
+    """Get the stellar mass of an individual model from the registry."""
+    mass = get_model_family(model_set).masses.get(model_set)
+    if mass is None:
+        raise ValueError("{} is not a model of a single stellar mass."
+                         .format(model_set))
+    return mass
+
+
+def _metallicity_points(models):
+    """Get all the metallicity points any of some models have. The yields of
+    each model are linear in log(Z) between these.
+
+    These come from the model catalogue, or the registry for models that
+    aren't in it, so the models only have to be loaded if neither has
+    them."""
+    # the catalogue is only needed here, so only import it if it's used
+    from .model_catalogue import catalogue
+
+    catalogue_models = catalogue()["models"]
+    metallicities = set()
+    for model in models:
+        if model in catalogue_models:
+            metallicities.update(catalogue_models[model]["metallicities"])
+            continue
+        family_metallicities = get_model_family(model).metallicities
+        if family_metallicities is not None:
+            metallicities.update(family_metallicities)
+        else:
+            metallicities.update(Yields(model).metallicity_points)
+    return np.array(sorted(metallicities))
+
+
+def _ejecta_table(models, quantities, metallicities):
+    """Get the ejecta per unit stellar mass of several models at several
+    metallicities.
+
+    :param models: list of individual model names
+    :param quantities: "total" (for all the ejecta), then the elements
+    :param metallicities: 1D array of metallicities
+    :returns: array of the model masses in increasing order, and array of the
+              ejecta per unit stellar mass with shape (model, metallicity,
+              quantity).
+    """
+    masses = np.array([_model_mass(model) for model in models])
+    order = np.argsort(masses)
+    table = []
+    for idx in order:
+        yields_obj = Yields(models[idx])
+        totals = yields_obj.ejecta_sum(metallicity=metallicities)
+        elements = yields_obj.yields_table(quantities[1:], metallicities)
+        table.append(np.concatenate([totals[:, np.newaxis], elements],
+                                    axis=1) / masses[idx])
+    return masses[order], np.array(table)
+
+
+def _cumulative_ejecta(models, quantities, metallicities, imf, min_mass,
+                       max_mass):
+    """Get the total ejecta of all the stars above each mass, per solar mass
+    of stars formed.
+
+    :param models: individual models for this channel
+    :param quantities: "total" (for all the ejecta), then the elements
+    :param metallicities: 1D array of metallicities
+    :param imf: IMF object
+    :param min_mass: lowest mass of stars in this channel
+    :param max_mass: highest mass of stars in this channel
+    :returns: array of the fine grid of masses, and array of the ejecta of
+              the stars above each of them, with shape (mass, metallicity,
+              quantity)
+    """
+    model_masses, specific = _ejecta_table(models, quantities, metallicities)
+
+    # Interpolate the ejecta per unit mass onto the fine grid. Using the
+    # ejecta per unit mass holds the ratio of the ejecta to the stellar mass
+    # fixed outside the range of the models, which works better than holding
+    # the ejecta fixed.
+    fine = np.geomspace(min_mass, max_mass, _n_fine_masses)
+    if len(model_masses) == 1:
+        fine_specific = np.repeat(specific, len(fine), axis=0)
+    else:
+        idx = np.clip(np.searchsorted(model_masses, fine) - 1, 0,
+                      len(model_masses) - 2)
+        weight = np.clip((fine - model_masses[idx]) /
+                         (model_masses[idx + 1] - model_masses[idx]), 0, 1)
+        weight = weight[:, np.newaxis, np.newaxis]
+        fine_specific = specific[idx] * (1 - weight) + \
+            specific[idx + 1] * weight
+
+    # the mass ejected per unit stellar mass, per solar mass formed
+    integrand = (imf.number(fine) * fine)[:, np.newaxis, np.newaxis] * \
+        fine_specific
+    # add up the trapezoids from the top, so above[i] is everything above
+    # fine[i]
+    trapezoids = 0.5 * (integrand[1:] + integrand[:-1]) * \
+        np.diff(fine)[:, np.newaxis, np.newaxis]
+    above = np.zeros(integrand.shape)
+    above[:-1] = np.cumsum(trapezoids[::-1], axis=0)[::-1]
+    return fine, above
+
+
+def _ejecta_above(fine, above, turnoff, z_idx, z_weight=None):
+    """Look up the results of _cumulative_ejecta at some turnoff masses.
+
+    :param fine: fine grid of masses, evenly spaced in log(mass)
+    :param above: ejecta above each mass in the fine grid
+    :param turnoff: array of turnoff masses
+    :param z_idx: array of the metallicity index in the table to use for
+                  each turnoff mass, which broadcasts with them
+    :param z_weight: array of the weight of the metallicity after z_idx, to
+                     interpolate between the two in log(Z). The default of
+                     None only uses z_idx.
+    :returns: array with the shape of the turnoff masses plus one more axis
+              for the quantities
+    """
+    # the fine grid is evenly spaced in log(mass), so we can find where the
+    # turnoff masses are without searching
+    turnoff = np.clip(turnoff, fine[0], fine[-1])
+    position = np.log(turnoff / fine[0]) / np.log(fine[1] / fine[0])
+    idx = np.clip(position.astype(int), 0, len(fine) - 2)
+    weight = ((turnoff - fine[idx]) / (fine[idx + 1] - fine[idx]))
+    weight = weight[..., np.newaxis]
+
+    # with the table flattened, each corner is a single lookup
+    n_z = above.shape[1]
+    flat = above.reshape(-1, above.shape[-1])
+    lower_m = idx * n_z
+    upper_m = lower_m + n_z
+    values = flat[lower_m + z_idx] * (1 - weight) + \
+        flat[upper_m + z_idx] * weight
+    if z_weight is None:
+        return values
+
+    upper_z = np.minimum(z_idx + 1, n_z - 1)
+    z_weight = z_weight[..., np.newaxis]
+    upper = flat[lower_m + upper_z] * (1 - weight) + \
+        flat[upper_m + upper_z] * weight
+    return values * (1 - z_weight) + upper * z_weight
+
+
+class SSPTable(object):
+    """Rates at which a simple stellar population returns mass, on a grid of
+    ages and metallicities.
+
+    The rates are in solar masses per Gyr per solar mass of stars formed. The
+    array has shape (metallicity, age bin, channel, quantity), where the
+    quantities are the total mass followed by each element.
+    """
+    def __init__(self, age_edges, metallicities, channels, quantities, rates):
+        """
+        :param age_edges: Edges of the age bins in Gyr, one more than the
+                          number of bins.
+        :param metallicities: Metallicities of the table.
+        :param channels: Names of the channels, like ["II", "AGB", "Ia"].
+        :param quantities: Names of the quantities, like ["total", "Fe"].
+        :param rates: Array of the rates, see above.
+        """
+        self.age_edges = np.asarray(age_edges, dtype=np.float64)
+        self.metallicities = np.asarray(metallicities, dtype=np.float64)
+        self.channels = list(channels)
+        self.quantities = list(quantities)
+        self.rates = rates
+
+    def index(self, age, metallicity):
+        """Find where some populations are in the table.
+
+        :param age: Age in Gyr, which can be an array.
+        :param metallicity: Metallicity, which can be an array that broadcasts
+                            with the age.
+        :returns: Array of the index of the nearest metallicity (in log Z),
+                  and array of the index of the age bin each age is in. Ages
+                  outside the table have an index of -1.
+        """
+        age = np.asarray(age, dtype=np.float64)
+        metallicity = np.asarray(metallicity, dtype=np.float64)
+        age_idx = np.searchsorted(self.age_edges, age, side="right") - 1
+        age_idx = np.where(age_idx >= len(self.age_edges) - 1, -1, age_idx)
+
+        log_z_points = _metallicity_log(self.metallicities)
+        log_z = _metallicity_log(metallicity).reshape(metallicity.shape)
+        # the midpoints between the metallicities separate the nearest ones
+        midpoints = 0.5 * (log_z_points[1:] + log_z_points[:-1])
+        z_idx = np.searchsorted(midpoints, log_z)
+        return np.broadcast_arrays(z_idx, age_idx)
+
+    def lookup(self, age, metallicity, channel=None):
+        """Get the rates for some populations, using the nearest metallicity
+        and the age bin they are in.
+
+        :param age: Age in Gyr, which can be an array.
+        :param metallicity: Metallicity, which can be an array that broadcasts
+                            with the age.
+        :param channel: Name of one channel to get the rates of. The default
+                        of None adds all the channels together.
+        :returns: Array with the shape of the ages plus one more axis for the
+                  quantities. Ages outside the table give zeros.
+        """
+        z_idx, age_idx = self.index(age, metallicity)
+        if channel is None:
+            rates = np.sum(self.rates[z_idx, age_idx], axis=-2)
+        else:
+            rates = self.rates[z_idx, age_idx,
+                               self.channels.index(channel)]
+        return np.where((age_idx >= 0)[..., np.newaxis], rates, 0)
+
+    def write(self, filename):
+        """Write the table to a binary file.
+
+        The layout is:
+
+        - 8 bytes: the characters "YLDSSPT1"
+        - uint32: format version
+        - uint32: unused, always zero
+        - uint64: length of the header in bytes
+        - the header, which is JSON text padded with spaces so the table is
+          aligned. It holds the age bin edges, metallicities, channels,
+          quantities, and the shape of the table.
+        - The rates, as little endian float64 in C order with shape
+          (metallicity, age bin, channel, quantity). This starts at a
+          multiple of 64 bytes.
+
+        :param filename: Where to write the table.
+        """
+        header = {"format_version": ssp_format_version,
+                  "age_edges": [float(age) for age in self.age_edges],
+                  "metallicities": [float(z) for z in self.metallicities],
+                  "channels": self.channels,
+                  "quantities": self.quantities,
+                  "shape": list(self.rates.shape),
+                  "units": "Msun / Gyr / Msun formed"}
+        header_bytes = json.dumps(header, sort_keys=True).encode("utf-8")
+        data_start = -(-(len(_ssp_magic) + 16 + len(header_bytes)) //
+                       _alignment) * _alignment
+        header_bytes = header_bytes.ljust(data_start - len(_ssp_magic) - 16,
+                                          b" ")
+        with open(filename, "wb") as out_file:
+            out_file.write(_ssp_magic)
+            out_file.write(struct.pack("<IIQ", ssp_format_version, 0,
+                                       len(header_bytes)))
+            out_file.write(header_bytes)
+            out_file.write(np.ascontiguousarray(self.rates,
+                                                dtype="<f8").tobytes())
+
+
+def read_ssp_table(filename):
+    """Read a table written by `SSPTable.write`.
+
+    The rates are a read-only view into the memory mapped file.
+
+    :param filename: Location of the table.
+    :returns: SSPTable object.
+    """
+    with open(filename, "rb") as in_file:
+        if in_file.read(len(_ssp_magic)) != _ssp_magic:
+            raise ValueError("This is not an SSP table.")
+        version, _, header_length = struct.unpack("<IIQ", in_file.read(16))
+        if version != ssp_format_version:
+            raise ValueError("This SSP table has the wrong format version.")
+        header = json.loads(in_file.read(header_length).decode("utf-8"))
+        data_start = len(_ssp_magic) + 16 + header_length
+        mapped = mmap.mmap(in_file.fileno(), 0, access=mmap.ACCESS_READ)
+    shape = tuple(header["shape"])
+    rates = np.frombuffer(mapped, dtype="<f8", count=int(np.prod(shape)),
+                          offset=data_start).reshape(shape)
+    return SSPTable(header["age_edges"], header["metallicities"],
+                    header["channels"], header["quantities"], rates)
+
+
+def make_ssp_table(age_edges, metallicities, elements, II_models=None,
+                   AGB_models=None, Ia_type="iwamoto_99_Ia_W7", imf=None,
+                   Ia_dtd=None, n_Ia=2.2E-3, transition_mass=8.0):
+    """Make the table of return rates for simple stellar populations.
+
+    :param age_edges: Increasing edges of the age bins in Gyr. The rates are
+                      the average over each bin.
+    :param metallicities: Metallicities to make the table at.
+    :param elements: Elements (like "Fe") or isotopes (like "Fe_56") to
+                     include. The total mass is always included first.
+    :param II_models: List of individual massive star models, which are used
+                      from the transition mass to the top of the IMF. The
+                      default is the Nomoto 2006 models without hypernovae.
+    :param AGB_models: List of individual AGB models, which are used from the
+                       bottom of the IMF to the transition mass. The default
+                       is the NuGrid models below the transition mass.
+    :param Ia_type: Model set for Type Ia supernovae.
+    :param imf: IMF object. The default is `imf.KroupaIMF()`.
+    :param Ia_dtd: DelayTimeDistribution object for Type Ia supernovae. The
+                   default is a power law with slope -1.1 starting at 150 Myr.
+    :param n_Ia: Number of Type Ia supernovae per solar mass formed.
+    :param transition_mass: Mass separating AGB stars from massive stars.
+    :returns: SSPTable object.
+    """
+    age_edges = np.asarray(age_edges, dtype=np.float64)
+    metallicities = np.asarray(metallicities, dtype=np.float64)
+    if age_edges.ndim != 1 or len(age_edges) < 2 or \
+            np.any(np.diff(age_edges) <= 0) or age_edges[0] < 0:
+        raise ValueError("age_edges must be increasing, non-negative, and "
+                         "have at least two edges.")
+    if metallicities.ndim != 1 or np.any(metallicities < 0) or \
+            np.any(metallicities > 1):
+        raise ValueError("Metallicities must be a 1D array between 0 and 1.")
+    if imf is None:
+        imf = KroupaIMF()
+    if Ia_dtd is None:
+        Ia_dtd = PowerLawDTD()
+    if II_models is None:
+        II_models = _default_II_models()
+    if AGB_models is None:
+        AGB_models = _default_AGB_models(transition_mass)
+    quantities = ["total"] + list(elements)
+
+    turnoff = turnoff_mass(age_edges[np.newaxis, :],
+                           metallicities[:, np.newaxis])
+    widths = np.diff(age_edges)[np.newaxis, :, np.newaxis]
+
+    z_idx = np.arange(len(metallicities))[:, np.newaxis]
+
+    rates = []
+    for models, min_mass, max_mass in [
+            (II_models, transition_mass, imf.max_mass),
+            (AGB_models, imf.min_mass, transition_mass)]:
+        fine, above = _cumulative_ejecta(models, quantities, metallicities,
+                                         imf, min_mass, max_mass)
+        returned = _ejecta_above(fine, above, turnoff, z_idx)
+        rates.append(np.diff(returned, axis=1) / widths)
+
+    ia = Yields(Ia_type)
+    ia_ejecta = np.concatenate(
+        [ia.ejecta_sum(metallicity=metallicities)[:, np.newaxis],
+         ia.yields_table(elements, metallicities)], axis=1)
+    ia_fraction = np.diff(Ia_dtd.cumulative(age_edges))
+    rates.append(n_Ia * ia_ejecta[:, np.newaxis, :] *
+                 ia_fraction[np.newaxis, :, np.newaxis] / widths)
+
+    return SSPTable(age_edges, metallicities, ["II", "AGB", "Ia"],
+                    quantities, np.stack(rates, axis=2))
@@ -0,0 +1,211 @@
+"""
+Yields of star particles made of individual stars drawn from the IMF.
+
+For low mass star particles the IMF averaged yields are a poor description,
+since a particle of a few hundred solar masses only has a few massive stars.
+Here each particle gets a Poisson number of stars in the mass range of the
+models, with the expected number set by its mass and the IMF. Their masses
+are drawn from the IMF, and the yields of each star come from interpolating
+the individual models (like "nomoto_06_II_20") in mass and log(Z).
+
+All the stars of many particles are drawn at once and kept in one flat
+array, ordered by particle. The yields of each particle are then a segmented
+sum over that array.
+"""
+import numpy as np
+
+from .imf import KroupaIMF
+from .registry import available_models, model_families
+from .ssp import _default_II_models, _ejecta_table, _metallicity_points, \
+    _model_mass
+from .yields_base import _log_z_weights, _metallicity_log
+
+__all__ = ["StochasticYields"]
+
+
+def _family_models(family):
+    """Get one model for each mass in a family of individual models, leaving
+    out the hypernovae and the IMF averaged models. When there are several
+    models of the same mass (like "ww_95_II_25A" and "ww_95_II_25B") the first
+    one is used."""
+    if family not in [each.name for each in model_families()]:
+        raise ValueError("There is no model family called {}.".format(family))
+    models = dict()
+    for model in available_models(family):
+        if model.endswith("_hn"):
+            continue
+        try:
+            models.setdefault(_model_mass(model), model)
+        except ValueError:
+            continue
+    if len(models) == 0:
+        raise ValueError("{} has no individual models.".format(family))
+    return list(models.values())
+
+
+class StochasticYields(object):
+    """Yields of star particles with their stars sampled from the IMF."""
+    # how many particles to do at once. This limits the size of the temporary
+    # arrays.
+    _block_size = 65536
+
+    def __init__(self, elements, models=None, imf=None, min_mass=8.0,
+                 max_mass=None):
+        """Set up the sampler.
+
+        :param elements: Elements (like "Fe") or isotopes (like "Fe_56") to
+                         find the yields of.
+        :param models: Individual models to use. This is either a list of
+                       model names, or the name of a family of individual
+                       models, like "nomoto_06_II_individual",
+                       "kobayashi_06_II", "ww_95_II", or "nugrid". The
+                       default is the Nomoto 2006 models without
+                       hypernovae.
+        :param imf: IMF object. The default is `imf.KroupaIMF()`.
+        :param min_mass: Only stars above this mass are drawn.
+        :param max_mass: Only stars below this mass are drawn. The default is
+                         the top of the IMF. Outside the masses of the models,
+                         the yields per unit stellar mass of the closest model
+                         are used.
+        """
+        if imf is None:
+            imf = KroupaIMF()
+        if models is None:
+            models = _default_II_models()
+        elif isinstance(models, str):
+            models = _family_models(models)
+        self.imf = imf
+        self.elements = list(elements)
+        self.models = list(models)
+        self.min_mass = max(min_mass, imf.min_mass)
+        self.max_mass = imf.max_mass if max_mass is None else \
+            min(max_mass, imf.max_mass)
+        # the expected number of stars per solar mass formed
+        self.stars_per_mass = imf.number_between(self.min_mass, self.max_mass)
+
+        self.metallicities = _metallicity_points(self.models)
+        self._log_z = _metallicity_log(self.metallicities)
+        self._masses, self._specific = _ejecta_table(
+            self.models, ["total"] + self.elements, self.metallicities)
+
+    def sample_stars(self, particle_masses, rng):
+        """Draw the stars in some particles.
+
+        :param particle_masses: Array of the masses of the particles.
+        :param rng: numpy.random.Generator to draw with.
+        :returns: Array of the number of stars in each particle, and array of
+                  the masses of all the stars, ordered by particle.
+        """
+        counts = rng.poisson(np.asarray(particle_masses) *
+                             self.stars_per_mass)
+        stars = self.imf.sample(int(np.sum(counts)), rng, self.min_mass,
+                                self.max_mass)
+        return counts, stars
+
+    def _star_ejecta(self, stars, z_idx, z_weight):
+        """Get the yields of individual stars, with the total in the first
+        column."""
+        n_models = len(self._masses)
+        if n_models == 1:
+            m_idx = np.zeros(len(stars), dtype=int)
+            m_weight = np.zeros(len(stars))
+        else:
+            m_idx = np.clip(np.searchsorted(self._masses, stars) - 1, 0,
+                            n_models - 2)
+            m_weight = np.clip((stars - self._masses[m_idx]) /
+                               (self._masses[m_idx + 1] -
+                                self._masses[m_idx]), 0, 1)
+        upper_m = np.minimum(m_idx + 1, n_models - 1)
+        upper_z = np.minimum(z_idx + 1, len(self.metallicities) - 1)
+        m_weight = m_weight[:, np.newaxis]
+        z_weight = z_weight[:, np.newaxis]
+        specific = (self._specific[m_idx, z_idx] * (1 - m_weight) +
+                    self._specific[upper_m, z_idx] * m_weight) * \
+            (1 - z_weight) + \
+            (self._specific[m_idx, upper_z] * (1 - m_weight) +
+             self._specific[upper_m, upper_z] * m_weight) * z_weight
+        return stars[:, np.newaxis] * specific
+
+    def _evaluate(self, particle_masses, metallicities, rng):
+        """Get the total yields and the yields of each element, as one array
+        with the total in the first column, along with the number of stars
+        in each particle."""
+        if not isinstance(rng, np.random.Generator):
+            rng = np.random.default_rng(rng)
+        particle_masses, metallicities = [
+            np.ravel(array) for array in np.broadcast_arrays(
+                np.asarray(particle_masses, dtype=np.float64),
+                np.asarray(metallicities, dtype=np.float64))]
+        if np.any(particle_masses < 0):
+            raise ValueError("Particle masses can't be negative.")
+        if np.any(metallicities < 0) or np.any(metallicities > 1):
+            raise ValueError("Metallicity must be between zero and one.")
+
+        n_particles = len(particle_masses)
+        result = np.zeros((n_particles, len(self.elements) + 1))
+        all_counts = np.zeros(n_particles, dtype=int)
+        for start in range(0, n_particles, self._block_size):
+            block = slice(start, start + self._block_size)
+            counts, stars = self.sample_stars(particle_masses[block], rng)
+            all_counts[block] = counts
+            if len(stars) == 0:
+                continue
+
+            # each star gets the metallicity of its particle
+            z_idx, z_weight = _log_z_weights(
+                self._log_z, _metallicity_log(metallicities[block]))
+            z_idx = np.repeat(z_idx, counts)
+            z_weight = np.repeat(z_weight, counts)
+            ejecta = self._star_ejecta(stars, z_idx, z_weight)
+
+            # the stars are in order of their particles, so each particle is
+            # one segment of the array. reduceat doesn't handle empty
+            # segments, so we only do the particles with stars.
+            has_stars = counts > 0
+            starts = (np.cumsum(counts) - counts)[has_stars]
+            block_result = np.zeros((len(counts), ejecta.shape[1]))
+            block_result[has_stars] = np.add.reduceat(ejecta, starts, axis=0)
+            result[block] = block_result
+        return result, all_counts
+
+    def sample_particles(self, particle_masses, metallicities, rng=None):
+        """Draw the stars of star particles from the IMF, and get everything
+        about their ejecta from that one draw.
+
+        :param particle_masses: Masses of the particles. This can be an
+                                array.
+        :param metallicities: Metallicities of the particles. This can be an
+                              array that broadcasts with the masses.
+        :param rng: numpy.random.Generator, or a seed to make one with. Using
+                    the same seed gives the same stars.
+        :returns: Array of the total ejecta of each particle, array of shape
+                  (n_particles, n_elements) with the yields of each element,
+                  and array of the number of stars drawn in each particle.
+        """
+        result, counts = self._evaluate(particle_masses, metallicities, rng)
+        return result[:, 0], result[:, 1:], counts
+
+    def ejecta(self, particle_masses, metallicities, rng=None):
+        """Get the yields of star particles, drawing their stars from the
+        IMF. See `sample_particles` for the arguments.
+
+        Each call draws new stars, so use `sample_particles` to get the yields
+        and the total ejecta of the same stars.
+
+        :returns: Array of shape (n_particles, n_elements).
+        """
+        return self.sample_particles(particle_masses, metallicities, rng)[1]
+
+    def total_ejecta(self, particle_masses, metallicities, rng=None):
+        """Get the total mass ejected by star particles, along with the number
+        of stars in each. See `sample_particles` for the arguments.
+
+        Each call draws new stars, so use `sample_particles` to get the yields
+        and the total ejecta of the same stars.
+
+        :returns: Array of the total ejecta of each particle, and array of
+                  the number of stars drawn in each.
+        """
+        total, _, counts = self.sample_particles(particle_masses,
+                                                 metallicities, rng)
+        return total, counts
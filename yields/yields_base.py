@@ -1,141 +1,14 @@
-import os
 from collections import defaultdict
-import sys
 
-from scipy import interpolate
 import numpy as np
 
-iwamoto_file = "iwamoto_99_Ia_yields.txt"
+from .registry import get_model_family
 
-nomoto_file = "nomoto_06_imf_weighted_II.txt"
+__all__ = ["Yields"]
 
-my_nomoto_ave_file = "nomoto_06_imf_weighted_II_my_ave.txt"
-my_nomoto_hn_file = "nomoto_06_imf_weighted_II_my_hn.txt"
-my_nomoto_reg_file = "nomoto_06_imf_weighted_II_my_no_hn.txt"
-my_ww_file = "ww_95_imf_weighted_II.txt"
-
-nomoto_ind_0 = "nomoto_individual/z_0.txt"
-nomoto_ind_0_001 = "nomoto_individual/z_0.001.txt"
-nomoto_ind_0_004 = "nomoto_individual/z_0.004.txt"
-nomoto_ind_0_02 = "nomoto_individual/z_0.02.txt"
-
-nomoto_ind_0_hn = "nomoto_individual/z_0_hn.txt"
-nomoto_ind_0_001_hn = "nomoto_individual/z_0.001_hn.txt"
-nomoto_ind_0_004_hn = "nomoto_individual/z_0.004_hn.txt"
-nomoto_ind_0_02_hn = "nomoto_individual/z_0.02_hn.txt"
-
-kobayashi_sn = "kobayashi_individual/sn_ejecta.txt"
-kobayashi_hn = "kobayashi_individual/hn_ejecta.txt"
-
-ww_ind_sol_a = "ww_individual/ww95_5a.txt"
-ww_ind_sol_b = "ww_individual/ww95_5b.txt"
-ww_ind_0_1_sol_a = "ww_individual/ww95_10a.txt"
-ww_ind_0_1_sol_b = "ww_individual/ww95_10b.txt"
-ww_ind_0_01_sol_a = "ww_individual/ww95_12a.txt"
-ww_ind_0_01_sol_b = "ww_individual/ww95_12b.txt"
-ww_ind_4_sol_a = "ww_individual/ww95_14a.txt"
-ww_ind_4_sol_b = "ww_individual/ww95_14b.txt"
-ww_ind_0_a = "ww_individual/ww95_16a.txt"
-ww_ind_0_b = "ww_individual/ww95_16b.txt"
-
-nugrid_agb = "nugrid_agb/isotope_yield_table_MESAonly_fryer12_delay_winds.txt"
-
-nomoto_w7 = "nomoto_18_Ia.txt"
-
-def _get_data_path(data_file):
-    """Returns the path of the Iwamoto input file on this machine.
-    
-    We know the relative path of it compared to this file, so it's easy to
-    know where it is."""
-    this_file_dir = os.path.dirname(__file__)
-    return this_file_dir + "/data/{}".format(data_file)
-
-sys.path.append(_get_data_path("nugrid_agb/"))
-import read_yields
-
-def _parse_iwamoto_element(original_string):
-    """Parses the LaTeX formatted string into an element that the code can use
-
-    The original format is like "^{12}C". To parse this, we just find the 
-    location of the brackets, then use that to know where the number and name
-    are. This holds no matter how long the elemental names or numbers are"""
-
-    first_bracket = original_string.index("{")
-    second_bracket = original_string.index("}")
-    # then use those locations to get the actual values we need.
-    number = original_string[first_bracket + 1:second_bracket]
-    name = original_string[second_bracket + 1:]
-    return "{}_{}".format(name, number)
-
-def _parse_nomoto_element(number, name):
-    """The Nomoto 2006 file has a separate column for the name and the 
-    mass number, so we can take those and turn them into one thing like
-    the code wants. One minor hassle is that the file uses "p" and "d" for
-    Hydrogen and Deuterium, respectively."""
-    if number == "01" and name == "p":
-        return "H_1"
-    elif number == "02" and name == "d":
-        return "H_2"
-    else:
-        return "{}_{}".format(name, number.lstrip("0"))
-
-def _parse_nomoto_individual_element(name):
-    """The file has elements in the format NumberName, like 9Be or 22Na"""
-    if name == "p":
-        return "H_1"
-    elif name == "d":
-        return "H_2"
-    else:
-        # we have to know where to put the underscore
-        if name[1].isalpha():
-            num = name[0]
-            sym = name[1:]
-        else:
-            num = name[0:2]
-            sym = name[2:]
-        return "{}_{}".format(sym, num)
-
-def _parse_kobayashi_individual_element(name):
-    """
-    Take the raw value for the elements in the data file and format it nicely.
-
-    :param name: The raw value for the element
-    :type name: str
-    :return: Nicely formatted value for the element.
-    :rtype: str
-    """
-    # other than p and d, elements are in the format of ^mass_number^elt_name
-    if name == "p":
-        return "H_1"
-    elif name == "d":
-        return "H_2"
-    else:
-        # we have to know where to put the underscore
-        _, num, sym = name.split("^")
-        return "{}_{}".format(sym, num)
-
-def _parse_iwamoto_model(full_name):
-    """Parses the full name to get the needed model.
-    
-    :param full_name: Name of the model, in the format "iwamoto_99_Ia_MODEL" 
-                      The valid names for MODEL are "W7", "W70", "WDD1", 
-                      "WDD2", "WDD3", "CDD1", and "CDD2". 
-    :returns: name of the model being used
-    :rtype: str
-    """
-    # first check that the beginning is what we want
-    if full_name[:14] != "iwamoto_99_Ia_":
-        raise ValueError("This is not an Iwamoto model.")
-
-    # we can then get the portion that is the model name
-    model_name = full_name.split("_")[-1]
-
-    # then check that it is indeed the right model
-    acceptable_models = ["W7", "W70", "WDD1", "WDD2", "WDD3", "CDD1", "CDD2"]
-    if model_name in acceptable_models:
-        return model_name
-    else:
-        raise ValueError("Model supplied is not a valid Iwamoto 99 Ia model.")
+# Bump this whenever the way the data files are read changes, so that bundles
+# made with the old loaders aren't used.
+loader_version = 1
 
 
 def _metallicity_log(value):
@@ -151,16 +24,37 @@ def _metallicity_log(value):
     # chosen to that is is below the lowest metallicity value
     # in any of the models (lowest is 10^-4 z_sun in ww95).
 
-# store the known metallicity values
-z_values_nomoto = [0, 0.001, 0.004, 0.02]
-# to interpolate we need the log of that
-log_z_nomoto = _metallicity_log(z_values_nomoto)
+class _LogZInterpolator(object):
+    """Linear interpolation in log(Z), which returns the values of the nearest
+    model if the metallicity is outside the range of the models.
+
+    This does the same thing as scipy's interp1d with a constant fill value,
+    but it keeps the arrays it's given rather than copying them, so the yields
+    can be views into a larger table (like the binary data bundle)."""
+    def __init__(self, log_z, values):
+        """
+        :param log_z: increasing array of log(Z) of the models
+        :param values: array of the values at each of those points
+        """
+        self.x = log_z
+        self.y = values
+
+    def __call__(self, log_z):
+        return np.interp(log_z, self.x, self.y)
+
+    def slope(self, log_z):
+        """Get the derivative with respect to log(Z). This is zero outside
+        the range of the models, where the values are constant. Exactly at a
+        model, the slope of the segment above it is used."""
+        log_z = np.asarray(log_z, dtype=np.float64)
+        if len(self.x) == 1:
+            return np.zeros(log_z.shape)
+        slopes = np.diff(self.y) / np.diff(self.x)
+        idx = np.clip(np.searchsorted(self.x, log_z, side="right") - 1, 0,
+                      len(self.x) - 2)
+        inside = (log_z >= self.x[0]) & (log_z < self.x[-1])
+        return np.where(inside, slopes[idx], 0)
 
-# we know the metallicity of the models WW95 used
-z_sun_ww = 0.02
-z_values_ww = [0, (10**-4) * z_sun_ww, 0.01 * z_sun_ww, 0.1 * z_sun_ww, z_sun_ww]
-# to interpolate we need the log of that
-log_z_ww = _metallicity_log(z_values_ww)
 
 def _interpolation_wrapper(metallicities, abundances):
     """
@@ -172,27 +66,90 @@ def _interpolation_wrapper(metallicities, abundances):
                           corresponds with the abundances
     :param abundances: list of abundances for a given element. Each item 
                        corresponds with the metallicity in that location
-    :return: scipy.interpolate.interp1D object that can be called to find the 
+    :return: _LogZInterpolator object that can be called to find the
              appropriate abundance at the desired log(metallicity) value. 
              When doing things with this, be sure to convert to log of
              metallicity before calling this interpolation object. 
     """
-    # also need to fix the extrapolation, so that it retuns
-    # the values of the nearest model if the metallicity is
-    # outside the range of the models themselves
-    fill_values = (abundances[0], abundances[-1])
-    # ^ assumes the abundances are in increasing metallicity
+    # The extrapolation returns the values of the nearest model if the
+    # metallicity is outside the range of the models themselves. This
+    # assumes the abundances are in increasing metallicity.
     log_met = _metallicity_log(metallicities)
+    # the values sometimes come straight from the files as strings
+    values = np.asarray(abundances).astype(np.float64)
+
+    return _LogZInterpolator(log_met, values)
+
+
+def _log_slope_to_derivative(slope, metallicity):
+    """Turn a derivative with respect to log(Z) into one with respect to Z.
+    Zero metallicity is below all the models, so the derivative is zero
+    there."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(metallicity > 0,
+                        slope / (metallicity * np.log(10)), 0)
 
-    return interpolate.interp1d(log_met, abundances, kind="linear",
-                                bounds_error=False, fill_value=fill_values)
+
+def _log_z_weights(log_z_points, log_z):
+    """Find where some metallicities fall between the metallicity points of a
+    model, for doing the linear interpolation in log(Z) on whole tables.
+
+    Like _LogZInterpolator, metallicities outside the range of the models get
+    the values of the nearest model.
+
+    :param log_z_points: increasing array of log(Z) of the models
+    :param log_z: array of log(Z) to interpolate to
+    :returns: array of the index of the point below each metallicity, and
+              array of the weight (between 0 and 1) of the point above it.
+    """
+    log_z_points = np.asarray(log_z_points)
+    if len(log_z_points) == 1:
+        return (np.zeros(np.shape(log_z), dtype=int),
+                np.zeros(np.shape(log_z)))
+    idx = np.searchsorted(log_z_points, log_z, side="right") - 1
+    idx = np.clip(idx, 0, len(log_z_points) - 2)
+    weight = (log_z - log_z_points[idx]) / \
+             (log_z_points[idx + 1] - log_z_points[idx])
+    return idx, np.clip(weight, 0, 1)
 
 
 class Yields(object):
     """Class containing yields from supernovae"""
-    def __init__(self, model_set):
+    def __init__(self, model_set, use_bundle=True, resolution="isotope",
+                 species=None):
         """ Initialize the object, given the reference for the yields you'd like
-        to use."""
+        to use.
+
+        :param model_set: Name of the model. See `available_models` for the
+                          options.
+        :param use_bundle: Whether to get the yields from the binary data
+                           bundle, if this model is in it. If not, or if this
+                           is False, the yields are read from the original
+                           data files. This can also be the filename of a
+                           bundle made with `data_bundle.write_bundle`.
+        :param resolution: Either "isotope" to keep the yields of every
+                           isotope, or "element" to add the isotopes of each
+                           element together when the model is loaded. With
+                           "element", only the elements (like "Fe") are
+                           available, not the isotopes (like "Fe_56").
+        :param species: List of the isotopes (like "Fe_56") and elements (like
+                        "Fe") to keep. Asking for an element keeps all its
+                        isotopes. The default of None keeps everything. The
+                        total ejecta and metals are found from all the
+                        isotopes before the others are thrown away, so
+                        `ejecta_sum`, the normalization, and the mass
+                        fractions are the same as if everything was kept.
+        """
+        if resolution not in ["isotope", "element"]:
+            raise ValueError("resolution must be 'isotope' or 'element'.")
+        self.resolution = resolution
+        # this gets set once we throw away the other species
+        self.species = None
+        # the species to keep while loading (None keeps everything). The
+        # loaders only make interpolation objects for these, and the values of
+        # the others are only kept until the totals have been found.
+        self._keep = None if species is None else set(species)
+        self._skipped_values = dict()
 
         # the main functionality will be in two dictionaries. The
         # _abundances_interp one will hold interpolation objects, that are able
@@ -201,6 +158,14 @@ class Yields(object):
         self.mass = None
         self.abundances = dict()
         self._abundances_interp = dict()
+        self._metal_fractions_log_z = dict()
+        self._mass_fractions_log_z = dict()
+        # interpolation objects for the total ejecta (False) and total metals
+        # (True), which are needed when we only keep some of the species
+        self._ejecta_sum_log_z = dict()
+        self._scale_factor = 1.0
+        # tables of many species at the metallicity points, for yields_table
+        self._species_tables = dict()
         self.mass_cuts = dict()
         self.total_end_ejecta = dict()
         self.wind_ejecta = dict()
@@ -216,64 +181,28 @@ class Yields(object):
         # and that the user so far has not specified a normalization
         self.has_normalization = False
 
-        # then we can initialize the model set they are using.
-        if model_set == "test":
-            self.make_test()
-        elif model_set.startswith("iwamoto_99_Ia_"):
-            self.make_iwamoto_99_Ia(_parse_iwamoto_model(model_set))
-        elif model_set == "nomoto_18_Ia_W7":
-            self.make_nomoto_18_Ia()
-        elif model_set == "nomoto_06_II":
-            self.make_nomoto_06_II()
-        elif "imf" in model_set:
-            self.mass = "IMF"
-            if "nomoto" in model_set:
-                if "ave" in model_set:
-                    self.make_imf_integrated(my_nomoto_ave_file)
-                elif "no_hn" in model_set:
-                    self.make_imf_integrated(my_nomoto_reg_file)
-                elif "hn" in model_set:
-                    self.make_imf_integrated(my_nomoto_hn_file)
-                else:
-                    raise ValueError("Not recognized.")
-            elif "ww_95" in model_set:
-                self.make_imf_integrated(my_ww_file)
-            else:
-                raise ValueError("Not recognized.")
-
-
-        elif model_set.startswith("nomoto_06_II"):
-            if "hn" in model_set:
-                mass = model_set[-5:-3]
-                self.make_individual_nomoto_hn(mass)
-            else:
-                mass = model_set[-2:]
-                self.make_individual_nomoto_regular(mass)
-            self.mass = float(mass)
-
-        elif model_set.startswith("ww_95_II"):
-            model = model_set[9:]
-            self.make_individal_ww95(model)
-
-        elif model_set.startswith("kobayashi"):
-            if "hn" in model_set:
-                mass = model_set[-5:-3]
-                self.make_individual_kobayashi(mass, hn=True)
-            else:
-                mass = model_set[-2:]
-                self.make_individual_kobayashi(mass, hn=False)
-
-        elif model_set.startswith("nugrid"):
-             mass = model_set.split("_")[-1]
-             self.make_individual_agb_nugrid(mass)
-
-        else:
-            raise ValueError("This model is not supported. Make sure you\n" +
-                             "entered it correctly.")
-
-        # fix the WW 95 iron thing
-        if "ww_95" in model_set:
-            self._handle_iron_ww()
+        # then we can initialize the model set they are using. The registry
+        # knows which function loads each model, but if it's in the bundle we
+        # can get it from there much faster.
+        from .data_bundle import load_from_bundle
+
+        family = get_model_family(model_set)
+        if use_bundle is True:
+            use_bundle = None  # the default bundle
+        if use_bundle is False or \
+                not load_from_bundle(self, model_set, use_bundle):
+            family.load(self, model_set)
+
+        # the totals are needed for the normalization and mass fractions, so
+        # find them now, before any species are thrown away
+        if len(self._ejecta_sum_log_z) == 0:
+            self._create_ejecta_sums()
+        self._skipped_values = dict()
+
+        if resolution == "element":
+            self._collapse_isotopes()
+        if species is not None:
+            self._select_species(species)
 
         # all model sets have a zero metallicity option, so set the initial
         # metallicity to that. This takes care of the _set_member() call too.
@@ -282,8 +211,159 @@ class Yields(object):
         # we then want to keep track of the initial total metals
         self.total_metals = self.ejecta_sum(metal_only=True)
 
-        # then create the mass fraction objects
-        self._create_mass_fractions()
+        # then create the mass fraction objects, unless they came from the
+        # bundle already
+        if len(self._mass_fractions_log_z) == 0:
+            self._create_mass_fractions()
+
+    def _wanted(self, name):
+        """Whether an isotope or element is one of the species being kept.
+        See __init__."""
+        return self._keep is None or name in self._keep or \
+            name.split("_")[0] in self._keep
+
+    def _add_yields(self, name, values, metallicities=None):
+        """Store the yields of one isotope or element. The loaders use this so
+        that only the species that were asked for get interpolation objects.
+        The values of the others are kept until the totals have been found.
+
+        :param name: Name of the isotope (like "Fe_56") or element (like "Fe").
+        :param values: Yields at each of the metallicities.
+        :param metallicities: Metallicities the yields are at. The default of
+                              None uses the metallicity points of the model.
+        """
+        if self._wanted(name):
+            if metallicities is None:
+                metallicities = self.metallicity_points
+            self._abundances_interp[name] = \
+                _interpolation_wrapper(metallicities, values)
+            return
+
+        values = np.asarray(values).astype(np.float64)
+        if metallicities is not None:
+            values = np.interp(_metallicity_log(self.metallicity_points),
+                               _metallicity_log(metallicities), values)
+        self._skipped_values[name] = values
+
+    def _yields_at_points(self, name):
+        """Get the yields of an isotope or element at each of the metallicity
+        points, whether or not it's one of the species being kept."""
+        if name in self._abundances_interp:
+            log_z = _metallicity_log(self.metallicity_points)
+            return self._abundances_interp[name](log_z)
+        return self._skipped_values[name]
+
+    def _collapse_isotopes(self):
+        """Replace the yields of the isotopes with the total yields of each
+        element.
+
+        The interpolation is linear between the metallicity points of the
+        model, so adding the isotopes at those points and interpolating
+        gives the same thing as interpolating each isotope and adding them
+        up. Any fractions that were already loaded only keep the elements.
+        """
+        log_z = _metallicity_log(self.metallicity_points)
+        isotopes = defaultdict(list)
+        for key in self._abundances_interp:
+            isotopes[key.split("_")[0]].append(key)
+
+        element_interp = dict()
+        for element, keys in isotopes.items():
+            # some models have elements in their files too, but like
+            # _sum_elements we use the isotopes if there are any
+            if len(keys) > 1 or "_" in keys[0]:
+                keys = [key for key in keys if "_" in key]
+            values = np.zeros(len(log_z))
+            for key in keys:
+                values += self._abundances_interp[key](log_z)
+            element_interp[element] = _LogZInterpolator(log_z, values)
+        self._abundances_interp = element_interp
+
+        # some loaders set the metallicity while loading, so there may be
+        # isotopes left over from that
+        for key in self.abundances:
+            if "_" in key and key in self.__dict__:
+                delattr(self, key)
+        self.abundances = dict()
+
+        for fractions in [self._metal_fractions_log_z,
+                          self._mass_fractions_log_z]:
+            for key in list(fractions.keys()):
+                if "_" in key:
+                    del fractions[key]
+
+    def _point_values(self):
+        """Get the yields at each of the metallicity points of the model.
+
+        This includes the sum of the isotopes of each element, just like the
+        abundances dictionary does after the metallicity is set.
+
+        :returns: Dictionary where the keys are the isotopes and elements and
+                  the values are arrays of the yields at each metallicity
+                  point.
+        """
+        log_z = _metallicity_log(self.metallicity_points)
+        values = {key: interp(log_z)
+                  for key, interp in self._abundances_interp.items()}
+        # while loading, this includes the species that aren't being kept
+        values.update(self._skipped_values)
+
+        isotopes = defaultdict(list)
+        for key, value in values.items():
+            if "_" not in key:
+                continue
+            element = key.split("_")[0]
+            if self.species is not None and element not in self.species:
+                continue
+            isotopes[element].append(value)
+        for element, element_values in isotopes.items():
+            values[element] = np.sum(element_values, axis=0)
+        return values
+
+    @staticmethod
+    def _total(values, metal_only):
+        """Add up the elements in a dictionary of yields, like the one
+        returned by _point_values."""
+        forbidden = ["H", "He"] if metal_only else []
+        total = 0
+        for key, value in values.items():
+            if "_" not in key and key not in forbidden:
+                total = total + value
+        return total
+
+    def _create_ejecta_sums(self):
+        """Create the interpolation objects for the total ejecta and total
+        metals, using all the isotopes we have now."""
+        values = self._point_values()
+        for metal_only in [True, False]:
+            totals = np.zeros(len(self.metallicity_points))
+            totals += self._total(values, metal_only)
+            self._ejecta_sum_log_z[metal_only] = _interpolation_wrapper(
+                self.metallicity_points, totals)
+
+    def _select_species(self, species):
+        """Throw away everything except the species given. See __init__."""
+        self.species = list(species)
+        elements = [item for item in species if "_" not in item]
+        keep = set(species)
+        keep.update(key for key in self._abundances_interp
+                    if key.split("_")[0] in elements)
+
+        self._abundances_interp = {key: value for key, value
+                                   in self._abundances_interp.items()
+                                   if key in keep}
+        for fractions in [self._metal_fractions_log_z,
+                          self._mass_fractions_log_z]:
+            for key in list(fractions.keys()):
+                if key not in keep:
+                    del fractions[key]
+
+        # get rid of anything left over from setting the metallicity while
+        # loading
+        for key in self.abundances:
+            if key not in keep and key in self.__dict__:
+                delattr(self, key)
+        self.abundances = dict()
 
     def set_metallicity(self, metallicity, initial=False):
         """Sets the metallicity (Z). This is needed since the models depend on Z
@@ -299,65 +379,89 @@ class Yields(object):
         if not 0 <= metallicity <= 1:
             raise ValueError("Metallicity must be between zero and one.")
 
+        # we interpolate in log of metallicity space, so we need to
+        # take the log and use it in the interpolation
+        met_log = _metallicity_log(metallicity)
+        # the totals need to know this before the normalization is done
+        self.metallicity = metallicity
+        self._scale_factor = 1.0
+
         # go through all values, and call them at the metallicity requested,
         # then put those values into the abundances dictionary
         for isotope in self._abundances_interp:
-            # we interpolate in log of metallicity space, so we need to
-            # take the log and use it in the interpolation
-            met_log = _metallicity_log(metallicity)
-
             new_value = self._abundances_interp[isotope](met_log)
-            self.abundances[isotope] = np.asscalar(new_value)
-
-        # we then need to normalize the the old total abundance if we are doing
-        # this any time other than the very first time we set the metallicity,
-        # since then there will be no total_metals already existing. If this is
-        # the first time, we have to take care of the _set_members(), which
-        # something the normalize_metals function would do for us.
-        self._set_members()
-        if self.has_normalization:
-            self.normalize_metals(self.total_metals)
+            self.abundances[isotope] = new_value.item()
 
+        self._sum_elements()
 
-        # also store the metallicity
-        self.metallicity = metallicity
+        # The normalization is one scale factor for everything, so we find it
+        # from the raw values and apply it in the same pass that sets the
+        # attributes. That way normalized models cost the same as ones
+        # without a normalization.
+        if self.has_normalization:
+            self._scale_factor = (self.total_metals /
+                                  self.ejecta_sum(metal_only=True))
+        self._set_members(self._scale_factor)
 
-    def _set_members(self):
+    def _set_members(self, scale_factor=1.0):
         """Puts the elements of the dictionary as attributes of the object
 
-        This must be done after every time we change things"""
+        This must be done after every time we change things
 
-        self._sum_elements()
-        for key in self.abundances:
-            setattr(self, key, self.abundances[key])
+        :param scale_factor: Factor to multiply all the abundances by before
+                             setting them. The element sums must already be
+                             in the abundances dictionary.
+        """
+        if scale_factor != 1.0:
+            for key in self.abundances:
+                self.abundances[key] *= scale_factor
+        self.__dict__.update(self.abundances)
 
     def _sum_elements(self):
         """Creates the sum of each element over all isotopes"""
-        for isotope in self.abundances.copy():  # have to copy so the original
-                                                # doesn't change size
+        # group the isotopes first, so we only go through them once
+        isotopes = defaultdict(list)
+        for isotope, value in self.abundances.items():
             if "_" not in isotope:  # we have a summed element already
                 continue
-            element, mass_num = isotope.split("_")
+            element = isotope.split("_")[0]
+            # if only some isotopes were kept, the sum would be wrong unless
+            # the whole element was asked for
+            if self.species is not None and element not in self.species:
+                continue
+            isotopes[element].append(value)
 
-            # add it
-            this_element = [value for key, value in self.abundances.items()
-                            if element + "_" in key]
-            # element + "_" is needed to that "H" doesn't match with "He".
-            self.abundances[element] = np.sum(this_element)
+        for element, values in isotopes.items():
+            self.abundances[element] = np.sum(values)
 
-    def ejecta_sum(self, metal_only=False):
-        if metal_only:
-            forbidden = ["H", "He"]
-        else:
-            forbidden = []
+    def ejecta_sum(self, metal_only=False, metallicity=None):
+        """Get the total mass ejected.
 
-        total_ejecta = 0
-        for isotope in self.abundances:
-            if "_" not in isotope and isotope not in forbidden:
-                # use the sums we already created to make this easier.
-                total_ejecta += self.abundances[isotope]
+        :param metal_only: Whether to only include metals, or everything.
+        :param metallicity: Metallicity to get the total at. This can be an
+                            array. The default of None uses the metallicity
+                            that was last set.
+        :returns: The total ejecta, including the normalization if there is
+                  one. This is a float if metallicity was not given, and an
+                  array if it was.
+        """
+        # the totals are tabulated over the metallicity points when the model
+        # is loaded, and can be interpolated like anything else
+        if metallicity is not None:
+            met_log = _metallicity_log(metallicity)
+            total = self._ejecta_sum_log_z[metal_only](met_log)
+            if self.has_normalization:
+                total *= self.total_metals / \
+                         self._ejecta_sum_log_z[True](met_log)
+            return total
 
-        return float(total_ejecta)
+        if len(self._ejecta_sum_log_z) > 0:
+            met_log = _metallicity_log(self.metallicity)
+            total = self._ejecta_sum_log_z[metal_only](met_log)[0]
+            return float(total * self._scale_factor)
+
+        # we're still loading, so we have to add things up ourselves
+        return float(self._total(self.abundances, metal_only))
 
     def normalize_metals(self, total_metals):
         """Takes the yields and normalizes them to have some total metal output.
@@ -367,10 +471,9 @@ class Yields(object):
         # first get the original sum of metals, so we know
         total_before = self.ejecta_sum(metal_only=True)
         scale_factor = total_metals / total_before
-        for key in self.abundances:
-            self.abundances[key] *= scale_factor
-
-        self._set_members()
+        # the element sums scale the same way, so they don't need to be redone
+        self._scale_factor *= scale_factor
+        self._set_members(scale_factor)
 
         # we then want to keep track of this going forward
         self.total_metals = total_metals
@@ -384,45 +487,21 @@ class Yields(object):
         The values here are the fraction of metals that a given isotope makes
         up. It's mass(isotope) / total_metals."""
 
-        # store the initial metallicity, so we can restore that when we're done
-        initial_z = self.metallicity
-
         # first create the dictionary. We have one that is under the hood, and
         # holds the objects where the interpolation is done in log Z space
         self._metal_fractions_log_z = dict()
         self._mass_fractions_log_z = dict()
 
-        temp_mass_frac_storage = defaultdict(list)
-        temp_metal_fract_storage = defaultdict(list)
-        for z in self.metallicity_points:
-            self.set_metallicity(z)
-            tot_metals = self.ejecta_sum(metal_only=True)
-            tot_ejecta = self.ejecta_sum(metal_only=False)
-            # need to do this for all elements
-            for isotope in self.abundances:
-                # to calculate the mass fraction, we divide the mass of this
-                # isotope by the total mass in metals
-                this_metal_frac = self.abundances[isotope] / tot_metals
-                this_mass_frac = self.abundances[isotope] / tot_ejecta
-
-                temp_mass_frac_storage[isotope].append(this_mass_frac)
-                temp_metal_fract_storage[isotope].append(this_metal_frac)
-
-        # then create the interpolation object
-        for isotope in self.abundances:
-            mass_fractions = temp_mass_frac_storage[isotope]
-            metal_fractions = temp_metal_fract_storage[isotope]
-
-            mass_interp = _interpolation_wrapper(self.metallicity_points,
-                                                 mass_fractions)
-            metal_interp = _interpolation_wrapper(self.metallicity_points,
-                                                  metal_fractions)
-
-            self._mass_fractions_log_z[isotope] = mass_interp
-            self._metal_fractions_log_z[isotope] = metal_interp
-
-        # then restore the metallicity
-        self.set_metallicity(initial_z)
+        # to calculate the mass fraction, we divide the mass of this isotope
+        # by the total mass in metals (or everything) at each metallicity
+        log_z = _metallicity_log(self.metallicity_points)
+        tot_metals = self._ejecta_sum_log_z[True](log_z)
+        tot_ejecta = self._ejecta_sum_log_z[False](log_z)
+        for isotope, values in self._point_values().items():
+            self._mass_fractions_log_z[isotope] = _interpolation_wrapper(
+                self.metallicity_points, values / tot_ejecta)
+            self._metal_fractions_log_z[isotope] = _interpolation_wrapper(
+                self.metallicity_points, values / tot_metals)
 
     def mass_fraction(self, isotope, metallicity, metal_only=True):
         """Get the mass fraction for a particular isotope. """
@@ -437,482 +516,117 @@ class Yields(object):
         else:
             return self._mass_fractions_log_z[isotope](log_z)
 
-    def make_test(self):
-        # totally arbitrary values for testing
-        self.metallicity_points = [0, 1]
-        metallicities = _metallicity_log(self.metallicity_points)
-        self._abundances_interp["H_1"] = interpolate.interp1d(metallicities,
-                                                              [1, 2])
-        self._abundances_interp["He_2"] = interpolate.interp1d(metallicities,
-                                                              [2, 3])
-        self._abundances_interp["Li_3"] = interpolate.interp1d(metallicities,
-                                                              [3, 4])
-        self._abundances_interp["Be_4"] = interpolate.interp1d(metallicities,
-                                                              [4, 5])
-        self._abundances_interp["B_5"] = interpolate.interp1d(metallicities,
-                                                              [5, 6])
-        self._abundances_interp["C_6"] = interpolate.interp1d(metallicities,
-                                                              [6, 7])
-        self._abundances_interp["N_7"] = interpolate.interp1d(metallicities,
-                                                              [7, 8])
-        self._abundances_interp["O_8"] = interpolate.interp1d(metallicities,
-                                                              [8, 9])
-        self._abundances_interp["F_9"] = interpolate.interp1d(metallicities,
-                                                              [9, 10])
-        self._abundances_interp["Na_10"] = interpolate.interp1d(metallicities,
-                                                              [10, 11])
-
-    def make_iwamoto_99_Ia(self, model="W7"):
-        """Populates the object with the type Ia supernova abundances from
-        Iwamoto et al 1999
-
-        :param model: which model from the paper to use. The options are "W7", 
-                      "W70", "WDD1", "WDD2", "WDD3", "CDD1", "CDD2". The "W7" 
-                      model is typically the one that is used the most.
-        """
-        self.metallicity_points = [0, 1]
-        # get the index of the correct column
-        column_idxs = {"W7":2, "W70":3, "WDD1":4, "WDD2":5, "WDD3":6, 
-                       "CDD1":7, "CDD2":8}
-        our_idx = column_idxs[model]
-
-        # then iterate through each line and handle it appropriately
-        with open(_get_data_path(iwamoto_file), "r") as in_file:
-            for line in in_file:
-                # ignore the comments
-                if not line.startswith("#"):
-                    # We then need to get the appropriate values from the line.
-                    # to do this we split it on spaces, then use the index
-                    # we had above
-                    split_line = line.split()
-                    element = split_line[0]
-                    abundance = split_line[our_idx]
-
-                    # the elements are formatted in LaTeX in the table, so we
-                    # need to format it properly
-                    formatted_element = _parse_iwamoto_element(element)
-                    # We then need to make the interpolation object. Since this
-                    # will be the same at all metallicities, this is easy
-                    interp_obj = _interpolation_wrapper(self.metallicity_points,
-                                                        [float(abundance)]*2)
-
-                    self._abundances_interp[formatted_element] = interp_obj
-
-    def make_nomoto_06_II(self):
-        """Populates the model with the yields from the Nomoto 2006 models"""
-        self.metallicity_points = z_values_nomoto
-
-        # then iterate through each line and handle it appropriately
-        with open(_get_data_path(nomoto_file), "r") as in_file:
-            for line in in_file:
-                # ignore the comments
-                if not line.startswith("#"):
-                    # We then need to get the appropriate values from the line.
-                    # to do this we split it on spaces, then we know where
-                    # everything is
-                    split_line = line.split()
-                    mass_number = split_line[0]
-                    atomic_name = split_line[1]
-                    these_abundances = split_line[2:]
-
-                    # We can then parse the string to get the elemental format
-                    # we need
-                    formatted_element = _parse_nomoto_element(mass_number,
-                                                              atomic_name)
-
-                    interp_obj = _interpolation_wrapper(self.metallicity_points,
-                                                        these_abundances)
-                    self._abundances_interp[formatted_element] = interp_obj
-
-    def _read_nomoto_files_ind(self, idx, z_0_0_file, z_0_001_file,
-                               z_0_004_file, z_0_02_file):
-        # then we can iterate through the files. Each file is a given
-        # metallicity and has all mass models, we we want to iterate through
-        # all files at the same time. z_0_0 etc are all rows in the
-        # respective files.
-        for z_0_0, z_0_001, z_0_004, z_0_002 in zip(z_0_0_file.readlines(),
-                                                    z_0_001_file.readlines(),
-                                                    z_0_004_file.readlines(),
-                                                    z_0_02_file.readlines()):
-
-            elt = z_0_0.split()[0]
-            # ignore rows that don't matter
-            if elt in ["M", "E"]:
-                continue
+    def mass_fraction_derivative(self, isotope, metallicity, metal_only=True):
+        """Get the derivative of `mass_fraction` with respect to metallicity.
 
-            # Get the column with the right SN in it for each file
-            items = [row.split()[idx] for row in [z_0_0, z_0_001,
-                                                  z_0_004, z_0_002]]
-
-            # then parse it appropriately
-            if elt == "Mcut":
-                for z, item in zip(self.metallicity_points, items):
-                    self.mass_cuts[z] = float(item)
-            else:  # a regular element
-                # parse the element name
-                elt = _parse_nomoto_individual_element(elt)
-
-                # then make the interpolation object
-                interp_obj = _interpolation_wrapper(self.metallicity_points,
-                                                    items)
-
-                self._abundances_interp[elt] = interp_obj
-
-    def make_individual_nomoto_regular(self, mass):
-        """Populates the model with the yields from the Nomoto 2006
-        individual supernova values, not the IMF integrated ones."""
-        self.metallicity_points = z_values_nomoto
-        #we then need to open a bunch of files with all this data
-        z_0_0_file = open(_get_data_path(nomoto_ind_0), "r")
-        z_0_001_file = open(_get_data_path(nomoto_ind_0_001), "r")
-        z_0_004_file = open(_get_data_path(nomoto_ind_0_004), "r")
-        z_0_02_file = open(_get_data_path(nomoto_ind_0_02), "r")
-
-        # we know the format of the file, so we know which column the mass we
-        # want is in. We store those indexes here
-        idxs = {"13": 1, "15": 2, "18": 3, "20": 4, "25": 5, "30": 6, "40": 7}
-        #then get the one we want
-        try:
-            idx = idxs[mass]
-        except KeyError:
-            raise ValueError("This model was not found:"
-                             " nomoto_II_{}".format(mass))
-
-        self._read_nomoto_files_ind(idx, z_0_0_file, z_0_001_file,
-                                    z_0_004_file, z_0_02_file)
-
-    def make_individual_nomoto_hn(self, mass):
-        """Populates the model with the yields from the Nomoto 2006
-        individual supernova values, not the IMF integrated ones."""
-        self.metallicity_points = z_values_nomoto
-
-        #we then need to open a bunch of files with all this data
-        z_0_0_file = open(_get_data_path(nomoto_ind_0_hn), "r")
-        z_0_001_file = open(_get_data_path(nomoto_ind_0_001_hn), "r")
-        z_0_004_file = open(_get_data_path(nomoto_ind_0_004_hn), "r")
-        z_0_02_file = open(_get_data_path(nomoto_ind_0_02_hn), "r")
-
-        # we know the format of the file, so we know which column the mass we
-        # want is in. We store those indexes here
-        idxs = {"20": 1, "25": 2, "30": 3, "40": 4}
-        #then get the one we want
-        try:
-            idx = idxs[mass]
-        except KeyError:
-            raise ValueError("This model was not found:"
-                             " nomoto_II_{}_hn".format(mass))
-
-        self._read_nomoto_files_ind(idx, z_0_0_file, z_0_001_file,
-                                    z_0_004_file, z_0_02_file)
-
-    def make_individual_kobayashi(self, mass, hn):
-        """
-        Populate the class with yields from Kobayashi+ 2006.
+        The mass fractions are linear in log(Z) between the metallicity points
+        of the model, so this is the slope of that segment divided by
+        Z ln(10). It is zero outside the range of the models (including at
+        zero metallicity), where the values are constant.
 
-        :param mass: Mass of the individual SN model
-        :type mass: str
-        :param hn: Whether or not this is a hypernova model.
-        :type hn: bool
-        :return: None
+        :param isotope: Isotope (like "Fe_56") or element (like "Fe").
+        :param metallicity: Metallicity, which can be an array.
+        :param metal_only: Whether to use the fraction of the metals, or of
+                           all the ejecta.
+        :returns: Array of the derivative at each metallicity.
         """
-        # set the moetallicity and mass
-        self.metallicity_points = z_values_nomoto
-        self.mass = float(mass)
-
-        # get the correct file, and the indices for the mass models in that file
-        if hn:
-            in_file = kobayashi_hn
-            idxs = {"20": 2, "25": 3, "30": 4, "40": 5}
-        else:
-            in_file = kobayashi_sn
-            idxs = {"13": 2, "15": 3, "18": 4, "20": 5, "25": 6, "30": 7,
-                    "40": 8}
-
-        # verify that the use passed in a model that exists
-        try:
-            idx = idxs[mass]
-        except KeyError:
-            raise ValueError("This model was not found:"
-                             " kobayashi_II_{}_hn".format(mass))
-
-        # Set the energies
-        if hn:
-            energies = {"20": 10E51, "25": 10E51, "30": 20E51, "40": 30E51}
-            for z in self.metallicity_points:
-                self.energy_erg[z] = energies[mass]
-        else:
-            # all models have 1E51 ergs of energy
-            for z in self.metallicity_points:
-                self.energy_erg[z] = 1E51
-
-
-        # create temporary dictionary for reading the file, due to
-        # its unhelpful format.
-        temp_items = {z:dict() for z in self.metallicity_points}
-        # read the file
-        with open(_get_data_path(in_file), "r") as data_file:
-            for line in data_file:
-                if line.startswith("#"):  # comment lines
-                    continue
-
-                # otherwise we have an actual data line
-                split_line = line.split()
-                z = float(split_line[0])
-                elt = str(split_line[1])
-                value = float(split_line[idx])
-
-                # what we do with it depends on what the "elt" is.
-                if elt == "M_cut_":
-                    self.mass_cuts[z] = value  # store this directly
-                elif elt == "M_final_":
-                    # store the mass lost to winds
-                    self.wind_ejecta[z] = self.mass - value
-                else:
-                    # store this in the temporary container after parsing elt.
-                    elt = _parse_kobayashi_individual_element(elt)
-                    temp_items[z][elt] = value
-
-        # then we can parse the ejected values into the appropriate format
-        for elt in temp_items[0].keys():
-            # get all the values for a given element
-            values = [temp_items[z][elt] for z in self.metallicity_points]
-            # then make the object to interpolate those in metallicity.
-            interp_obj = _interpolation_wrapper(self.metallicity_points, values)
-            self._abundances_interp[elt] = interp_obj
-
-        # finally we can set the ejected mass by using the other values.
-        for z in self.metallicity_points:
-            self.total_end_ejecta[z] = self.mass - (self.mass_cuts[z] +
-                                                    self.wind_ejecta[z])
-
-
-    def make_individal_ww95(self, model):
-        """Populates the model with the data from the individual 
-        WW95 models"""
-        self.metallicity_points = z_values_ww
-
-        # we then need to open a bunch of files with all this data. Depending
-        # on the mass of the model, we will have to open different files
-        if int(model[0:2]) < 30:
-            z_0_file = open(_get_data_path(ww_ind_0_a), "r")
-            z_1_file = open(_get_data_path(ww_ind_4_sol_a), "r")
-            z_2_file = open(_get_data_path(ww_ind_0_01_sol_a), "r")
-            z_3_file = open(_get_data_path(ww_ind_0_1_sol_a), "r")
-            z_4_file = open(_get_data_path(ww_ind_sol_a), "r")
+        metallicity = np.array(metallicity, dtype=np.float64, ndmin=1)
+        # the real log, so zero metallicity is outside the models
+        with np.errstate(divide="ignore"):
+            log_z = np.log10(metallicity)
+        if metal_only:
+            slope = self._metal_fractions_log_z[isotope].slope(log_z)
         else:
-            z_0_file = open(_get_data_path(ww_ind_0_b), "r")
-            z_1_file = open(_get_data_path(ww_ind_4_sol_b), "r")
-            z_2_file = open(_get_data_path(ww_ind_0_01_sol_b), "r")
-            z_3_file = open(_get_data_path(ww_ind_0_1_sol_b), "r")
-            z_4_file = open(_get_data_path(ww_ind_sol_b), "r")
-
-        # we know the format of the file, so we know which column the mass we
-        # want is in. We store those indexes here
-        idxs_0 = {"12A": 1, "13A": 2, "15A": 3, "18A": 4, "20A": 5, "22A": 6,
-                  "25A": 7, "25B": 8}
-        idxs_1 = {"12A": 1, "13A": 2, "15A": 3, "18A": 4, "20A": 5, "22A": 6,
-                  "25A": 7}
-        idxs_4 = {"11A": 1, "12A": 2, "13A": 3, "15A": 4, "18A": 5, "19A": 6,
-                  "20A": 7, "22A": 8, "25A": 9}
-        all_high_mass = {"30A": 1, "30B": 2, "35A": 3, "35B": 4, "35C": 5,
-                         "40A": 6, "40B": 7, "40C": 8}
-        idxs_0.update(all_high_mass)
-        idxs_1.update(all_high_mass)
-        idxs_4.update(all_high_mass)
-
-        # there are certain models that need special handling, since they are
-        # only present in some metallicity sets
-        if "11A" in model:  # only present in solar
-            self._handle_different_ww95(z_4_file, idxs_4[model])
-            return
-        elif "19A" in model:  # only present in solar
-            self._handle_different_ww95(z_4_file, idxs_4[model])
-            return
-        elif "25B" in model:  # only present in zero metallicity
-            self._handle_different_ww95(z_0_file, idxs_0[model])
-            return
-
-        # then get the one we want
-        try:
-            idx_0 = idxs_0[model]
-            idx_1 = idxs_1[model]
-            idx_2 = idx_1  # 2 and 3 are the same as 1
-            idx_3 = idx_1
-            idx_4 = idxs_4[model]
-        except KeyError:
-            raise ValueError("This is not a valid WW95 model. ")
-
-        # We will do each file one at a time and store the results as we go
-        # before doing the interpolation later. We go in order of increasing
-        # metallicity, so that this is the same as the metallicity list we made
-        # earlier. I have since redone the files and this problem should be
-        # fixed, but the code still works, so oh well.
-        elements = defaultdict(list)
-        for idx, this_file in zip([idx_0, idx_1, idx_2, idx_3, idx_4],
-                                  [z_0_file, z_1_file, z_2_file, z_3_file,
-                                   z_4_file]):
-            for row in this_file:
-                # only get the rows that matter
-                if row.split()[0] in ["elt", "KE", "Mass"]:
-                    continue
-
-                # get the proper columns from the file
-                elt = row.split()[0]
-                item = row.split()[idx]
-                # parse the item. The format here is the same as Nomoto
-                elt = _parse_nomoto_individual_element(elt)
-
-                # then put this in the dictionary
-                elements[elt].append(item)
-
-        # we can then create the interpolation objects and assign them to the
-        # dictionary for the object
-        for elt, item in elements.items():
-            # We then need to make the interpolation object.
-            interp_obj = _interpolation_wrapper(self.metallicity_points, item)
-
-            self._abundances_interp[elt] = interp_obj
-
-    def _handle_different_ww95(self, in_file, idx):
-
-        # then iterate through each line and handle it appropriately
-        elements = dict()
-        for row in in_file:
-            # only get the rows that matter
-            if row.split()[0] in ["elt", "KE", "Mass"]:
-                continue
-
-            # get the proper columns from the file
-            elt = row.split()[0]
-            item = row.split()[idx]
-            # parse the item. The format here is the same as Nomoto
-            elt = _parse_nomoto_individual_element(elt)
-
-            # then put this in the dictionary
-            elements[elt] = item
-
-        # we can then create the interpolation objects and assign them to the
-        # dictionary for the object
-        for elt, item in elements.items():
-            # We then need to make the interpolation object.
-
-            try:
-                interp_obj = _interpolation_wrapper([0, 1], [item] * 2)
-            except ValueError:
-                print([0, 1], [item] * 2)
-                raise KeyError
-            self._abundances_interp[elt] = interp_obj
-
-    def make_imf_integrated(self, filename):
-        # we need to get the metallicities used here
-        if "nomoto" in filename:
-            self.metallicity_points = z_values_nomoto
-        else:  # use WW
-            self.metallicity_points = z_values_ww
-
-        # then iterate through each line and handle it appropriately
-        with open(_get_data_path(filename), "r") as in_file:
-            for line in in_file:
-                # ignore the comments
-                if not line.startswith("#"):
-                    # We then need to get the appropriate values from the line.
-                    # to do this we split it on spaces, then we know where
-                    # everything is
-                    split_line = line.split()
-                    elt = split_line[0]
-                    these_abundances = split_line[1:]
-
-                    # the element is already formatted properly, so we don't
-                    # have to change anything there
-
-                    # We then need to make the interpolation object.
-                    interp_obj = _interpolation_wrapper(self.metallicity_points,
-                                                        these_abundances)
-                    self._abundances_interp[elt] = interp_obj
-
-    def _handle_iron_ww(self):
-        """In the WW 95 yields, the 56 Ni should decay to Fe 56 after a longer
-        period of time, but the evolution stops too early. To fix this, we add
-        all the 56Ni to the 56Fe. The Iron is also too high, so we divide
-        it by two."""
-        real_56_fe_abundances = []
-        real_56_ni_abundances = []
-        for z in self.metallicity_points:
-            self.set_metallicity(z)
-            real_56_fe_abundances.append((self.Ni_56 + self.Fe_56) / 2.0)
-            real_56_ni_abundances.append(0)
-
-        ni_56_interp = _interpolation_wrapper(self.metallicity_points,
-                                              real_56_ni_abundances)
-        fe_56_interp = _interpolation_wrapper(self.metallicity_points,
-                                              real_56_fe_abundances)
-
-        self._abundances_interp["Ni_56"] = ni_56_interp
-        self._abundances_interp["Fe_56"] = fe_56_interp
-
-    def make_individual_agb_nugrid(self, mass):
+            slope = self._mass_fractions_log_z[isotope].slope(log_z)
+        return _log_slope_to_derivative(slope, metallicity)
+
+    def _species_table(self, species):
+        """Get the yields of some species at each of the metallicity points,
+        stacked into one array of shape (n_points, n_species). Species the
+        model doesn't have are zero."""
+        species = tuple(species)
+        if species not in self._species_tables:
+            values = self._point_values()
+            table = np.zeros((len(self.metallicity_points), len(species)))
+            for idx, name in enumerate(species):
+                if name in values:
+                    table[:, idx] = values[name]
+            self._species_tables[species] = table
+        return self._species_tables[species]
+
+    def yields_table(self, species, metallicity):
+        """Get the yields of many species at many metallicities at once.
+
+        This does the same interpolation as `set_metallicity`, but for all the
+        species and metallicities in one go, without changing the
+        metallicity of this object.
+
+        :param species: List of isotopes (like "Fe_56") and elements (like
+                        "Fe"). Ones the model doesn't have are zero.
+        :param metallicity: Metallicity, which can be an array of any shape.
+        :returns: Array of the yields (including the normalization if there
+                  is one), with the shape of the metallicity plus one more
+                  axis for the species.
         """
-        Populate the model with data from the NuGrid AGB models.
-
-        :param mass: Mass (in solar masses) of the desired model
-        :return: None
-        """
-        self.mass = float(mass)
-        # use the NuGrid code to read the yields
-        nugrid_read = read_yields.read_nugrid_yields(_get_data_path(nugrid_agb))
-        # get the metallicity points and masses
-        self.metallicity_points = sorted(nugrid_read.metallicities)
-        masses = nugrid_read.get(Z=0.02, quantity="masses")
-        # check for valid mass
-        if self.mass not in masses:
-            raise ValueError("This model was not found:"
-                             " nugrid_{}".format(mass))
-        # get the isotopes present in the model, and slightly parse them
-        isotopes = nugrid_read.header_attrs["Isotopes"].split(" ")
-        isotopes = [iso.replace(",", "") for iso in isotopes]
-
-        # go through all the isotopes and get the yields
-        for isotope in isotopes:
-            # use the NuGrid code to read in the given isotope
-            yields = [nugrid_read.get(M=self.mass, Z=Z, quantity="Yields",
-                                      specie=isotope)
-                      for Z in self.metallicity_points]
-
-            # then make the interpolation object
-            interp_obj = _interpolation_wrapper(self.metallicity_points,
-                                                yields)
-            # format the name before puttting in the interpolation object
-            iso_name = isotope.replace("-", "_")
-            self._abundances_interp[iso_name] = interp_obj
-
-        for z in self.metallicity_points:
-            self.set_metallicity(z)
-            self.total_end_ejecta[z] = self.ejecta_sum(metal_only=False)
-
-    def make_nomoto_18_Ia(self):
-        """
-        Populate the model with data from the Nomoto 2018 W7 models.
-
-        :return: None
+        metallicity = np.asarray(metallicity, dtype=np.float64)
+        table = self._species_table(species)
+        log_z = _metallicity_log(metallicity).reshape(metallicity.shape)
+        idx, weight = _log_z_weights(
+            _metallicity_log(self.metallicity_points), log_z)
+        values = table[idx] * (1 - weight[..., np.newaxis]) + \
+            table[np.minimum(idx + 1, len(table) - 1)] * \
+            weight[..., np.newaxis]
+        if self.has_normalization:
+            values *= (self.total_metals /
+                       self._ejecta_sum_log_z[True](log_z))[..., np.newaxis]
+        return values
+
+    def yields_table_jacobian(self, species, metallicity):
+        """Get the yields of many species along with their derivatives with
+        respect to the metallicity and the normalization.
+
+        If the model is normalized to a total metal mass T, the yields are
+        the raw yields times T / M(Z), where M(Z) is the raw total metal mass.
+        Models without a normalization behave as if T = M(Z), so the
+        derivative with respect to T is what normalizing them would do.
+
+        :param species: List of isotopes and elements. See `yields_table`.
+        :param metallicity: Metallicity, which can be an array of any shape.
+        :returns: Array of the yields, array of their derivatives with
+                  respect to metallicity, and array of their derivatives with
+                  respect to the total metal mass. All have the shape of
+                  `yields_table`.
         """
-        # manually enter the metallicity points (solar and 0.1 solar)
-        self.metallicity_points = [0.002, 0.02]
-
-        with open(_get_data_path("nomoto_18_Ia.txt"), "r") as data_file:
-            for row in data_file:
-                if row.startswith("#"):
-                    continue
-                # the data is just three values: element, then yields at the
-                # two metallicities
-                elt, val_solar, val_subsolar = row.split()
-                elt = _parse_nomoto_individual_element(elt)
+        metallicity = np.asarray(metallicity, dtype=np.float64)
+        values = self.yields_table(species, metallicity)
+        table = self._species_table(species)
+        log_points = _metallicity_log(self.metallicity_points)
+        log_z = _metallicity_log(metallicity).reshape(metallicity.shape)
+        metals = self._ejecta_sum_log_z[True](log_z)[..., np.newaxis]
+
+        # the slopes of the raw yields in log(Z), with the real log so zero
+        # metallicity is outside the models
+        with np.errstate(divide="ignore"):
+            true_log_z = np.log10(metallicity)
+        raw_slopes = np.zeros(values.shape)
+        if len(table) > 1:
+            segments = np.diff(table, axis=0) / \
+                np.diff(log_points)[:, np.newaxis]
+            idx = np.clip(np.searchsorted(log_points, true_log_z,
+                                          side="right") - 1,
+                          0, len(table) - 2)
+            inside = (true_log_z >= log_points[0]) & \
+                (true_log_z < log_points[-1])
+            raw_slopes = np.where(inside[..., np.newaxis], segments[idx], 0)
 
-                # then make the interpolation object
-                interp_obj = _interpolation_wrapper(self.metallicity_points,
-                                                    [val_subsolar, val_solar])
-
-                self._abundances_interp[elt] = interp_obj
-
-
-    #TODO: handle the mass, and various ejecta variables more properly for both
-    # the WW set and the IMF integrated set.
\ No newline at end of file
+        if self.has_normalization:
+            metals_slope = self._ejecta_sum_log_z[True].slope(true_log_z)
+            slopes = raw_slopes * self.total_metals / metals - \
+                values * metals_slope[..., np.newaxis] / metals
+            d_norm = values / self.total_metals
+        else:
+            slopes = raw_slopes
+            d_norm = values / metals
+        d_z = _log_slope_to_derivative(slopes,
+                                       metallicity[..., np.newaxis])
+        return values, d_z, d_norm